@@ -1,26 +1,50 @@
 '''
-This module initializes the Flask application and the database,
-registers the application's error handlers, and creates the database tables.
+This module initializes the Flask application, the database and the
+schema migrations, and registers the application's error handlers.
+
+The database schema is owned by the migrations in the `migrations`
+directory and is applied with `flask db upgrade`; the application
+factory never issues DDL.
+
+Applications created for a server rather than the command line skip
+the migrations and the command line commands, whose imports take the
+better part of a boot.
 '''
 
+import os
 from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from .cache import meeting_cache
 from .database import db
+from .events import event_broker
+from .hashing import password_hasher
+from .json_provider import json_provider_class
+from .pooling import pool_monitor
+from .replica import replica_router
+from .sqlite import sqlite_profile
 from .error_handlers import (handle_bad_request, handle_unauthorized,
                              handle_forbidden, handle_page_not_found,
+                             handle_service_unavailable,
                              handle_internal_server_error)
+from .exceptions import ServiceUnavailableError
+from .services import token_service
+
+MIGRATIONS_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
 
 
-def create_app(name=__name__):
+def create_app(name=__name__, cli=True):
     '''
     This function initializes the Flask application with the specified name,
-    configures it, initializes the JWT manager and the database,
-    imports routes and models, creates the database tables,
-    and registers error handlers.
+    configures it and its JSON provider, initializes the JWT manager, the
+    database and the migrations, imports routes and models, and registers
+    error handlers.
 
     Args:
         name (str): The name of the application. Defaults to '__name__'.
+        cli (bool): Whether to register the migrations and the command
+                    line commands. Servers pass False.
 
     Returns:
         app (flask.Flask): The initialized Flask application.
@@ -33,11 +57,25 @@ def create_app(name=__name__):
     else:  # 'production' or any other value
         app.config.from_object('config.ProductionConfig')
 
-    CORS(app, resources={
-         r"/api/*": {"origins": app.config.get('ALLOWED_ORIGINS')}})
-    jwt = JWTManager(app)  # pylint: disable=unused-variable
+    app.json = json_provider_class(app.config['JSON_PROVIDER'])(app)
 
+    CORS(app, resources={
+         r"/api/*": {"origins": app.config.get('ALLOWED_ORIGINS'),
+                     "expose_headers": ['ETag', 'X-Next-Cursor', 'X-Last-Write']}})
+    jwt = JWTManager(app)
+    jwt.token_verification_loader(token_service.is_bearer_token)
+
+    # the change log stores serialized models, dates and times included
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+        'json_serializer': app.json.dumps}
     db.init_app(app)
+    pool_monitor.init_app(app)
+    sqlite_profile.init_app(app)
+    replica_router.init_app(app)
+    meeting_cache.init_app(app)
+    event_broker.init_app(app)
+    password_hasher.init_app(app)
 
     with app.app_context():
 
@@ -48,26 +86,42 @@ def create_app(name=__name__):
         from .routes.meeting_routes import meeting_routes
         from .routes.vote_routes import vote_routes
         from .routes.timeslot_routes import timeslot_routes
+        from .routes.internal_routes import internal_routes
 
         # Register blueprints
         app.register_blueprint(user_routes)
         app.register_blueprint(meeting_routes)
         app.register_blueprint(vote_routes)
         app.register_blueprint(timeslot_routes)
+        app.register_blueprint(internal_routes)
 
-        # import models before db.create() call
+        if cli:
+            # pylint: disable=import-outside-toplevel
+            from flask_migrate import Migrate
+            from .commands import app_cli, tokens_cli, votes_cli
 
-        # pylint: disable=import-outside-toplevel,unused-import
-        from .models import meeting, timeslot, user, vote
+            Migrate(app, db, directory=MIGRATIONS_DIRECTORY,
+                    render_as_batch=True)
+
+            # Register command line commands
+            app.cli.add_command(votes_cli)
+            app.cli.add_command(tokens_cli)
+            app.cli.add_command(app_cli)
 
-        # create tables for our models
-        db.create_all()
+        # import models so they are registered on the metadata
+        # used by the migrations
+
+        # pylint: disable=import-outside-toplevel,unused-import
+        from .models import (meeting, meeting_change, meeting_participant,
+                             refresh_token, timeslot, user, vote)
 
         # register error handlers
         app.register_error_handler(400, handle_bad_request)
         app.register_error_handler(401, handle_unauthorized)
         app.register_error_handler(403, handle_forbidden)
         app.register_error_handler(404, handle_page_not_found)
+        app.register_error_handler(ServiceUnavailableError,
+                                   handle_service_unavailable)
         app.register_error_handler(500, handle_internal_server_error)
 
     return app
@@ -0,0 +1,96 @@
+'''
+This package defines the asynchronous (ASGI) entry point of the
+application.
+
+The ASGI application serves the meeting reads and event streams from
+coroutines over an AsyncSession, so that a single worker holds
+thousands of mostly idle connections, and hands every other request
+over to the Flask application, which runs it on a thread of the event
+loop's executor. Both applications share the configuration, the models,
+the meeting cache and the event broker: writes handled by Flask reach
+the event streams served by the same process.
+
+It requires the optional dependencies listed in
+`requirements-async.txt`.
+
+Classes:
+    AsgiDispatcher: Routes requests to the async or the Flask application.
+
+Functions:
+    create_asgi_app: Create the ASGI application.
+'''
+
+from hypercorn.middleware import AsyncioWSGIMiddleware
+from quart import Quart
+from quart.json.provider import DefaultJSONProvider
+from quart_cors import cors
+from werkzeug.exceptions import HTTPException
+from .. import create_app
+from ..database import db
+from ..json_provider import json_provider_class
+from .database import async_db
+
+
+class AsgiDispatcher:
+    '''
+    An ASGI application routing each HTTP request to the async
+    application when one of its routes matches, and to the Flask
+    application otherwise.
+
+    Attributes:
+        async_app (quart.Quart): The async application.
+        flask_app (flask.Flask): The synchronous application.
+    '''
+
+    def __init__(self, async_app, flask_app):
+        self.async_app = async_app
+        self.flask_app = flask_app
+        self._wsgi_app = AsyncioWSGIMiddleware(flask_app)
+        self._routes = async_app.url_map.bind('')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and not self._matches(scope):
+            await self._wsgi_app(scope, receive, send)
+        else:
+            # the async application also handles the server's lifespan
+            await self.async_app(scope, receive, send)
+
+    def _matches(self, scope):
+        try:
+            self._routes.match(scope['path'], method=scope['method'])
+        except HTTPException:
+            return False
+        return True
+
+
+def create_asgi_app(name=__name__):
+    '''
+    This function creates the Flask application with the specified name
+    and the async application sharing its configuration, and returns
+    the ASGI application dispatching between them.
+
+    Args:
+        name (str): The name of the application. Defaults to '__name__'.
+
+    Returns:
+        AsgiDispatcher: The ASGI application.
+    '''
+    flask_app = create_app(name, cli=False)
+
+    app = Quart(name, static_folder=None)
+    app.config.from_mapping(flask_app.config)
+    app.json = json_provider_class(app.config['JSON_PROVIDER'],
+                                   DefaultJSONProvider)(app)
+    app.extensions['flask_app'] = flask_app
+    app = cors(app, allow_origin=app.config.get('ALLOWED_ORIGINS'),
+               expose_headers=['ETag', 'X-Next-Cursor', 'X-Last-Write'])
+
+    with flask_app.app_context():
+        # resolves relative SQLite paths like Flask-SQLAlchemy does
+        async_db.init_app(app, db.engine.url)
+
+    # pylint: disable=import-outside-toplevel
+    from .routes import async_meeting_routes
+    app.register_blueprint(async_meeting_routes)
+
+    return AsgiDispatcher(app, flask_app)
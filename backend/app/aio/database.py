@@ -0,0 +1,123 @@
+'''
+This module initializes the asynchronous database sessions used by the
+ASGI application.
+
+The async engine connects to the same database as the Flask application,
+through the asyncio driver of its backend, and maps the same models.
+Each request gets its own AsyncSession, closed when the request ends.
+
+Classes:
+    AsyncDatabase: Owns the async engine and the per-request sessions.
+
+Functions:
+    async_database_url: Map a database URL to its asyncio driver.
+
+Variables:
+    async_db: The application's async database.
+'''
+
+from quart import g
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from ..sqlite import sqlite_profile
+
+# asyncio driver of each database backend
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+SESSION_KEY = 'async_db_session'
+
+# engine options that apply to the async engine's pool as they are
+POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle',
+                'pool_pre_ping')
+
+
+def async_database_url(url):
+    '''
+    Map a database URL to the asyncio driver of its backend.
+
+    Args:
+        url (str or sqlalchemy.engine.URL): The URL used by the Flask
+                                            application.
+
+    Returns:
+        sqlalchemy.engine.URL: The same URL with an asyncio driver.
+
+    Raises:
+        ValueError: If the backend has no supported asyncio driver.
+    '''
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(
+            f'No asyncio driver for the {url.get_backend_name()} backend')
+    return url.set(drivername=driver)
+
+
+class AsyncDatabase:
+    '''
+    The async engine and session factory of the ASGI application.
+
+    Attributes:
+        engine (sqlalchemy.ext.asyncio.AsyncEngine): The async engine,
+                                                     once initialized.
+    '''
+
+    def __init__(self):
+        self.engine = None
+        self._sessionmaker = None
+
+    def init_app(self, app, url):
+        '''
+        Create the engine and register the session teardown. The pool,
+        if the driver uses one, is sized like the Flask application's,
+        and SQLite connections get the same pragmas.
+
+        Args:
+            app (quart.Quart): The ASGI application.
+            url (str or sqlalchemy.engine.URL): The database URL of the
+                                                Flask application.
+        '''
+        url = async_database_url(url)
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        if url.get_backend_name() == 'sqlite':
+            # aiosqlite opens a connection per checkout, without a pool
+            options = {}
+        self.engine = create_async_engine(
+            url, **{key: options[key] for key in POOL_OPTIONS if key in options})
+        sqlite_profile.tune(self.engine.sync_engine)
+        # payloads are serialized after the session is done with them
+        self._sessionmaker = async_sessionmaker(
+            self.engine, expire_on_commit=False)
+        app.teardown_appcontext(self.remove)
+        app.after_serving(self.dispose)
+
+    @property
+    def session(self):
+        '''
+        The AsyncSession of the current request, opened on first use.
+        '''
+        if SESSION_KEY not in g:
+            setattr(g, SESSION_KEY, self._sessionmaker())
+        return getattr(g, SESSION_KEY)
+
+    async def remove(self, exception=None):  # pylint: disable=unused-argument
+        '''
+        Close the session of the current request, if any.
+        '''
+        session = g.pop(SESSION_KEY, None)
+        if session is not None:
+            await session.close()
+
+    async def dispose(self):
+        '''
+        Close every pooled connection, e.g. when the server shuts down.
+        '''
+        if self.engine is not None:
+            await self.engine.dispose()
+
+
+async_db = AsyncDatabase()
@@ -0,0 +1,174 @@
+'''
+This module defines the asynchronous routes served by the ASGI application.
+
+They answer the read-heavy and long-lived meeting requests without
+holding a thread each: the database is queried through an AsyncSession
+and event streams await their events on the event loop.
+
+Blueprint:
+    async_meeting_routes: Blueprint that handles the asynchronous
+                          requests related to meetings.
+'''
+
+import asyncio
+from quart import Blueprint, Response, current_app, g, jsonify, request
+from . import services
+from .database import async_db
+from .utils import (events_token_or_jwt_required, jwt_required_and_user_loaded,
+                    not_modified, shape_not_supported)
+from ..events import event_broker
+from ..exceptions import UnexpectedError
+from ..serialization import (FULL_MEETING, MEETING_FIELDS, MEETING_RELATIONSHIPS,
+                             TALLY_MEETING, TALLY_MEETING_FIELDS, parse_shape)
+from ..utils import meeting_etag, with_etag
+
+
+async_meeting_routes = Blueprint('async_meeting_routes', __name__,
+                                 url_prefix='/api')
+
+
+@async_meeting_routes.route('/meetings/<int:meeting_id>', methods=['GET'])
+@jwt_required_and_user_loaded
+async def get_meeting(meeting_id):
+    '''
+    Route for fetching an existing meeting. See the synchronous route
+    for the `votes`, `include` and `fields` parameters and the
+    conditional requests.
+
+    Parameters
+    ----------
+    meeting_id : int
+        The ID of the meeting to fetch.
+
+    Returns
+    -------
+    json
+        The meeting as a JSON object, or an error message.
+    '''
+    votes = request.args.get('votes', 'full')
+    if votes not in ('full', 'counts'):
+        return jsonify(error="votes must be either 'full' or 'counts'"), 400
+    default, fields = ((FULL_MEETING, MEETING_FIELDS) if votes == 'full'
+                       else (TALLY_MEETING, TALLY_MEETING_FIELDS))
+    try:
+        shape = parse_shape(request.args, MEETING_RELATIONSHIPS, fields,
+                            default.include)
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+    variant = f'counts-u{g.user_id}' if votes == 'counts' else votes
+    if shape != default:
+        variant = f'{variant}-{shape.digest}'
+
+    version = await services.get_meeting_version(meeting_id)
+    if version is None:
+        return jsonify(error='Meeting not found'), 404
+    response = not_modified(meeting_etag(meeting_id, version, variant))
+    if response is not None:
+        return response
+
+    try:
+        if votes == 'counts':
+            payload = await services.get_meeting_tally_payload(
+                meeting_id=meeting_id, user_id=g.user_id, shape=shape)
+        else:
+            payload = await services.get_meeting_payload(
+                meeting_id=meeting_id, shape=shape)
+    except UnexpectedError:
+        return jsonify(error='An unexpected error occurred'), 500
+
+    if payload is None:
+        return jsonify(error='Meeting not found'), 404
+    # fields may leave the version out; the one read first is then
+    # older, if anything, which only costs the client a refetch
+    return with_etag(jsonify(payload), meeting_etag(
+        meeting_id, payload.get('version', version), variant)), 200
+
+
+@async_meeting_routes.route('/meetings/<int:meeting_id>/changes', methods=['GET'])
+@jwt_required_and_user_loaded
+@shape_not_supported
+async def get_meeting_changes(meeting_id):
+    '''
+    Route for fetching the changes made to a meeting after a version.
+
+    Parameters
+    ----------
+    meeting_id : int
+        The ID of the meeting.
+
+    Returns
+    -------
+    json
+        The current version and the changes since `since`, or an error
+        message.
+    '''
+    since = request.args.get('since', type=int)
+    if since is None or since < 0:
+        return jsonify(error='since must be a non-negative version'), 400
+
+    result = await services.get_changes(meeting_id=meeting_id, since=since)
+    if result is None:
+        return jsonify(error='Meeting not found'), 404
+    version, changes = result
+    if changes is None:
+        return jsonify(error='Resync required', version=version), 410
+    return jsonify(meeting_id=meeting_id, version=version,
+                   changes=[change.to_dict() for change in changes]), 200
+
+
+@async_meeting_routes.route('/meetings/<int:meeting_id>/events', methods=['GET'])
+@events_token_or_jwt_required
+@shape_not_supported
+async def get_meeting_events(meeting_id):
+    '''
+    Route for following the changes to a meeting as Server-Sent Events,
+    with the same frames and tokens as the synchronous route. An idle stream only
+    costs a pending coroutine, not a thread or a database connection.
+
+    Parameters
+    ----------
+    meeting_id : int
+        The ID of the meeting to follow.
+
+    Returns
+    -------
+    text/event-stream
+        The stream of change events, or an error message.
+    '''
+    if await services.get_meeting_version(meeting_id) is None:
+        return jsonify(error='Meeting not found'), 404
+    # give the connection back to the pool before holding the stream open
+    await async_db.remove()
+
+    json = current_app.json
+    subscription = event_broker.subscribe(
+        meeting_id, loop=asyncio.get_running_loop())
+
+    async def generate():
+        try:
+            heartbeat = event_broker.heartbeat_interval
+            yield f'retry: {int(heartbeat * 1000)}\n\n'
+            while True:
+                change = await subscription.get(timeout=heartbeat)
+                if subscription.overflowed:
+                    yield 'event: resync\ndata: {}\n\n'
+                    return
+                if change is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                frame = (f"event: {change['type']}\n"
+                         f"data: {json.dumps(change)}\n\n")
+                if change['version'] is not None:
+                    frame = f"id: {change['version']}\n" + frame
+                yield frame
+                if change['type'] == 'meeting_deleted':
+                    return
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    response = Response(generate(), status=200, mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache',
+                                 'X-Accel-Buffering': 'no'})
+    # streams last as long as the client follows the meeting
+    response.timeout = None
+    return response
@@ -0,0 +1,148 @@
+'''
+This module provides the asynchronous counterparts of the read services
+served by the ASGI application.
+
+They run the queries built by their synchronous counterparts in
+`app.services` through the request's AsyncSession, and share the
+meeting cache with them.
+
+Functions:
+    get_meeting_version: Fetch the version counter of a meeting.
+    get_meeting_payload: Fetch a serialized meeting through the cache.
+    get_meeting_tally_payload: Fetch a serialized meeting with vote counts.
+    get_changes: Fetch the changes made to a meeting after a version.
+'''
+
+from quart import current_app
+from .database import async_db
+from ..cache import meeting_cache
+from ..exceptions import UnexpectedError
+from ..models.meeting import Meeting
+from ..serialization import FULL_MEETING, TALLY_MEETING
+from ..services import change_service, meeting_service, vote_service
+
+
+async def get_meeting_version(meeting_id):
+    '''
+    Fetch the version counter of a meeting, without loading the meeting.
+
+    Args:
+        meeting_id (int): The ID of the meeting.
+
+    Returns:
+        int: The version of the meeting, or None if it does not exist.
+    '''
+    try:
+        return await async_db.session.scalar(
+            meeting_service.meeting_version_query(meeting_id))
+    except Exception as error:
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in get_meeting_version") from error
+
+
+async def get_meeting_payload(meeting_id, shape=FULL_MEETING):
+    '''
+    Fetch the serialized form of a meeting, going through the meeting cache
+    for the full shape.
+
+    Args:
+        meeting_id (int): The ID of the meeting to fetch.
+        shape (Shape, optional): The relationships and fields to serialize.
+
+    Returns:
+        The meeting as a dictionary, or None if the meeting does not exist.
+    '''
+    try:
+        if shape != FULL_MEETING:
+            meeting = await async_db.session.get(
+                Meeting, meeting_id, options=shape.loader_options(Meeting))
+            return meeting.to_dict(shape=shape) if meeting is not None else None
+
+        version = await get_meeting_version(meeting_id)
+        if version is None:
+            meeting_cache.discard(meeting_id)
+            return None
+
+        payload = meeting_cache.get(meeting_id, version)
+        if payload is None:
+            meeting = await async_db.session.get(
+                Meeting, meeting_id, options=FULL_MEETING.loader_options(Meeting))
+            if meeting is None:
+                return None
+            payload = meeting.to_dict()
+            meeting_cache.set(meeting_id, meeting.version, payload)
+        return payload
+    except UnexpectedError:
+        raise
+    except Exception as error:
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in get_meeting_payload") from error
+
+
+async def get_meeting_tally_payload(meeting_id, user_id, shape=TALLY_MEETING):
+    '''
+    Fetch the serialized form of a meeting with vote counts instead of votes.
+
+    Args:
+        meeting_id (int): The ID of the meeting to fetch.
+        user_id (int): The ID of the user whose own votes are reported.
+        shape (Shape, optional): The relationships and fields to serialize.
+
+    Returns:
+        The meeting as a dictionary, or None if the meeting does not exist.
+    '''
+    try:
+        meeting = await async_db.session.get(
+            Meeting, meeting_id, options=shape.loader_options(Meeting))
+        if meeting is None:
+            return None
+
+        payload = meeting.to_dict(shape=shape)
+        if 'timeslots' not in payload:
+            return payload
+        rows = await async_db.session.execute(
+            vote_service.user_vote_ids_query(meeting_id, user_id))
+        return meeting_service.add_user_vote_ids(
+            meeting, payload, vote_service.group_vote_ids(rows))
+    except Exception as error:
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in get_meeting_tally_payload") from error
+
+
+async def get_changes(meeting_id, since):
+    '''
+    Fetch the changes made to a meeting after a given version.
+
+    Args:
+        meeting_id (int): The ID of the meeting.
+        since (int): The version of the meeting the caller holds.
+
+    Returns:
+        None if the meeting does not exist. Otherwise a tuple of the
+        current version of the meeting and the list of MeetingChange
+        objects after `since`, in order; the list is None when the log
+        no longer reaches back to `since` and the caller must resync.
+    '''
+    try:
+        version = await get_meeting_version(meeting_id)
+        if version is None:
+            return None
+        if since >= version:
+            return version, []
+
+        oldest = await async_db.session.scalar(
+            change_service.oldest_change_query(meeting_id))
+        if oldest is None or oldest > since + 1:
+            return version, None
+
+        return version, list(await async_db.session.scalars(
+            change_service.changes_query(meeting_id, since)))
+    except UnexpectedError:
+        raise
+    except Exception as error:
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in get_changes") from error
@@ -0,0 +1,115 @@
+'''
+This module defines utility functions for use in the ASGI application.
+'''
+from functools import wraps
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from quart import Response, current_app, g, jsonify, request
+from ..services import token_service
+from ..utils import with_etag
+
+
+def jwt_required_and_user_loaded(function):
+    """
+    Decorator function to require an access token and load the user's
+    identity from it.
+
+    The token is read from the Authorization header and decoded by the
+    Flask application's JWT manager, so it is verified exactly like on
+    the synchronous routes.
+
+    Args:
+        function (coroutine function): The route to be decorated.
+
+    Returns:
+        coroutine function: The decorated route.
+    """
+    @wraps(function)
+    async def wrapper(*args, **kwargs):
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme != 'Bearer' or not token:
+            return jsonify(msg='Missing Authorization Header'), 401
+
+        flask_app = current_app.extensions['flask_app']
+        try:
+            with flask_app.app_context():
+                claims = decode_token(token)
+        except (JWTExtendedException, PyJWTError) as error:
+            return jsonify(msg=str(error)), 401
+        if claims.get('type') != 'access':
+            return jsonify(msg='Only access tokens are allowed'), 401
+        if not token_service.is_bearer_token(None, claims):
+            return jsonify(msg='Events tokens are only accepted by event streams'), 401
+
+        g.user_id = claims.get(flask_app.config['JWT_IDENTITY_CLAIM'])
+        if g.user_id is None:
+            return jsonify(msg='Missing JWT identity'), 401
+        return await function(*args, **kwargs)
+    return wrapper
+
+
+def events_token_or_jwt_required(function):
+    """
+    Decorator accepting an events token in the `token` query parameter,
+    like its synchronous counterpart in `app.utils`, and requiring an
+    access token otherwise.
+
+    Args:
+        function (coroutine function): The route to be decorated. It
+                                       takes the `meeting_id` keyword
+                                       argument.
+
+    Returns:
+        coroutine function: The decorated route.
+    """
+    with_jwt = jwt_required_and_user_loaded(function)
+
+    @wraps(function)
+    async def wrapper(*args, **kwargs):
+        token = request.args.get('token')
+        if token is None:
+            return await with_jwt(*args, **kwargs)
+        with current_app.extensions['flask_app'].app_context():
+            g.user_id = token_service.read_events_token(token, kwargs['meeting_id'])
+        if g.user_id is None:
+            return jsonify(msg='Invalid events token'), 401
+        return await function(*args, **kwargs)
+    return wrapper
+
+
+def shape_not_supported(function):
+    """
+    Decorator answering the `include` and `fields` query parameters
+    with a 400, like its synchronous counterpart in `app.utils`.
+
+    Args:
+        function (coroutine function): The route to be decorated.
+
+    Returns:
+        coroutine function: The decorated route.
+    """
+    @wraps(function)
+    async def wrapper(*args, **kwargs):
+        unsupported = sorted({'include', 'fields'} & request.args.keys())
+        if unsupported:
+            return jsonify(error=f"{' and '.join(unsupported)} not supported "
+                                 'by this route'), 400
+        return await function(*args, **kwargs)
+    return wrapper
+
+
+def not_modified(etag):
+    """
+    Answer a conditional GET whose If-None-Match matches an entity tag.
+
+    Args:
+        etag (str): The current entity tag of the resource, unquoted.
+
+    Returns:
+        quart.Response: An empty 304 response if the client's copy is
+        current, None otherwise.
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return with_etag(Response('', status=304), etag)
@@ -0,0 +1,136 @@
+'''
+This module defines the in-process cache used for serialized payloads.
+
+Classes:
+    VersionedLRUCache: A size- and TTL-bounded LRU cache whose entries
+                       are tagged with the version of the cached resource.
+
+Variables:
+    meeting_cache: The cache of serialized Meeting payloads.
+'''
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class VersionedLRUCache:
+    '''
+    A thread-safe least-recently-used cache of versioned payloads.
+
+    Every entry is stored with the version of the resource it was built
+    from; a lookup only hits when the caller's current version matches,
+    so a write that bumps the version invalidates the entry everywhere
+    without any cross-process coordination.
+
+    Attributes:
+        maxsize (int): The maximum number of entries. 0 disables the cache.
+        ttl (float): The number of seconds an entry stays valid.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that were not.
+        evictions (int): The number of entries dropped to make room.
+        expirations (int): The number of entries dropped because they
+                           were too old or their version was outdated.
+    '''
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def init_app(self, app):
+        '''
+        Configure the cache from the application's config and empty it.
+
+        Args:
+            app (flask.Flask): The application.
+        '''
+        self.maxsize = app.config.get('MEETING_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.get('MEETING_CACHE_TTL', self.ttl)
+        self.clear()
+
+    def get(self, key, version):
+        '''
+        Look up the payload cached for a key at a given version.
+
+        Args:
+            key: The key of the resource.
+            version (int): The current version of the resource.
+
+        Returns:
+            The cached payload, or None on a miss.
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_version, expires_at, payload = entry
+                if entry_version == version and expires_at > monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def set(self, key, version, payload):
+        '''
+        Store the payload of a resource at a given version.
+
+        Args:
+            key: The key of the resource.
+            version (int): The version the payload was built from.
+            payload: The payload to cache. It must not be mutated afterwards.
+        '''
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, monotonic() + self.ttl, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key):
+        '''
+        Drop the entry of a key, if any.
+
+        Args:
+            key: The key of the resource.
+        '''
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        '''
+        Drop every entry and reset the counters.
+        '''
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        '''
+        Report the cache counters.
+
+        Returns:
+            dict: The size, capacity and hit/miss/eviction counters.
+        '''
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+meeting_cache = VersionedLRUCache()
@@ -0,0 +1,73 @@
+'''
+This module defines the application's command line commands.
+
+Commands are registered on the Flask CLI by create_app and are run with
+`flask --app main <group> <command>`.
+
+Groups:
+    votes_cli: Maintenance commands for votes.
+    tokens_cli: Maintenance commands for refresh tokens.
+    app_cli: Commands for operating the application.
+'''
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+import click
+from flask.cli import AppGroup
+from .services import token_service, vote_service
+
+# Directory holding the entry point modules
+BACKEND_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+votes_cli = AppGroup('votes', help='Maintenance commands for votes.')
+tokens_cli = AppGroup('tokens', help='Maintenance commands for refresh tokens.')
+app_cli = AppGroup('app', help='Commands for operating the application.')
+
+
+@votes_cli.command('reconcile')
+def reconcile_votes():
+    '''
+    Recompute the vote counter of every timeslot from the votes table.
+    '''
+    corrected = vote_service.reconcile_vote_counts()
+    click.echo(f'Corrected the vote count of {corrected} timeslot(s).')
+
+
+@tokens_cli.command('purge')
+def purge_tokens():
+    '''
+    Delete the refresh tokens that have expired.
+    '''
+    purged = token_service.purge_expired_tokens()
+    click.echo(f'Deleted {purged} expired refresh token(s).')
+
+
+@app_cli.command('startup-time')
+@click.option('--runs', default=5, show_default=True,
+              help='The number of fresh interpreters to time.')
+@click.option('--entry-point', default='wsgi', show_default=True,
+              help='The module creating the application.')
+def measure_startup_time(runs, entry_point):
+    '''
+    Measure how long a new worker takes to import and create the application.
+    '''
+    if runs < 1 or not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', entry_point):
+        raise click.BadParameter('expected a positive number of runs and a module name')
+
+    script = ('import time; start = time.perf_counter(); '
+              f'import {entry_point}; print(time.perf_counter() - start)')
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', script],
+                                cwd=BACKEND_DIRECTORY, capture_output=True,
+                                text=True, check=False)
+        if result.returncode != 0:
+            raise click.ClickException(result.stderr.strip())
+        timings.append(float(result.stdout.split()[-1]) * 1000)
+
+    click.echo(f'Created the application from {entry_point} in '
+               f'{statistics.median(timings):.0f} ms (median of {runs}, '
+               f'min {min(timings):.0f} ms, max {max(timings):.0f} ms).')
@@ -1,6 +1,37 @@
 '''
 This module initializes the db variable with a SQLAlchemy instance.
+
+The schema is owned by the migrations, which create_app registers with
+Flask-Migrate for the command line.
+
+The session routes the reads of the service functions marked with
+`app.replica.reads_from_replica` to the 'replica' bind, when one is
+configured; everything else goes to the primary database.
 '''
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+# session.info keys
+USE_REPLICA_KEY = 'use_replica'
+WROTE_KEY = 'wrote'
+
+
+class RoutingSession(Session):
+    '''
+    A session sending reads to the replica while a replica read is
+    allowed, and recording whether it wrote to the primary.
+    '''
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self.info[WROTE_KEY] = True
+            elif self.info.get(USE_REPLICA_KEY):
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
@@ -52,6 +52,20 @@ def handle_page_not_found(error):
     return jsonify(error=str(error)), 404
 
 
+def handle_service_unavailable(error):  # pylint: disable=unused-argument
+    '''Handle ServiceUnavailableError, raised when work is shed by a
+    saturated component such as the password hasher or the database writer
+
+    Args:
+       error (Exception): The exception raised.
+
+    Returns:
+        A 503 asking the client to retry shortly.
+    '''
+    return jsonify(error='The server is busy, please retry shortly'), 503, {
+        'Retry-After': '1'}
+
+
 def handle_internal_server_error(error):
     '''Handle 500 errors
 
@@ -0,0 +1,232 @@
+'''
+This module defines the in-process publish/subscribe broker used to push
+meeting changes to connected clients.
+
+Events are published by the service layer once the transaction that
+produced them has committed. The broker only reaches subscribers
+connected to the same process.
+
+Classes:
+    Subscription: A subscriber's bounded queue of events.
+    AsyncSubscription: A subscription awaited from an asyncio event loop.
+    EventBroker: Routes published events to the subscribers of a meeting.
+
+Variables:
+    event_broker: The application's broker.
+'''
+
+import asyncio
+from queue import Empty, Full, Queue
+from threading import Lock
+
+
+class Subscription:
+    '''
+    A subscriber's bounded queue of events for one meeting.
+
+    When the subscriber falls too far behind, the queue overflows: the
+    subscription is marked as such and stops receiving events, and the
+    client is expected to re-fetch the meeting.
+
+    Attributes:
+        meeting_id (int): The ID of the meeting subscribed to.
+        overflowed (bool): Whether events were dropped.
+    '''
+
+    def __init__(self, meeting_id, maxsize):
+        self.meeting_id = meeting_id
+        self.overflowed = False
+        self._queue = Queue(maxsize=maxsize)
+
+    def put(self, event):
+        '''
+        Queue an event without blocking the publisher.
+
+        Args:
+            event (dict): The event to deliver.
+        '''
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except Full:
+            self.overflowed = True
+
+    def get(self, timeout=None):
+        '''
+        Wait for the next event.
+
+        Args:
+            timeout (float): The number of seconds to wait.
+
+        Returns:
+            dict: The next event, or None if none arrived in time.
+        '''
+        try:
+            return self._queue.get(timeout=timeout)
+        except Empty:
+            return None
+
+
+class AsyncSubscription(Subscription):
+    '''
+    A subscriber's bounded queue of events for one meeting, consumed by
+    a coroutine running on an asyncio event loop.
+
+    Events are published from request threads, so they are handed over
+    to the subscriber's loop; the number of events not yet consumed is
+    tracked on the publishing side, so that overflows are detected as
+    soon as they happen.
+    '''
+
+    def __init__(self, meeting_id, maxsize, loop):
+        super().__init__(meeting_id, maxsize)
+        self._maxsize = maxsize
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._pending = 0
+        self._lock = Lock()
+
+    def put(self, event):
+        '''
+        Queue an event without blocking the publisher.
+
+        Args:
+            event (dict): The event to deliver.
+        '''
+        with self._lock:
+            if self.overflowed:
+                return
+            if self._maxsize > 0 and self._pending >= self._maxsize:
+                self.overflowed = True
+                return
+            self._pending += 1
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+        except RuntimeError:
+            # the subscriber's loop is closed; it will never read again
+            self.overflowed = True
+
+    async def get(self, timeout=None):
+        '''
+        Wait for the next event.
+
+        Args:
+            timeout (float): The number of seconds to wait.
+
+        Returns:
+            dict: The next event, or None if none arrived in time.
+        '''
+        try:
+            event = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        with self._lock:
+            self._pending -= 1
+        return event
+
+
+class EventBroker:
+    '''
+    A thread-safe broker routing meeting events to their subscribers.
+
+    Attributes:
+        queue_size (int): The capacity of each subscriber's queue.
+        heartbeat_interval (float): The number of seconds between
+                                    keep-alive messages on idle streams.
+        published (int): The number of events published.
+        dropped (int): The number of subscriptions that overflowed.
+    '''
+
+    def __init__(self, queue_size=100, heartbeat_interval=15):
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.published = 0
+        self.dropped = 0
+        self._subscriptions = {}
+        self._lock = Lock()
+
+    def init_app(self, app):
+        '''
+        Configure the broker from the application's config.
+
+        Args:
+            app (flask.Flask): The application.
+        '''
+        self.queue_size = app.config.get('EVENTS_QUEUE_SIZE', self.queue_size)
+        self.heartbeat_interval = app.config.get(
+            'EVENTS_HEARTBEAT_INTERVAL', self.heartbeat_interval)
+
+    def subscribe(self, meeting_id, loop=None):
+        '''
+        Subscribe to the events of a meeting.
+
+        Args:
+            meeting_id (int): The ID of the meeting.
+            loop (asyncio.AbstractEventLoop, optional): The event loop
+                the subscriber runs on, if it awaits its events.
+
+        Returns:
+            Subscription: The new subscription, an AsyncSubscription
+            when a loop is given.
+        '''
+        if loop is not None:
+            subscription = AsyncSubscription(meeting_id, self.queue_size, loop)
+        else:
+            subscription = Subscription(meeting_id, self.queue_size)
+        with self._lock:
+            self._subscriptions.setdefault(meeting_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        '''
+        Cancel a subscription.
+
+        Args:
+            subscription (Subscription): The subscription to cancel.
+        '''
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.meeting_id)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.meeting_id]
+
+    def publish(self, meeting_id, event):
+        '''
+        Deliver an event to every subscriber of a meeting.
+
+        Args:
+            meeting_id (int): The ID of the meeting.
+            event (dict): The event to deliver.
+        '''
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(meeting_id, ()))
+            self.published += 1
+        for subscription in subscriptions:
+            was_overflowed = subscription.overflowed
+            subscription.put(event)
+            if subscription.overflowed and not was_overflowed:
+                with self._lock:
+                    self.dropped += 1
+
+    def stats(self):
+        '''
+        Report the broker counters.
+
+        Returns:
+            dict: The number of meetings and subscribers, and the
+            published and dropped counters.
+        '''
+        with self._lock:
+            return {
+                'meetings': len(self._subscriptions),
+                'subscribers': sum(len(subscriptions) for subscriptions
+                                   in self._subscriptions.values()),
+                'published': self.published,
+                'dropped': self.dropped,
+            }
+
+
+event_broker = EventBroker()
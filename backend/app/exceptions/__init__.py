@@ -65,3 +65,29 @@ class UnexpectedError(Exception):
     def __str__(self):
         return f'{self.message}: {self.error}'
 
+
+
+class ResourceConflictError(Exception):
+    '''Exception raised when a resource duplicates an existing one.
+    '''
+    def __init__(self, error=None, message='Resource already exists',
+                 existing_id=None):
+        self.error = error
+        self.message = message
+        self.existing_id = existing_id
+        super().__init__(self.message)
+
+    def __str__(self):
+        return f'{self.message}: {self.error}'
+
+
+class ServiceUnavailableError(Exception):
+    '''Exception raised when a resource is saturated and work is shed.
+    '''
+    def __init__(self, error=None, message='Service unavailable'):
+        self.error = error
+        self.message = message
+        super().__init__(self.message)
+
+    def __str__(self):
+        return f'{self.message}: {self.error}'
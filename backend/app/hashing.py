@@ -0,0 +1,221 @@
+'''
+This module defines the password hasher used by the User model.
+
+Hashing and checking passwords with scrypt is deliberately expensive.
+The hasher runs them in a bounded pool of worker processes, so a burst
+of registrations or logins cannot pin the request threads and starve
+every other endpoint: when all the workers are busy and the queue is
+full, requests are rejected right away with ServiceUnavailableError.
+A pool broken by the loss of a worker, e.g. to the OOM killer, fails
+the hashes it held with the same error and is started again on next
+use.
+
+Daemonic processes, such as the workers of some ASGI servers, cannot
+start child processes; there the pool uses threads instead.
+
+Classes:
+    PasswordHasher: Hashes and checks passwords in a process pool.
+
+Variables:
+    password_hasher: The application's hasher.
+'''
+
+from concurrent.futures import (BrokenExecutor, ProcessPoolExecutor,
+                                ThreadPoolExecutor,
+                                TimeoutError as FutureTimeoutError)
+from multiprocessing import current_process, get_context
+from threading import BoundedSemaphore, Lock
+from werkzeug.security import (DEFAULT_PBKDF2_ITERATIONS, check_password_hash,
+                               generate_password_hash)
+from .exceptions import ServiceUnavailableError
+
+# The cost parameters werkzeug uses for those the method leaves out
+_METHOD_DEFAULTS = {
+    'scrypt': ('32768', '8', '1'),
+    'pbkdf2': ('sha256', str(DEFAULT_PBKDF2_ITERATIONS)),
+}
+
+
+def _full_method(method):
+    '''Spell out a hash method with all of its cost parameters.'''
+    name, *params = method.split(':')
+    defaults = _METHOD_DEFAULTS.get(name, ())
+    return ':'.join([name, *params, *defaults[len(params):]])
+
+
+class PasswordHasher:
+    '''
+    A thread-safe password hasher backed by a process pool.
+
+    The pool is started on first use, so that servers forking workers
+    after loading the application give each worker its own pool.
+
+    Attributes:
+        method (str): The werkzeug hash method and cost parameters,
+                      e.g. 'scrypt:32768:8:1'.
+        workers (int): The number of hashing processes. 0 hashes on the
+                       calling thread, without any limit.
+        queue_size (int): The number of hashes allowed to wait for a
+                          worker before new ones are rejected.
+        timeout (float): The number of seconds to wait for a hash.
+        rejected (int): The number of hashes rejected so far.
+    '''
+
+    def __init__(self, method='scrypt:32768:8:1', workers=2, queue_size=16,
+                 timeout=10):
+        self.method = method
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.rejected = 0
+        self._pool = None
+        self._slots = BoundedSemaphore(workers + queue_size)
+        self._lock = Lock()
+        self._stats_lock = Lock()
+
+    def init_app(self, app):
+        '''
+        Configure the hasher from the application's config. A running
+        pool is only replaced when its size changes.
+
+        Args:
+            app (flask.Flask): The application.
+        '''
+        workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        queue_size = app.config.get('PASSWORD_HASH_QUEUE_SIZE', self.queue_size)
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        with self._lock:
+            if (workers, queue_size) != (self.workers, self.queue_size):
+                self._shutdown()
+                self.workers, self.queue_size = workers, queue_size
+                self._slots = BoundedSemaphore(workers + queue_size)
+
+    def hash(self, password):
+        '''
+        Hash a password with the configured method.
+
+        Args:
+            password (str): The plain password.
+
+        Returns:
+            str: The salted hash, prefixed with its method.
+
+        Raises:
+            ServiceUnavailableError: If the hasher is saturated.
+        '''
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        '''
+        Check a password against a stored hash.
+
+        Args:
+            password_hash (str): The stored hash.
+            password (str): The plain password.
+
+        Returns:
+            bool: Whether the password matches.
+
+        Raises:
+            ServiceUnavailableError: If the hasher is saturated.
+        '''
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        '''
+        Tell whether a stored hash was made with other parameters than
+        the configured ones. Parameters left out of the configured
+        method, as in 'scrypt', stand for werkzeug's defaults.
+
+        Args:
+            password_hash (str): The stored hash.
+
+        Returns:
+            bool: Whether the password should be hashed again.
+        '''
+        return (_full_method(password_hash.split('$', 1)[0])
+                != _full_method(self.method))
+
+    def stats(self):
+        '''
+        Report the hasher settings and counters.
+
+        Returns:
+            dict: The method, pool size, queue size and rejections.
+        '''
+        return {
+            'method': self.method,
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'rejected': self.rejected,
+        }
+
+    def _reject(self):
+        with self._stats_lock:
+            self.rejected += 1
+
+    def shutdown(self):
+        '''
+        Stop the worker processes. They are started again on next use.
+        '''
+        with self._lock:
+            self._shutdown()
+
+    def _shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _discard(self, pool):
+        # another thread may already have replaced the broken pool
+        with self._lock:
+            if self._pool is pool:
+                self._shutdown()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None and current_process().daemon:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='hasher')
+            elif self._pool is None:
+                # spawned workers do not inherit the server's threads,
+                # sockets or database connections
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=get_context('spawn'))
+            return self._pool
+
+    def _run(self, function, *args):
+        if self.workers <= 0:
+            return function(*args)
+
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            self._reject()
+            raise ServiceUnavailableError(message='Password hasher is saturated')
+        pool = self._get_pool()
+        try:
+            future = pool.submit(function, *args)
+        except BrokenExecutor as error:
+            slots.release()
+            self._discard(pool)
+            raise ServiceUnavailableError(
+                error, 'Password hasher was restarted') from error
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError as error:
+            future.cancel()
+            self._reject()
+            raise ServiceUnavailableError(
+                error, 'Password hashing timed out') from error
+        except BrokenExecutor as error:
+            self._discard(pool)
+            raise ServiceUnavailableError(
+                error, 'Password hasher was restarted') from error
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,117 @@
+'''
+This module defines the interval index used to detect duplicate and
+overlapping timeslots.
+
+Classes:
+    IntervalIndex: A sorted-array index of half-open intervals.
+
+Functions:
+    merge_intervals: Merge overlapping intervals.
+'''
+
+from bisect import bisect_left, insort
+
+
+def _bounds(interval):
+    return interval[0], interval[1]
+
+
+class IntervalIndex:
+    '''
+    A sorted-array index of half-open [start, end) intervals.
+
+    Intervals are kept sorted by start, together with the length of the
+    longest one: an interval overlapping [start, end) must start in
+    [start - longest, end), which two binary searches delimit. Finding
+    an exact duplicate costs O(log n) and finding the overlaps costs
+    O(log n) plus the number of intervals starting in that range.
+
+    Bounds can be of any type supporting subtraction and comparison,
+    e.g. datetimes; the keys identify the intervals and are never compared.
+
+    Attributes:
+        longest: The length of the longest interval, or None when empty.
+    '''
+
+    def __init__(self, intervals=()):
+        '''
+        Args:
+            intervals (iterable): (start, end, key) tuples.
+        '''
+        self._intervals = sorted(intervals, key=_bounds)
+        self._starts = [start for start, _, _ in self._intervals]
+        self.longest = max((end - start for start, end, _ in self._intervals),
+                           default=None)
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def add(self, start, end, key):
+        '''
+        Add an interval to the index.
+
+        Args:
+            start: The start of the interval.
+            end: The end of the interval.
+            key: The key identifying the interval.
+        '''
+        insort(self._intervals, (start, end, key), key=_bounds)
+        insort(self._starts, start)
+        if self.longest is None or end - start > self.longest:
+            self.longest = end - start
+
+    def find(self, start, end):
+        '''
+        Find an interval with exactly the given bounds.
+
+        Args:
+            start: The start of the interval.
+            end: The end of the interval.
+
+        Returns:
+            The key of the matching interval, or None.
+        '''
+        position = bisect_left(self._intervals, (start, end), key=_bounds)
+        if position < len(self._intervals):
+            found_start, found_end, key = self._intervals[position]
+            if found_start == start and found_end == end:
+                return key
+        return None
+
+    def overlapping(self, start, end):
+        '''
+        Find the intervals overlapping the given bounds.
+
+        Args:
+            start: The start of the interval.
+            end: The end of the interval.
+
+        Returns:
+            list: The keys of the overlapping intervals, by start.
+        '''
+        if not self._intervals:
+            return []
+        low = bisect_left(self._starts, start - self.longest)
+        high = bisect_left(self._starts, end)
+        return [key for _, found_end, key in self._intervals[low:high]
+                if found_end > start]
+
+
+def merge_intervals(intervals):
+    '''
+    Merge overlapping or touching intervals in a single pass.
+
+    Args:
+        intervals (iterable): (start, end) tuples sorted by start.
+
+    Returns:
+        list: The disjoint (start, end) tuples covering the same points.
+    '''
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
@@ -0,0 +1,111 @@
+'''
+This module defines the JSON providers serializing the responses of the
+application.
+
+The models hand their dates and times to the provider as they are, and
+the provider writes them in ISO 8601. With the 'orjson' provider, the
+default, responses are encoded by orjson, which formats datetimes
+natively and is several times faster than the json module on large
+meeting payloads. Without orjson installed, the json module is used,
+with the same output.
+
+Classes:
+    ISODatetimeMixin: Serializes dates and times in ISO 8601.
+    OrjsonMixin: Encodes and decodes JSON with orjson.
+
+Functions:
+    json_provider_class: Build the configured provider class.
+'''
+
+from datetime import date, time
+from functools import cache
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional dependency
+    orjson = None
+
+JSON_PROVIDERS = ('orjson', 'json')
+
+
+class ISODatetimeMixin:
+    '''
+    Serializes dates and times in ISO 8601 rather than as HTTP dates,
+    which are what the frameworks' providers default to.
+    '''
+
+    def default(self, value):
+        '''
+        Convert a value the JSON encoder does not handle.
+
+        Args:
+            value: The value to convert.
+
+        Returns:
+            The JSON-serializable value.
+        '''
+        if isinstance(value, (date, time)):
+            return value.isoformat()
+        return super().default(value)
+
+
+class OrjsonMixin(ISODatetimeMixin):
+    '''
+    Encodes and decodes JSON with orjson. Values orjson does not handle
+    itself go through `default`.
+    '''
+
+    def dumps(self, obj, **kwargs):
+        '''
+        Serialize data as JSON. The `sort_keys` and `indent` arguments of
+        json.dumps are honoured; the output is always compact otherwise.
+
+        Args:
+            obj: The data to serialize.
+
+        Returns:
+            str: The JSON document.
+        '''
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        '''
+        Deserialize data as JSON.
+
+        Args:
+            s (str or bytes): The JSON document.
+
+        Returns:
+            The deserialized data.
+        '''
+        return orjson.loads(s)
+
+
+@cache
+def json_provider_class(name, base=DefaultJSONProvider):
+    '''
+    Build the provider class named by the JSON_PROVIDER setting.
+
+    Args:
+        name (str): 'orjson', which falls back to the json module when
+                    orjson is not installed, or 'json'.
+        base (type): The framework's default provider class, Flask's
+                     unless given.
+
+    Returns:
+        type: The provider class, to be instantiated with the application.
+
+    Raises:
+        ValueError: If the name is not a known provider.
+    '''
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f'Unknown JSON provider {name!r}, '
+                         f'expected one of {", ".join(JSON_PROVIDERS)}')
+    mixin = OrjsonMixin if name == 'orjson' and orjson is not None else ISODatetimeMixin
+    return type(f"{mixin.__name__.removesuffix('Mixin')}JSONProvider", (mixin, base), {})
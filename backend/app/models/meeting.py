@@ -10,6 +10,7 @@ Dependencies:
 
 from sqlalchemy.sql import func
 from ..database import db
+from ..serialization import FULL_MEETING, TALLY_MEETING
 from .user import User  # pylint: disable=unused-import
 
 
@@ -24,32 +25,57 @@ class Meeting(db.Model):
         title (str): The title of the meeting.
         description (str): An optional description of the meeting.
         user_id (int): The identifier of the user who created the meeting.
+        version (int): A counter bumped by every write to the meeting,
+            its timeslots or their votes.
         timeslots (relationship): The timeslots proposed for the meeting.
+        participants (relationship): The membership rows of every user
+            involved in the meeting.
         votes (relationship): The votes cast on the meeting's timeslots.
     '''
 
     __tablename__ = 'meetings'
+    __table_args__ = (
+        db.Index('ix_meetings_user_id_created_at', 'user_id', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(120), nullable=False)
     description = db.Column(db.String(500), nullable=True)
+    version = db.Column(db.Integer, nullable=False, default=1,
+                        server_default='1')
     timeslots = db.relationship(
         'TimeSlot', backref='meeting', lazy=True, cascade="all, delete-orphan")
+    participants = db.relationship(
+        'MeetingParticipant', backref='meeting', lazy=True,
+        cascade="all, delete-orphan")
     created_at = db.Column(db.DateTime(
         # pylint: disable=not-callable
         timezone=True), server_default=func.now())
 
-    def to_dict(self):
+    def to_dict(self, include_votes=True, shape=None):
         '''Convert Meeting object to dictionionary
+
+        Args:
+            include_votes (bool): Whether to embed the votes of each timeslot.
+            shape (Shape, optional): The relationships and fields to
+                serialize, instead of the timeslots and, with
+                `include_votes`, their votes.
         '''
-        return {
+        if shape is None:
+            shape = FULL_MEETING if include_votes else TALLY_MEETING
+        data = {
             'id': self.id,
             'user_id': self.user_id,
             'title': self.title,
             'description': self.description,
-            'timeslots': [timeslot.to_dict() for timeslot in self.timeslots]
+            'version': self.version,
         }
+        if shape.includes('timeslots'):
+            timeslot_shape = shape.nested('timeslots')
+            data['timeslots'] = [timeslot.to_dict(shape=timeslot_shape)
+                                 for timeslot in self.timeslots]
+        return shape.pick(data)
 
     def __repr__(self):
         '''
@@ -0,0 +1,88 @@
+'''
+This module defines the MeetingChange model for the application.
+
+Classes:
+    MeetingChange: Represents one entry of a meeting's change log.
+
+Dependencies:
+    db: SQLAlchemy object instance for database operations.
+    Meeting: Meeting model.
+'''
+
+from sqlalchemy.sql import func
+from ..database import db
+from .meeting import Meeting  # pylint: disable=unused-import
+
+
+class MeetingChange(db.Model):
+    '''
+    A class used to represent an entry of a meeting's change log.
+
+    The log is append-only and written by the service layer in the same
+    transaction as the write it describes, one entry per version of the
+    meeting, so clients can catch up from the version they already hold.
+    Old entries are truncated once a meeting has more than
+    MEETING_CHANGES_RETENTION of them.
+
+    ...
+
+    Attributes
+    ----------
+    id : int
+        a unique identifier for each entry
+    meeting_id : int
+        a foreign key that identifies the changed meeting
+    version : int
+        the version of the meeting produced by the change
+    type : str
+        the kind of change, e.g. vote_added
+    data : dict
+        the serialized state of the changed object
+    created_at : datetime
+        when the change was made
+
+    Methods
+    -------
+    to_dict():
+        Converts the MeetingChange instance to a dictionary.
+    __repr__():
+        Represents the MeetingChange instance as a string.
+    '''
+
+    __tablename__ = 'meeting_changes'
+    __table_args__ = (
+        db.UniqueConstraint('meeting_id', 'version',
+                            name='uq_meeting_changes_meeting_id_version'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    meeting_id = db.Column(
+        db.Integer,
+        db.ForeignKey('meetings.id', ondelete='CASCADE'),
+        nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    type = db.Column(db.String(32), nullable=False)
+    data = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime(
+        # pylint: disable=not-callable
+        timezone=True), server_default=func.now())
+
+    def to_dict(self):
+        '''Converts MeetingChange object to dictionary
+        '''
+        return {
+            'version': self.version,
+            'type': self.type,
+            'data': self.data,
+        }
+
+    def __repr__(self):
+        '''
+        Represents the MeetingChange instance as a string.
+
+        Returns
+        -------
+        str
+            a string representation of the change instance
+        '''
+        return f'<MeetingChange {self.meeting_id} v{self.version} {self.type}>'
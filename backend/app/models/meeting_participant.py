@@ -0,0 +1,84 @@
+'''
+This module defines the MeetingParticipant model for the application.
+
+Classes:
+    MeetingParticipant: Represents a user's involvement in a meeting.
+
+Dependencies:
+    db: SQLAlchemy object instance for database operations.
+    Meeting: Meeting model.
+    User: User model.
+'''
+
+from sqlalchemy.sql import func
+from ..database import db
+from .meeting import Meeting  # pylint: disable=unused-import
+from .user import User  # pylint: disable=unused-import
+
+
+class MeetingParticipant(db.Model):
+    '''
+    A class used to represent a user's membership of a meeting.
+
+    The table is maintained by the service layer whenever a user creates
+    a meeting, suggests a timeslot or votes, so that the meetings a user
+    is involved in can be fetched with a single indexed query.
+
+    ...
+
+    Attributes
+    ----------
+    user_id : int
+        a foreign key that identifies the participating user
+    meeting_id : int
+        a foreign key that identifies the meeting
+    role : str
+        how the user takes part in the meeting: creator, suggester or voter
+    last_activity : datetime
+        when the user last acted on the meeting in this role
+
+    Methods
+    -------
+    __repr__():
+        Represents the MeetingParticipant instance as a string.
+    '''
+
+    __tablename__ = 'meeting_participants'
+
+    ROLE_CREATOR = 'creator'
+    ROLE_SUGGESTER = 'suggester'
+    ROLE_VOTER = 'voter'
+
+    user_id = db.Column(
+        db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    meeting_id = db.Column(
+        db.Integer,
+        db.ForeignKey('meetings.id', ondelete='CASCADE'),
+        primary_key=True,
+        index=True)
+    role = db.Column(db.String(16), primary_key=True)
+    last_activity = db.Column(db.DateTime(
+        # pylint: disable=not-callable
+        timezone=True), server_default=func.now(), nullable=False)
+
+    def to_dict(self):
+        '''Converts MeetingParticipant object to dictionary
+        '''
+        return {
+            'user_id': self.user_id,
+            'meeting_id': self.meeting_id,
+            'role': self.role,
+            'last_activity': self.last_activity,
+        }
+
+    def __repr__(self):
+        '''
+        Represents the MeetingParticipant instance as a string.
+
+        Returns
+        -------
+        str
+            a string representation of the participant instance
+        '''
+        return (f'<MeetingParticipant {self.user_id} '
+                f'in {self.meeting_id} as {self.role}>')
@@ -0,0 +1,68 @@
+'''
+This module defines the RefreshToken model for the application.
+
+Classes:
+    RefreshToken: Represents an issued refresh token in the database.
+
+Dependencies:
+    db: SQLAlchemy object instance for database operations.
+    User: User model.
+'''
+
+from sqlalchemy.sql import func
+from ..database import db
+from .user import User  # pylint: disable=unused-import
+
+
+class RefreshToken(db.Model):
+    '''
+    A class used to represent an issued refresh token.
+
+    Only the token's unique identifier (its `jti` claim) is stored. A
+    token can be used once: refreshing revokes it and issues a new one.
+
+    ...
+
+    Attributes
+    ----------
+    id : int
+        a unique identifier for each row
+    jti : str
+        the unique identifier of the token
+    user_id : int
+        a foreign key that identifies the user the token was issued to
+    expires_at : datetime
+        when the token expires
+    revoked_at : datetime
+        when the token was used or revoked, or None while it is valid
+    created_at : datetime
+        when the token was issued
+
+    Methods
+    -------
+    __repr__():
+        Represents the RefreshToken instance as a string.
+    '''
+
+    __tablename__ = 'refresh_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'),
+                        nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime(
+        # pylint: disable=not-callable
+        timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        '''
+        Represents the RefreshToken instance as a string.
+
+        Returns
+        -------
+        str
+            a string representation of the refresh token instance
+        '''
+        return f'<RefreshToken {self.jti}>'
@@ -11,6 +11,7 @@ Dependencies:
 
 from sqlalchemy.sql import func
 from ..database import db
+from ..serialization import FULL_MEETING, TALLY_MEETING
 from .meeting import Meeting  # pylint: disable=unused-import
 from .vote import Vote  # pylint: disable=unused-import
 
@@ -31,6 +32,16 @@ class TimeSlot(db.Model):
         the ending time of the timeslot
     meeting_id : int
         the id of the meeting the timeslot is associated with
+    vote_count : int
+        the number of votes cast for the timeslot, maintained by the
+        vote service
+    overlaps : list
+        not persisted: set by the timeslot service on the timeslots it
+        creates or updates to the IDs of the meeting's other timeslots
+        overlapping them
+    merged : bool
+        not persisted: set by the timeslot service when a suggestion was
+        merged into this existing, identical timeslot
 
     Methods
     -------
@@ -39,30 +50,57 @@ class TimeSlot(db.Model):
     '''
 
     __tablename__ = 'timeslots'
+    __table_args__ = (
+        db.UniqueConstraint('meeting_id', 'start_time', 'end_time',
+                            name='uq_timeslots_meeting_id_start_time_end_time'),
+        db.Index('ix_timeslots_meeting_id_start_time',
+                 'meeting_id', 'start_time'),
+        db.Index('ix_timeslots_user_id_start_time',
+                 'user_id', 'start_time'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'),
+                        nullable=False)
     meeting_id = db.Column(db.Integer, db.ForeignKey(
         'meetings.id', ondelete='CASCADE'), nullable=False)
     start_time = db.Column(db.DateTime, nullable=False)
     end_time = db.Column(db.DateTime, nullable=False)
+    vote_count = db.Column(db.Integer, nullable=False, default=0,
+                           server_default='0')
     votes = db.relationship('Vote', backref='meeting',
                             lazy=True, cascade="all, delete-orphan")
     created_at = db.Column(db.DateTime(
         # pylint: disable=not-callable
         timezone=True), server_default=func.now())
 
-    def to_dict(self):
+    overlaps = ()
+    merged = False
+
+    def to_dict(self, include_votes=True, shape=None):
         '''Converts TimeSlot object to dictionary
+
+        Args:
+            include_votes (bool): Whether to embed the timeslot's votes.
+                Leaving them out avoids loading the votes at all.
+            shape (Shape, optional): The relationships and fields to
+                serialize, instead of the votes if `include_votes`.
         '''
-        return {
+        if shape is None:
+            shape = (FULL_MEETING if include_votes else TALLY_MEETING
+                     ).nested('timeslots')
+        data = {
             'id': self.id,
             'user_id': self.user_id,
-            'start_time': self.start_time if isinstance(self.start_time, str) else self.start_time.isoformat(),
-            'end_time': self.end_time if isinstance(self.end_time, str) else self.end_time.isoformat(),
+            'start_time': self.start_time,
+            'end_time': self.end_time,
             'meeting_id': self.meeting_id,
-            'votes': [vote.to_dict() for vote in self.votes]
+            'vote_count': self.vote_count,
         }
+        if shape.includes('votes'):
+            vote_shape = shape.nested('votes')
+            data['votes'] = [vote.to_dict(shape=vote_shape) for vote in self.votes]
+        return shape.pick(data)
 
     def __repr__(self):
         '''
@@ -9,8 +9,9 @@ Dependencies:
 '''
 
 from sqlalchemy.sql import func
-from werkzeug.security import generate_password_hash, check_password_hash
 from ..database import db
+from ..hashing import password_hasher
+from ..serialization import Shape
 
 
 class User(db.Model):
@@ -47,23 +48,45 @@ class User(db.Model):
         timezone=True), server_default=func.now())
 
     def set_password(self, password):
-        '''Generate a hash for plain input password
+        '''Generate a hash for plain input password, in the password
+        hasher's pool and with its configured cost parameters
         '''
-        self.password = generate_password_hash(password, method='scrypt')
+        self.password = password_hasher.hash(password)
 
     def check_password(self, password):
         '''Check if password is valid
         '''
-        return check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password)
 
-    def to_dict(self):
+    def password_needs_rehash(self):
+        '''Check if the password hash predates the configured cost parameters
+        '''
+        return password_hasher.needs_rehash(self.password)
+
+    def to_dict(self, include_meetings=False, shape=None):
         '''Convert User object to dictionionary
+
+        Args:
+            include_meetings (bool): Whether to embed the user's meetings
+                                     with their timeslots and votes. Load
+                                     them eagerly first to avoid a lazy
+                                     load per meeting and timeslot.
+            shape (Shape, optional): The relationships and fields to
+                                     serialize, instead of the meetings
+                                     if `include_meetings`.
         '''
-        return {
+        if shape is None:
+            shape = Shape(include=['meetings.timeslots.votes']
+                          if include_meetings else [])
+        user = {
             'id': self.id,
             'email': self.email,
-            'meetings': [meeting.to_dict() for meeting in self.meetings]
         }
+        if shape.includes('meetings'):
+            meeting_shape = shape.nested('meetings')
+            user['meetings'] = [meeting.to_dict(shape=meeting_shape)
+                                for meeting in self.meetings]
+        return shape.pick(user)
 
     def __repr__(self):
         '''
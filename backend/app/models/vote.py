@@ -31,7 +31,8 @@ class Vote(db.Model):
     meeting_id : int
         a foreign key that identifies the meeting for which the vote was cast
     timeslot_id : int
-        a foreign key that identifies the timeslot for which the vote was cast
+        a foreign key that identifies the timeslot for which the vote was cast;
+        a user can vote at most once per timeslot
 
     Methods
     -------
@@ -40,23 +41,35 @@ class Vote(db.Model):
     '''
 
     __tablename__ = 'votes'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'timeslot_id',
+                            name='uq_votes_user_id_timeslot_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'),
+                        nullable=False, index=True)
     timeslot_id = db.Column(
         db.Integer,
         db.ForeignKey('timeslots.id', ondelete='CASCADE'),
-        nullable=False)
+        nullable=False,
+        index=True)
     created_at = db.Column(db.DateTime(
         # pylint: disable=not-callable
         timezone=True), server_default=func.now())
 
-    def to_dict(self):
-        return {
+    def to_dict(self, shape=None):
+        '''Converts Vote object to dictionary
+
+        Args:
+            shape (Shape, optional): The fields to serialize.
+        '''
+        data = {
             'id': self.id,
             'user_id': self.user_id,
             'timeslot_id': self.timeslot_id,
         }
+        return shape.pick(data) if shape is not None else data
 
     def __repr__(self):
         '''
@@ -0,0 +1,205 @@
+'''
+This module defines the monitor reporting on the connection pools of
+the database engines.
+
+A request that finds every pooled connection checked out waits for one,
+up to the pool timeout, before touching the database; those waits do
+not show in query timings. The monitor times each checkout of an
+engine, counting those that time out, and listens to the `connect`,
+`checkout` and `checkin` events of its pool, whatever its class, to
+record the connections opened, the connections in use and their peak,
+and how long connections are held. It reports them with the pool's own
+status for every engine of the application.
+
+Classes:
+    PoolStats: The counters of one pool, updated by its checkouts and
+               events.
+    PoolMonitor: Listens to the pools' events and reports on them.
+
+Variables:
+    pool_monitor: The application's pool monitor.
+'''
+
+from threading import Lock
+from time import perf_counter
+from weakref import WeakKeyDictionary
+from sqlalchemy import event, exc
+from .database import db
+
+
+class PoolStats:
+    '''
+    The counters of a connection pool, updated by its checkouts and
+    events.
+
+    Attributes:
+        connects (int): The number of database connections opened.
+        checkouts (int): The number of connections checked out.
+        checked_out (int): The number of connections in use.
+        max_checked_out (int): The most connections in use at once.
+        attempts (int): The number of timed checkouts.
+        timeouts (int): The number of checkouts that timed out.
+        wait_time (float): The total seconds spent checking out.
+        max_wait (float): The longest checkout, in seconds.
+        hold_time (float): The total seconds connections were held.
+        max_hold (float): The longest a connection was held, in seconds.
+    '''
+
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.attempts = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.hold_time = 0.0
+        self.max_hold = 0.0
+        self._lock = Lock()
+
+    def time_checkouts(self, engine):
+        '''
+        Time the checkouts of an engine, which wait in `Pool.connect`
+        while every connection is in use. The engine's `raw_connection`
+        is wrapped rather than its pool, so that the pools the engine
+        recreates are timed too.
+
+        Args:
+            engine (sqlalchemy.engine.Engine): The engine.
+        '''
+        raw_connection = engine.raw_connection
+
+        def timed_raw_connection():
+            start = perf_counter()
+            timed_out = False
+            try:
+                return raw_connection()
+            except exc.TimeoutError:
+                timed_out = True
+                raise
+            finally:
+                wait = perf_counter() - start
+                with self._lock:
+                    self.attempts += 1
+                    self.timeouts += timed_out
+                    self.wait_time += wait
+                    self.max_wait = max(self.max_wait, wait)
+
+        engine.raw_connection = timed_raw_connection
+
+    def listen(self, pool):
+        '''
+        Listen to the events of a pool. The listeners are carried over
+        to the pools the engine recreates, e.g. when it is disposed.
+
+        Args:
+            pool (sqlalchemy.pool.Pool): The pool.
+        '''
+        event.listen(pool, 'connect', self._on_connect)
+        event.listen(pool, 'checkout', self._on_checkout)
+        event.listen(pool, 'checkin', self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record):  # pylint: disable=unused-argument
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):  # pylint: disable=unused-argument
+        # kept by the record even if its connection is invalidated
+        connection_record.record_info['checked_out_at'] = perf_counter()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):  # pylint: disable=unused-argument
+        checked_out_at = connection_record.record_info.pop('checked_out_at', None)
+        if checked_out_at is None:
+            return
+        hold = perf_counter() - checked_out_at
+        with self._lock:
+            self.checked_out -= 1
+            self.hold_time += hold
+            self.max_hold = max(self.max_hold, hold)
+
+    def report(self):
+        '''
+        Report the counters.
+
+        Returns:
+            dict: The connections opened, checked out and in use, the
+            checkout timeouts and waits, and the time connections were
+            held.
+        '''
+        with self._lock:
+            checkins = self.checkouts - self.checked_out
+            return {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checked_out': self.checked_out,
+                'max_checked_out': self.max_checked_out,
+                'timeouts': self.timeouts,
+                'wait_ms_avg': round(self.wait_time * 1000 / self.attempts, 3)
+                               if self.attempts else 0.0,
+                'wait_ms_max': round(self.max_wait * 1000, 3),
+                'hold_ms_avg': round(self.hold_time * 1000 / checkins, 3)
+                               if checkins else 0.0,
+                'hold_ms_max': round(self.max_hold * 1000, 3),
+            }
+
+
+class PoolMonitor:
+    '''
+    Times the checkouts of the application's engines, listens to their
+    pool events and reports on their pools.
+    '''
+
+    def __init__(self):
+        self._stats = WeakKeyDictionary()
+
+    def init_app(self, app):
+        '''
+        Listen to the pools of the application's engines. Must be called
+        after the database is initialized.
+
+        Args:
+            app (flask.Flask): The application.
+        '''
+        with app.app_context():
+            engines = db.engines
+        for engine in engines.values():
+            self.instrument(engine)
+
+    def instrument(self, engine):
+        '''
+        Time the checkouts of an engine and listen to its pool events,
+        once.
+
+        Args:
+            engine (sqlalchemy.engine.Engine): The engine.
+        '''
+        if engine not in self._stats:
+            stats = PoolStats()
+            stats.time_checkouts(engine)
+            stats.listen(engine.pool)
+            self._stats[engine] = stats
+
+    def stats(self):
+        '''
+        Report on the pool of every engine of the current application.
+
+        Returns:
+            dict: The pool statistics keyed by bind, 'default' being the
+            main database.
+        '''
+        report = {}
+        for bind_key, engine in db.engines.items():
+            stats = self._stats.get(engine)
+            report[bind_key or 'default'] = {
+                'status': engine.pool.status(),
+                **(stats.report() if stats is not None else {}),
+            }
+        return report
+
+
+pool_monitor = PoolMonitor()
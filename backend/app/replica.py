@@ -0,0 +1,125 @@
+'''
+This module routes the read-only service calls to a read replica.
+
+The service functions that only read are marked with
+`reads_from_replica`. While such a call runs, the session sends its
+queries to the 'replica' bind, unless no replica is configured, the
+session already wrote to the primary, or the client wrote recently.
+
+Replicas lag behind the primary, so a client reading right after its own
+write could miss it. Every response to a request that wrote carries the
+time of the write in the X-Last-Write header and the last_write cookie;
+requests presenting either one within REPLICA_PIN_SECONDS of it are
+served by the primary.
+
+Classes:
+    ReplicaRouter: Reads and issues the clients' last write tokens.
+
+Functions:
+    reads_from_replica: Mark a service function as read-only.
+
+Variables:
+    replica_router: The application's replica router.
+'''
+
+from functools import wraps
+from inspect import isgeneratorfunction
+from math import ceil
+from time import time
+from flask import current_app, g, has_request_context, request
+from .database import REPLICA_BIND, USE_REPLICA_KEY, WROTE_KEY, db
+
+LAST_WRITE_HEADER = 'X-Last-Write'
+LAST_WRITE_COOKIE = 'last_write'
+
+
+def _may_read_replica(info):
+    '''Whether the current session may send its reads to the replica.'''
+    if REPLICA_BIND not in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        return False
+    if info.get(WROTE_KEY):
+        return False
+    return not (has_request_context() and g.get('pinned_to_primary'))
+
+
+def reads_from_replica(function):
+    '''
+    Decorator marking a service function as read-only, so that its
+    queries may be served by the replica. Generator functions read from
+    the replica until they are exhausted.
+
+    Args:
+        function (function): The service function.
+
+    Returns:
+        function: The decorated function.
+    '''
+    if isgeneratorfunction(function):
+        @wraps(function)
+        def generator_wrapper(*args, **kwargs):
+            info = db.session.info
+            previous = info.get(USE_REPLICA_KEY, False)
+            info[USE_REPLICA_KEY] = previous or _may_read_replica(info)
+            try:
+                yield from function(*args, **kwargs)
+            finally:
+                info[USE_REPLICA_KEY] = previous
+        return generator_wrapper
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        info = db.session.info
+        previous = info.get(USE_REPLICA_KEY, False)
+        info[USE_REPLICA_KEY] = previous or _may_read_replica(info)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            info[USE_REPLICA_KEY] = previous
+    return wrapper
+
+
+class ReplicaRouter:
+    '''
+    Pins the reads of clients that wrote recently to the primary.
+
+    Attributes:
+        pin_seconds (float): How long after a write a client's reads go
+                             to the primary.
+    '''
+
+    def __init__(self, pin_seconds=5):
+        self.pin_seconds = pin_seconds
+
+    def init_app(self, app):
+        '''
+        Configure the router and register its request hooks. Nothing is
+        registered when no replica is configured.
+
+        Args:
+            app (flask.Flask): The application.
+        '''
+        self.pin_seconds = app.config.get('REPLICA_PIN_SECONDS', self.pin_seconds)
+        if REPLICA_BIND in app.config.get('SQLALCHEMY_BINDS', {}):
+            app.before_request(self._read_last_write)
+            app.after_request(self._issue_last_write)
+
+    def _read_last_write(self):
+        token = (request.headers.get(LAST_WRITE_HEADER)
+                 or request.cookies.get(LAST_WRITE_COOKIE))
+        try:
+            last_write = float(token)
+        except (TypeError, ValueError):
+            last_write = 0
+        g.pinned_to_primary = time() - last_write < self.pin_seconds
+
+    def _issue_last_write(self, response):
+        if db.session.registry.has() and db.session.info.get(WROTE_KEY):
+            token = f'{time():.3f}'
+            response.headers[LAST_WRITE_HEADER] = token
+            response.set_cookie(LAST_WRITE_COOKIE, token,
+                                max_age=ceil(self.pin_seconds),
+                                httponly=True, samesite='Lax')
+        return response
+
+
+replica_router = ReplicaRouter()
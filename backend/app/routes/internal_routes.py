@@ -0,0 +1,45 @@
+'''
+This module defines the internal routes, used to operate the
+application rather than by its clients.
+
+They are disabled unless INTERNAL_STATS_TOKEN is set, and require it as
+a bearer token.
+'''
+
+from hmac import compare_digest
+from flask import Blueprint, current_app, jsonify, request
+from ..cache import meeting_cache
+from ..events import event_broker
+from ..hashing import password_hasher
+from ..pooling import pool_monitor
+from ..sqlite import sqlite_profile
+
+internal_routes = Blueprint('internal_routes', __name__, url_prefix='/internal')
+
+
+@internal_routes.route('/stats', methods=['GET'])
+def get_stats():
+    '''
+    Reports the state of the process: the database connection pools
+    and writer, the meeting cache, the event broker and the password
+    hasher.
+
+    Returns:
+        The statistics as JSON with a 200 status code. 404 status code
+        if the route is disabled. 401 status code if the token is wrong.
+    '''
+    token = current_app.config.get('INTERNAL_STATS_TOKEN')
+    if not token:
+        return jsonify({'error': 'Not found'}), 404
+
+    scheme, _, presented = request.headers.get('Authorization', '').partition(' ')
+    if scheme != 'Bearer' or not compare_digest(presented.encode(), token.encode()):
+        return jsonify({'error': 'Invalid token'}), 401
+
+    return jsonify({
+        'database': pool_monitor.stats(),
+        'database_writer': sqlite_profile.stats(),
+        'meeting_cache': meeting_cache.stats(),
+        'events': event_broker.stats(),
+        'password_hasher': password_hasher.stats(),
+    }), 200
@@ -14,10 +14,30 @@ Dependencies:
                     require authenticated users.
 '''
 
-from flask import Blueprint, jsonify, request, g
-from ..services import meeting_service
-from ..utils import jwt_required_and_user_loaded
+from datetime import timedelta
+from flask import (Blueprint, Response, current_app, jsonify, request, g,
+                   stream_with_context)
+from ..events import event_broker
+from ..services import (
+    change_service,
+    meeting_service,
+    recommendation_service,
+    token_service,
+    vote_service)
+from ..serialization import (FULL_MEETING, MEETING_FIELDS, MEETING_RELATIONSHIPS,
+                             TALLY_MEETING, TALLY_MEETING_FIELDS, parse_shape)
+from ..utils import (
+    events_token_or_jwt_required,
+    jwt_required_and_user_loaded,
+    meeting_etag,
+    meeting_list_etag,
+    merge_requested,
+    not_modified,
+    shape_not_supported,
+    stream_json_array,
+    with_etag)
 from ..exceptions import (
+    ResourceConflictError,
     ResourceCreationError,
     UnauthorizedError,
     UnexpectedError)
@@ -32,6 +52,18 @@ def get_meeting(meeting_id):
     '''
     Route for fetching an existing meeting.
 
+    With `?votes=counts`, each timeslot carries a `vote_count` and the
+    caller's own `my_vote_ids` instead of the full list of votes.
+
+    `?include=` selects the embedded relationships among `timeslots` and
+    `timeslots.votes`, by default both or, with `?votes=counts`, the
+    timeslots only, and `?fields=` the attributes to return; see
+    `app.serialization`. Relationships left out are not loaded.
+
+    The response carries an ETag derived from the meeting's version.
+    When the request's If-None-Match matches it, a 304 is returned
+    without loading the timeslots or votes.
+
     Parameters
     ----------
     meeting_id : int
@@ -42,10 +74,234 @@ def get_meeting(meeting_id):
     json
         The meeting as a JSON object, or an error message.
     '''
-    meeting = meeting_service.get_meeting(meeting_id=meeting_id)
-    if meeting is None:
+    votes = request.args.get('votes', 'full')
+    if votes not in ('full', 'counts'):
+        return jsonify(error="votes must be either 'full' or 'counts'"), 400
+    default, fields = ((FULL_MEETING, MEETING_FIELDS) if votes == 'full'
+                       else (TALLY_MEETING, TALLY_MEETING_FIELDS))
+    try:
+        shape = parse_shape(request.args, MEETING_RELATIONSHIPS, fields,
+                            default.include)
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+    # the counts variant embeds the caller's own votes
+    variant = f'counts-u{g.user_id}' if votes == 'counts' else votes
+    if shape != default:
+        variant = f'{variant}-{shape.digest}'
+
+    version = meeting_service.get_meeting_version(meeting_id)
+    if version is None:
+        return jsonify(error='Meeting not found'), 404
+    response = not_modified(meeting_etag(meeting_id, version, variant))
+    if response is not None:
+        return response
+
+    try:
+        if votes == 'counts':
+            payload = meeting_service.get_meeting_tally_payload(
+                meeting_id=meeting_id, user_id=g.user_id, shape=shape)
+        else:
+            payload = meeting_service.get_meeting_payload(
+                meeting_id=meeting_id, shape=shape)
+    except UnexpectedError:
+        return jsonify(error='An unexpected error occurred'), 500
+
+    if payload is None:
+        return jsonify(error='Meeting not found'), 404
+    # fields may leave the version out; the one read first is then
+    # older, if anything, which only costs the client a refetch
+    return with_etag(jsonify(payload), meeting_etag(
+        meeting_id, payload.get('version', version), variant)), 200
+
+
+@meeting_routes.route('/meetings/<int:meeting_id>/tally', methods=['GET'])
+@jwt_required_and_user_loaded
+@shape_not_supported
+def get_meeting_tally(meeting_id):
+    '''
+    Route for fetching the vote counts of every timeslot of a meeting.
+
+    Parameters
+    ----------
+    meeting_id : int
+        The ID of the meeting.
+
+    Returns
+    -------
+    json
+        The per-timeslot vote counts with the caller's own vote IDs,
+        or an error message.
+    '''
+    tally = vote_service.get_tally(meeting_id=meeting_id, user_id=g.user_id)
+    if tally is None:
+        return jsonify(error='Meeting not found'), 404
+    return jsonify(meeting_id=meeting_id, timeslots=tally), 200
+
+
+@meeting_routes.route('/meetings/<int:meeting_id>/recommendation', methods=['GET'])
+@jwt_required_and_user_loaded
+@shape_not_supported
+def get_meeting_recommendation(meeting_id):
+    '''
+    Route for ranking the best times to hold a meeting.
+
+    Accepts a `limit` on the number of windows returned (5 by default)
+    and a `min_duration` in minutes below which windows are ignored.
+
+    Parameters
+    ----------
+    meeting_id : int
+        The ID of the meeting.
+
+    Returns
+    -------
+    json
+        The ranked windows with their available voters and overlapping
+        suggestions, or an error message.
+    '''
+    limit = request.args.get('limit', 5, type=int)
+    min_duration = request.args.get('min_duration', 0, type=int)
+
+    max_limit = current_app.config['MEETINGS_MAX_PAGE_SIZE']
+    if not 0 < limit <= max_limit:
+        return jsonify(
+            error=f'limit must be between 1 and {max_limit}'), 400
+    if min_duration < 0:
+        return jsonify(error='min_duration must not be negative'), 400
+
+    try:
+        recommendation = recommendation_service.get_recommendation(
+            meeting_id=meeting_id, limit=limit,
+            min_duration=timedelta(minutes=min_duration))
+    except UnexpectedError:
+        return jsonify(error='An unexpected error occurred'), 500
+    if recommendation is None:
         return jsonify(error='Meeting not found'), 404
-    return jsonify(meeting.to_dict()), 200
+    return jsonify(recommendation), 200
+
+
+@meeting_routes.route('/meetings/<int:meeting_id>/changes', methods=['GET'])
+@jwt_required_and_user_loaded
+@shape_not_supported
+def get_meeting_changes(meeting_id):
+    '''
+    Route for fetching the changes made to a meeting after a version.
+
+    Clients holding a meeting at version `since` apply the returned
+    changes in order to reach the current version. When the change log
+    no longer reaches back to `since`, a 410 is returned and the client
+    must re-fetch the whole meeting.
+
+    Parameters
+    ----------
+    meeting_id : int
+        The ID of the meeting.
+
+    Returns
+    -------
+    json
+        The current version and the changes since `since`, or an error
+        message.
+    '''
+    since = request.args.get('since', type=int)
+    if since is None or since < 0:
+        return jsonify(error='since must be a non-negative version'), 400
+
+    result = change_service.get_changes(meeting_id=meeting_id, since=since)
+    if result is None:
+        return jsonify(error='Meeting not found'), 404
+    version, changes = result
+    if changes is None:
+        return jsonify(error='Resync required', version=version), 410
+    return jsonify(meeting_id=meeting_id, version=version,
+                   changes=[change.to_dict() for change in changes]), 200
+
+
+@meeting_routes.route('/meetings/<int:meeting_id>/events/token', methods=['POST'])
+@jwt_required_and_user_loaded
+def create_meeting_events_token(meeting_id):
+    '''
+    Route for getting a short-lived token opening the event stream of a
+    meeting, for clients that cannot send an Authorization header, such
+    as browsers' EventSource.
+
+    Parameters
+    ----------
+    meeting_id : int
+        The ID of the meeting to follow.
+
+    Returns
+    -------
+    json
+        The `token` to pass in the stream's query string and its
+        lifetime in seconds, or an error message.
+    '''
+    if meeting_service.get_meeting_version(meeting_id) is None:
+        return jsonify(error='Meeting not found'), 404
+    return jsonify(
+        token=token_service.issue_events_token(g.user_id, meeting_id),
+        expires_in=current_app.config['EVENTS_TOKEN_EXPIRES']), 200
+
+
+@meeting_routes.route('/meetings/<int:meeting_id>/events', methods=['GET'])
+@events_token_or_jwt_required
+@shape_not_supported
+def get_meeting_events(meeting_id):
+    '''
+    Route for following the changes to a meeting as Server-Sent Events.
+
+    Browsers' EventSource cannot send an Authorization header; it passes
+    a token from `POST /meetings/<id>/events/token` in the `token` query
+    parameter instead. The token is only checked when the stream opens.
+
+    Each event is named after the change (e.g. `vote_added`) and carries
+    the new meeting version as its ID and the changed object as its
+    data. Idle streams receive a keep-alive comment every
+    EVENTS_HEARTBEAT_INTERVAL seconds. If the client falls too far
+    behind, a `resync` event is sent and the stream ends; the client
+    should then re-fetch the meeting and reconnect.
+
+    Parameters
+    ----------
+    meeting_id : int
+        The ID of the meeting to follow.
+
+    Returns
+    -------
+    text/event-stream
+        The stream of change events, or an error message.
+    '''
+    if meeting_service.get_meeting_version(meeting_id) is None:
+        return jsonify(error='Meeting not found'), 404
+
+    app = current_app._get_current_object()  # pylint: disable=protected-access
+    subscription = event_broker.subscribe(meeting_id)
+
+    def generate():
+        try:
+            heartbeat = event_broker.heartbeat_interval
+            yield f'retry: {int(heartbeat * 1000)}\n\n'
+            while True:
+                change = subscription.get(timeout=heartbeat)
+                if subscription.overflowed:
+                    yield 'event: resync\ndata: {}\n\n'
+                    return
+                if change is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                frame = (f"event: {change['type']}\n"
+                         f"data: {app.json.dumps(change)}\n\n")
+                if change['version'] is not None:
+                    frame = f"id: {change['version']}\n" + frame
+                yield frame
+                if change['type'] == 'meeting_deleted':
+                    return
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return Response(generate(), status=200, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache',
+                             'X-Accel-Buffering': 'no'})
 
 
 @meeting_routes.route('/meetings', methods=['GET'])
@@ -54,16 +310,67 @@ def get_meetings():
     '''
     Route for fetching all meetings created by a user.
 
+    Supports keyset pagination through the `limit` and `after` query
+    parameters, where `after` is the ID of the last meeting of the
+    previous page. The cursor for the next page, if any, is returned in
+    the X-Next-Cursor header; a cursor that is no longer one of the
+    user's meetings is answered with a 400. The list is streamed, one meeting at a time.
+
+    The meetings embed their timeslots but not their votes, which are
+    not even loaded, unless `?include=timeslots.votes` asks for them;
+    `?include=` and `?fields=` shape the meetings as in `get_meeting`.
+
+    The response carries an ETag derived from the IDs and versions of
+    the listed meetings; when the request's If-None-Match matches it, a
+    304 is returned without loading any meeting.
+
     Returns
     -------
     json
         A list of meetings as JSON objects, or an error message.
     '''
     user_id = g.user_id
-    meetings = meeting_service.get_meetings(user_id)
-    if not meetings:
+    limit = request.args.get('limit', type=int)
+    after = request.args.get('after', type=int)
+    try:
+        shape = parse_shape(request.args, MEETING_RELATIONSHIPS, MEETING_FIELDS,
+                            TALLY_MEETING.include)
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+
+    max_limit = current_app.config['MEETINGS_MAX_PAGE_SIZE']
+    if limit is not None and not 0 < limit <= max_limit:
+        return jsonify(
+            error=f'limit must be between 1 and {max_limit}'), 400
+
+    try:
+        meeting_versions = meeting_service.get_meeting_versions(
+            user_id,
+            limit=limit + 1 if limit is not None else None,
+            after=after)
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+    if not meeting_versions and after is None:
         return jsonify(error='No meetings found for this user'), 404
-    return jsonify([meeting.to_dict() for meeting in meetings]), 200
+
+    headers = {}
+    if limit is not None and len(meeting_versions) > limit:
+        meeting_versions = meeting_versions[:limit]
+        headers['X-Next-Cursor'] = str(meeting_versions[-1][0])
+
+    etag = meeting_list_etag(meeting_versions, f'{shape.digest}-u{user_id}')
+    response = not_modified(etag)
+    if response is not None:
+        response.headers.update(headers)
+        return response
+
+    body = stream_json_array(
+        meeting_service.iter_meetings(
+            [meeting_id for meeting_id, _ in meeting_versions], shape=shape),
+        lambda meeting: meeting.to_dict(shape=shape))
+    return with_etag(Response(stream_with_context(body), status=200,
+                              headers=headers, mimetype='application/json'),
+                     etag)
 
 
 @meeting_routes.route('/meetings', methods=['POST'])
@@ -72,6 +379,9 @@ def create_meeting():
     '''
     Route for creating a new meeting.
 
+    Duplicate time slots are answered with a 409, unless `?merge=true`
+    asks for them to be merged into a single timeslot.
+
     Returns
     -------
     json
@@ -98,12 +408,15 @@ def create_meeting():
             title=data['title'],
             description=data['description'],
             user_id=g.user_id,
-            time_slots=time_slots)
+            time_slots=time_slots,
+            merge=merge_requested())
         return jsonify(meeting.to_dict()), 201
     except UnauthorizedError:
         return jsonify({
                     'error': 'User is not authorized to create this meeting'}
                     ), 403
+    except ResourceConflictError as error:
+        return jsonify({'error': str(error)}), 409
     except ResourceCreationError:
         return jsonify({'error': 'Meeting creation failed'}), 400
     except UnexpectedError:
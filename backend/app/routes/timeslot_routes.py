@@ -1,12 +1,14 @@
 '''
 This module defines the routes related to the timeslot operations
-such as creating, updating, and deleting timeslots.
+such as creating (one at a time or in bulk), updating, and deleting
+timeslots.
 '''
 
-from flask import Blueprint, jsonify, request, g
+from flask import Blueprint, current_app, jsonify, request, g
 from ..services import timeslot_service
-from ..utils import jwt_required_and_user_loaded
+from ..utils import jwt_required_and_user_loaded, merge_requested
 from ..exceptions import (
+    ResourceConflictError,
     ResourceCreationError,
     UnauthorizedError,
     UnexpectedError)
@@ -17,18 +19,34 @@ timeslot_routes = Blueprint(
                             url_prefix='/api')
 
 
+def _timeslot_payload(timeslot):
+    '''Serialize a timeslot along with the IDs of the timeslots it overlaps.'''
+    return {**timeslot.to_dict(), 'overlaps': list(timeslot.overlaps)}
+
+
+def _conflict_response(error):
+    '''Answer a duplicate timeslot with a 409.'''
+    return jsonify(error=str(error), timeslot_id=error.existing_id), 409
+
+
 @timeslot_routes.route('/timeslots', methods=['POST'])
 @jwt_required_and_user_loaded
 def create_timeslot():
     '''
     Creates a timeslot with the specified meeting_id, start_time,
     and end_time. The timeslot is created in the context of the current user.
+    The response lists the IDs of the meeting's timeslots it `overlaps`.
+
+    With `?merge=true`, suggesting the bounds of an existing timeslot of
+    the meeting returns that timeslot instead of failing.
 
     Returns:
         201 status code and json representation of the timeslot
-        if creation is successful. 400 status code
-        if required fields are missing. 500 status code and error message
-        if there's an unexpected error.
+        if creation is successful. 200 status code and the existing
+        timeslot if it was merged. 400 status code
+        if required fields are missing. 409 status code if the meeting
+        already has a timeslot with the same bounds. 500 status code and
+        error message if there's an unexpected error.
     '''
     data = request.get_json()
 
@@ -46,8 +64,11 @@ def create_timeslot():
             user_id=g.user_id,
             meeting_id=data['meeting_id'],
             start_time=data['startTime'],
-            end_time=data['endTime'])
-        return jsonify(timeslot.to_dict()), 201
+            end_time=data['endTime'],
+            merge=merge_requested())
+        return jsonify(_timeslot_payload(timeslot)), 200 if timeslot.merged else 201
+    except ResourceConflictError as error:
+        return _conflict_response(error)
     except UnauthorizedError:
         return jsonify({
                     'error': 'User is not authorized to create this timeslot'}
@@ -58,6 +79,56 @@ def create_timeslot():
         return jsonify({'error': 'An unexpected error occurred'}), 500
 
 
+@timeslot_routes.route('/meetings/<int:meeting_id>/timeslots/bulk',
+                       methods=['POST'])
+@jwt_required_and_user_loaded
+def create_timeslots(meeting_id):
+    '''
+    Creates several timeslots for the meeting with the specified meeting_id
+    in a single transaction. The request body holds a `timeSlots` list of
+    objects with `startTime` and `endTime` fields. With `?merge=true`,
+    duplicate slots resolve to the timeslot with the same bounds.
+
+    Returns:
+        201 status code and json list of the created timeslots
+        if creation is successful. 400 status code if the payload or
+        any of the timeslots is invalid, in which case none is created.
+        404 status code if the meeting is not found. 409 status code if
+        a slot is a duplicate, in which case none is created.
+        500 status code and error message if there's an unexpected error.
+    '''
+    data = request.get_json()
+
+    if data is None:
+        return jsonify({'error': 'No JSON data in request'}), 400
+
+    time_slots = data.get('timeSlots')
+    if not isinstance(time_slots, list) or not time_slots:
+        return jsonify({'error': 'Missing required fields'}), 400
+
+    max_batch_size = current_app.config['MAX_BATCH_SIZE']
+    if len(time_slots) > max_batch_size:
+        return jsonify({
+            'error': f'At most {max_batch_size} timeslots can be created at once'}
+            ), 400
+
+    try:
+        timeslots = timeslot_service.create_timeslots(
+            user_id=g.user_id,
+            meeting_id=meeting_id,
+            time_slots=time_slots,
+            merge=merge_requested())
+        if timeslots is None:
+            return jsonify(error='Meeting not found'), 404
+        return jsonify([_timeslot_payload(timeslot) for timeslot in timeslots]), 201
+    except ResourceConflictError as error:
+        return _conflict_response(error)
+    except ResourceCreationError as error:
+        return jsonify({'error': str(error)}), 400
+    except UnexpectedError:
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+
+
 @timeslot_routes.route('/timeslots/<int:timeslot_id>', methods=['PUT', 'PATCH'])
 @jwt_required_and_user_loaded
 def update_timeslot(timeslot_id):
@@ -65,25 +136,30 @@ def update_timeslot(timeslot_id):
     Updates the timeslot with the specified timeslot_id.
 
     Returns:
-        200 status code and json representation of the timeslot
-        if update is successful. 404 status code if timeslot is not found.
+        200 status code and json representation of the timeslot, with
+        the IDs of the timeslots it overlaps, if update is successful.
+        404 status code if timeslot is not found. 409 status code if
+        another timeslot of the meeting has the new bounds.
     '''
     data = request.get_json()
 
     if data is None:
         return jsonify({'error': 'No JSON data in request'}), 400
 
-    timeslot = timeslot_service.update_timeslot(
-        user_id=g.user_id,
-        timeslot_id=timeslot_id,
-        meeting_id=data.get('meeting_id'),
-        start_time=data.get('startTime'),
-        end_time=data.get('endTime'))
+    try:
+        timeslot = timeslot_service.update_timeslot(
+            user_id=g.user_id,
+            timeslot_id=timeslot_id,
+            meeting_id=data.get('meeting_id'),
+            start_time=data.get('startTime'),
+            end_time=data.get('endTime'))
+    except ResourceConflictError as error:
+        return _conflict_response(error)
     if timeslot is None:
         return jsonify(error='Timeslot not found'), 404
     elif timeslot == 'Unauthorized':
         return jsonify({'error': 'Unauthorized to update the timeslot'}), 403
-    return jsonify(timeslot.to_dict()), 200
+    return jsonify(_timeslot_payload(timeslot)), 200
 
 
 @timeslot_routes.route('/timeslots/<int:timeslot_id>', methods=['DELETE'])
@@ -1,11 +1,27 @@
 '''
 This module defines the routes related to the user operations
-such as registering and logging in a user.
+such as registering and logging in a user, refreshing and revoking
+their tokens, and fetching the times a user is busy.
 '''
 
-from flask import Blueprint, jsonify, request
-from ..services import user_service
-from ..exceptions import ResourceCreationError, UnexpectedError
+from datetime import datetime, timedelta, timezone
+from dateutil.parser import isoparse
+from flask import Blueprint, current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+from ..services import token_service, user_service
+from ..utils import jwt_required_and_user_loaded, shape_not_supported
+from ..exceptions import (
+    ResourceCreationError,
+    UnexpectedError)
+
+# Period covered by GET /users/me/busy when no end is given
+DEFAULT_BUSY_RANGE = timedelta(days=30)
+
+
+def _expand_meetings():
+    '''Whether the request asks for the user's meetings (`?expand=meetings`).'''
+    return 'meetings' in request.args.get('expand', '').split(',')
+
 
 user_routes = Blueprint('user_routes', __name__, url_prefix='/api')
 
@@ -15,10 +31,14 @@ def register_user():
     '''
     Registers a new user with the specified email and password.
 
+    The response holds a summary of the user; `?expand=meetings`
+    embeds the user's meetings in it.
+
     Returns:
         Response from the user service register_user function
         if registration is successful. 400 status code if
-        required fields are missing. 500 status code and error message
+        required fields are missing. 503 status code if the server is
+        too busy to hash the password. 500 status code and error message
         if there's an unexpected error.
     '''
     data = request.get_json()
@@ -32,7 +52,8 @@ def register_user():
 
     try:
         response, status_code = user_service.register_user(
-            data['email'], data['password'])
+            data['email'], data['password'],
+            include_meetings=_expand_meetings())
         return jsonify(response), status_code
     except ResourceCreationError:
         return jsonify({'error': 'User creation failed'}), 400
@@ -45,10 +66,14 @@ def login_user():
     '''
     Logs in a user with the specified email and password.
 
+    The response holds a summary of the user; `?expand=meetings`
+    embeds the user's meetings, with their timeslots and votes, in it.
+
     Returns:
         Response from the user service login_user function
         if login is successful. 400 status code
-        if required fields are missing.
+        if required fields are missing. 503 status code if the server is
+        too busy to check the password.
     '''
     data = request.get_json()
 
@@ -59,6 +84,100 @@ def login_user():
     if not all(key in data for key in ['email', 'password']):
         return jsonify({'error': 'Missing required fields'}), 400
 
-    response, status_code = user_service.login_user(
-        email=data['email'], password=data['password'])
+    try:
+        response, status_code = user_service.login_user(
+            email=data['email'], password=data['password'],
+            include_meetings=_expand_meetings())
+    except UnexpectedError:
+        return jsonify({'error': 'An unexpected error occurred'}), 500
     return jsonify(response), status_code
+
+
+@user_routes.route('/users/token/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh_token():
+    '''
+    Exchanges the refresh token sent as the bearer token for a new
+    access token and refresh token. Each refresh token can be exchanged
+    only once; exchanging one twice revokes all the user's refresh tokens.
+
+    Returns:
+        200 status code and the new `token` and `refresh_token`.
+        401 status code if the refresh token is invalid or revoked.
+        500 status code and error message if there's an unexpected error.
+    '''
+    try:
+        tokens = token_service.refresh_tokens(
+            user_id=get_jwt_identity(), jti=get_jwt()['jti'])
+    except UnexpectedError:
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+    if tokens is None:
+        return jsonify({'error': 'Refresh token has been revoked'}), 401
+    return jsonify(tokens), 200
+
+
+@user_routes.route('/users/token/revoke', methods=['POST'])
+@jwt_required(refresh=True)
+def revoke_token():
+    '''
+    Revokes the refresh token sent as the bearer token, e.g. on logout.
+
+    Returns:
+        200 status code and success message.
+        500 status code and error message if there's an unexpected error.
+    '''
+    try:
+        token_service.revoke_token(
+            user_id=get_jwt_identity(), jti=get_jwt()['jti'])
+    except UnexpectedError:
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+    return jsonify(success=True), 200
+
+
+def _parse_utc(value):
+    '''Parse an ISO 8601 time into a naive UTC datetime.'''
+    moment = isoparse(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+@user_routes.route('/users/me/busy', methods=['GET'])
+@jwt_required_and_user_loaded
+@shape_not_supported
+def get_busy_intervals():
+    '''
+    Fetches the times the current user is committed to, across every
+    meeting they created, suggested timeslots in or voted on.
+
+    The period is given by the `from` and `to` query parameters in
+    ISO 8601 format; it defaults to the next 30 days.
+
+    Returns:
+        200 status code and the merged busy intervals within the period.
+        400 status code if the period is invalid or too long.
+        500 status code and error message if there's an unexpected error.
+    '''
+    try:
+        start = (_parse_utc(request.args['from']) if 'from' in request.args
+                 else datetime.utcnow().replace(microsecond=0))
+        end = (_parse_utc(request.args['to']) if 'to' in request.args
+               else start + DEFAULT_BUSY_RANGE)
+    except (ValueError, OverflowError):
+        return jsonify({'error': 'from and to must be ISO 8601 times'}), 400
+
+    max_days = current_app.config['BUSY_MAX_RANGE_DAYS']
+    if not start < end <= start + timedelta(days=max_days):
+        return jsonify({
+            'error': f'to must be after from, by at most {max_days} days'}), 400
+
+    try:
+        intervals = user_service.get_busy_intervals(g.user_id, start, end)
+    except UnexpectedError:
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+    return jsonify({
+        'from': start,
+        'to': end,
+        'busy': [{'start_time': busy_start, 'end_time': busy_end}
+                 for busy_start, busy_end in intervals],
+    }), 200
@@ -1,9 +1,9 @@
 '''
 This module defines the routes related to the vote operations
-such as creating and deleting a vote.
+such as creating and deleting a vote, or casting a whole ballot at once.
 '''
 
-from flask import Blueprint, jsonify, request, g
+from flask import Blueprint, current_app, jsonify, request, g
 from ..services import vote_service
 from ..utils import jwt_required_and_user_loaded
 from ..exceptions import (
@@ -11,6 +11,12 @@ from ..exceptions import (
     UnauthorizedError,
     UnexpectedError)
 
+
+def _is_id(value):
+    '''Whether a JSON value is an ID; booleans are ints to Python, not IDs.'''
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
 vote_routes = Blueprint('vote_routes', __name__, url_prefix='/api')
 
 
@@ -23,8 +29,9 @@ def create_vote():
     Returns:
         The created vote as JSON, along with a 201 status code
         if the vote is created successfully. 400 status code
-        if required fields are missing. 500 status code and
-        error message if there's an unexpected error.
+        if required fields are missing. 503 status code if the
+        database is busy. 500 status code and error message if
+        there's an unexpected error.
     '''
     data = request.get_json()
 
@@ -50,6 +57,96 @@ def create_vote():
         return jsonify({'error': 'An unexpected error occurred'}), 500
 
 
+@vote_routes.route('/timeslots/<int:timeslot_id>/vote', methods=['PUT'])
+@jwt_required_and_user_loaded
+def set_vote(timeslot_id):
+    '''
+    Sets whether the user votes for a timeslot. The request body holds
+    a boolean `voted` field. Repeating the request has no further effect.
+
+    Returns:
+        The timeslot ID, the voted state and the user's vote as JSON,
+        along with a 200 status code. 400 status code if the payload is
+        invalid or the timeslot does not exist. 503 status code if the
+        database is busy. 500 status code and error message if there's
+        an unexpected error.
+    '''
+    data = request.get_json()
+
+    if data is None:
+        return jsonify({'error': 'No JSON data in request'}), 400
+
+    # validate incoming data
+    if not isinstance(data.get('voted'), bool):
+        return jsonify({'error': 'Missing required fields'}), 400
+
+    try:
+        vote = vote_service.set_vote(
+            user_id=g.user_id, timeslot_id=timeslot_id, voted=data['voted'])
+        return jsonify(timeslot_id=timeslot_id,
+                       voted=vote is not None,
+                       vote=vote.to_dict() if vote is not None else None), 200
+    except ResourceCreationError:
+        return jsonify({'error': 'Timeslot not found'}), 400
+    except UnexpectedError:
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+
+
+@vote_routes.route('/votes/batch', methods=['POST'])
+@jwt_required_and_user_loaded
+def apply_ballot():
+    '''
+    Adds and removes several of the user's votes in a meeting at once.
+    The request body holds the `meeting_id` and `add` and `remove` lists
+    of timeslot IDs; all the changes are applied in one transaction.
+
+    Returns:
+        The user's resulting votes in the meeting as JSON, along with
+        a 200 status code. 400 status code if the payload is invalid
+        or a timeslot does not belong to the meeting, 404 status code if
+        the meeting is not found. 503 status code if the database is
+        busy. 500 status code and error message if there's an
+        unexpected error.
+    '''
+    data = request.get_json()
+
+    if data is None:
+        return jsonify({'error': 'No JSON data in request'}), 400
+
+    # validate incoming data
+    if 'meeting_id' not in data:
+        return jsonify({'error': 'Missing required fields'}), 400
+    if not _is_id(data['meeting_id']):
+        return jsonify({'error': 'meeting_id must be a meeting ID'}), 400
+
+    add = data.get('add', [])
+    remove = data.get('remove', [])
+    if not all(isinstance(ids, list) and all(_is_id(timeslot_id) for timeslot_id in ids)
+               for ids in (add, remove)):
+        return jsonify({'error': 'add and remove must be lists of timeslot IDs'}), 400
+
+    max_batch_size = current_app.config['MAX_BATCH_SIZE']
+    if len(add) + len(remove) > max_batch_size:
+        return jsonify({
+            'error': f'At most {max_batch_size} votes can be changed at once'}
+            ), 400
+
+    try:
+        votes = vote_service.apply_ballot(
+            user_id=g.user_id,
+            meeting_id=data['meeting_id'],
+            add=add,
+            remove=remove)
+        if votes is None:
+            return jsonify(error='Meeting not found'), 404
+        return jsonify(meeting_id=data['meeting_id'],
+                       votes=[vote.to_dict() for vote in votes]), 200
+    except ResourceCreationError as error:
+        return jsonify({'error': str(error)}), 400
+    except UnexpectedError:
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+
+
 @vote_routes.route('/votes/<int:vote_id>', methods=['DELETE'])
 @jwt_required_and_user_loaded
 def delete_vote(vote_id):
@@ -59,7 +156,8 @@ def delete_vote(vote_id):
     Returns:
         A success message as JSON and a 200 status code
         if the vote is deleted successfully. 404 status code and
-        error message if the vote is not found.
+        error message if the vote is not found. 503 status code if
+        the database is busy.
     '''
     vote = vote_service.delete_vote(user_id=g.user_id, vote_id=vote_id)
     if vote is None:
@@ -0,0 +1,197 @@
+'''
+This module shapes the serialized models after the `include` and
+`fields` query parameters of the meeting GET routes. The other GET
+routes return computed payloads, e.g. tallies or busy intervals, and
+answer these parameters with a 400.
+
+`include` lists the relationships embedded in the payload, as dotted
+paths from the requested model, e.g. `timeslots,timeslots.votes`.
+The same paths give the loader options of the query, so relationships
+left out are neither serialized nor loaded. Including a nested
+relationship includes its parents.
+
+`fields` lists the attributes to keep, with dotted paths for those of
+the embedded objects, e.g. `id,title,timeslots.start_time`. An object
+none of whose own attributes are listed keeps them all, and included
+relationships are always kept. Unknown relationships and attributes are
+rejected.
+
+Classes:
+    Shape: The relationships and fields of a serialized model.
+
+Functions:
+    parse_shape: Parse the shape requested by query parameters.
+
+Variables:
+    MEETING_RELATIONSHIPS: The relationships a meeting can embed.
+    MEETING_FIELDS: The attributes of a meeting and its embedded objects.
+    TALLY_MEETING_FIELDS: The same with the caller's own vote IDs.
+    FULL_MEETING: The shape of a meeting with its timeslots and votes.
+    TALLY_MEETING: The shape of a meeting with its timeslots only.
+'''
+
+from hashlib import sha1
+from sqlalchemy.orm import selectinload
+
+MEETING_RELATIONSHIPS = ('timeslots', 'timeslots.votes')
+MEETING_FIELDS = (
+    'id', 'user_id', 'title', 'description', 'version',
+    'timeslots.id', 'timeslots.user_id', 'timeslots.start_time',
+    'timeslots.end_time', 'timeslots.meeting_id', 'timeslots.vote_count',
+    'timeslots.votes.id', 'timeslots.votes.user_id', 'timeslots.votes.timeslot_id')
+TALLY_MEETING_FIELDS = MEETING_FIELDS + ('timeslots.my_vote_ids',)
+
+
+def _split(value):
+    '''Split a comma-separated query parameter, dropping empty items.'''
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+class Shape:
+    '''
+    The relationships and fields of a serialized model.
+
+    Attributes:
+        include (frozenset): The dotted paths of the embedded relationships.
+        fields (frozenset): The dotted paths of the kept attributes, or
+                            None to keep them all.
+    '''
+
+    def __init__(self, include=(), fields=None):
+        include = set(include)
+        for path in list(include):
+            parts = path.split('.')
+            include.update('.'.join(parts[:end]) for end in range(1, len(parts)))
+        self.include = frozenset(include)
+        self.fields = frozenset(fields) if fields else None
+        # computed once, as the shape is applied to every serialized object
+        self._own_fields = frozenset(path for path in self.fields or ()
+                                     if '.' not in path)
+        self._nested = {}
+
+    def __eq__(self, other):
+        return (isinstance(other, Shape) and self.include == other.include
+                and self.fields == other.fields)
+
+    def __hash__(self):
+        return hash((self.include, self.fields))
+
+    def __repr__(self):
+        return f'<Shape include={sorted(self.include)} fields={sorted(self.fields or ())}>'
+
+    @property
+    def digest(self):
+        '''
+        A short digest identifying the shape, e.g. in entity tags.
+        '''
+        key = f"{','.join(sorted(self.include))};{','.join(sorted(self.fields or ()))}"
+        return sha1(key.encode()).hexdigest()[:16]
+
+    def includes(self, relationship):
+        '''
+        Whether a relationship of the serialized object is embedded.
+
+        Args:
+            relationship (str): The name of the relationship.
+
+        Returns:
+            bool: Whether it is included.
+        '''
+        return relationship in self.include
+
+    def nested(self, relationship):
+        '''
+        The shape of the objects embedded through a relationship.
+
+        Args:
+            relationship (str): The name of the relationship.
+
+        Returns:
+            Shape: The shape with the paths under the relationship.
+        '''
+        if relationship not in self._nested:
+            prefix = f'{relationship}.'
+            self._nested[relationship] = Shape(
+                include=[path[len(prefix):] for path in self.include
+                         if path.startswith(prefix)],
+                fields=[path[len(prefix):] for path in self.fields or ()
+                        if path.startswith(prefix)])
+        return self._nested[relationship]
+
+    def pick(self, data):
+        '''
+        Keep the requested attributes of a serialized object.
+
+        Args:
+            data (dict): The serialized object.
+
+        Returns:
+            dict: The object with the requested attributes and the
+            included relationships.
+        '''
+        if not self._own_fields:
+            return data
+        return {key: value for key, value in data.items()
+                if key in self._own_fields or key in self.include}
+
+    def loader_options(self, model):
+        '''
+        Build the loader options eagerly loading the included
+        relationships, and nothing else.
+
+        Args:
+            model (type): The model the paths start from.
+
+        Returns:
+            list: The options, one chain of selectinloads per path.
+        '''
+        options = []
+        for path in sorted(self.include):
+            if any(other.startswith(f'{path}.') for other in self.include):
+                # loaded along the longer path
+                continue
+            loader, entity = None, model
+            for name in path.split('.'):
+                attribute = getattr(entity, name)
+                loader = (selectinload(attribute) if loader is None
+                          else loader.selectinload(attribute))
+                entity = attribute.property.mapper.class_
+            options.append(loader)
+        return options
+
+
+def parse_shape(args, relationships, attributes, default_include=()):
+    '''
+    Parse the shape requested by the `include` and `fields` query
+    parameters.
+
+    Args:
+        args (MultiDict): The query parameters of the request.
+        relationships (iterable): The paths that may be included.
+        attributes (iterable): The paths of the attributes that may be
+                               listed in `fields`, besides the
+                               relationships.
+        default_include (iterable): The paths included when the request
+                                    does not have an `include` parameter.
+
+    Returns:
+        Shape: The requested shape.
+
+    Raises:
+        ValueError: If a relationship cannot be included or a field is
+                    unknown.
+    '''
+    include = args.get('include')
+    include = default_include if include is None else _split(include)
+    unknown = set(include) - set(relationships)
+    if unknown:
+        raise ValueError(f"Unknown relationships: {', '.join(sorted(unknown))}")
+    fields = _split(args.get('fields', ''))
+    unknown = set(fields) - set(attributes) - set(relationships)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return Shape(include=include, fields=fields)
+
+
+FULL_MEETING = Shape(include=MEETING_RELATIONSHIPS)
+TALLY_MEETING = Shape(include=['timeslots'])
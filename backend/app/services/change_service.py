@@ -0,0 +1,212 @@
+'''
+This module provides services for recording writes to a Meeting.
+
+Every write to a meeting, its timeslots or their votes goes through
+record_change, which bumps the meeting's version counter in the
+current transaction, appends the change to the meeting's change log,
+drops the meeting's cached payload and stages a change event. Staged
+events are published to the event broker once the transaction commits,
+and discarded if it rolls back.
+
+The change log keeps the last MEETING_CHANGES_RETENTION changes of
+each meeting; older entries are truncated as new ones are written.
+
+Event types:
+    meeting_updated, meeting_deleted,
+    timeslot_added, timeslot_updated, timeslot_deleted,
+    vote_added, vote_removed, vote_counts_reconciled
+
+Functions:
+    record_change: Record a write to a meeting.
+    record_changes: Record several writes to a meeting at once.
+    oldest_change_query: Build the query of the oldest logged version.
+    changes_query: Build the query of the changes after a version.
+    get_changes: Fetch the changes made to a meeting after a version.
+    delete_changes: Delete the change log of a meeting.
+    forget_meeting: Drop everything derived from a deleted meeting.
+'''
+
+from flask import current_app
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+from ..cache import meeting_cache
+from ..events import event_broker
+from ..exceptions import UnexpectedError
+from ..models.meeting import Meeting
+from ..models.meeting_change import MeetingChange
+from ..database import db
+from ..replica import reads_from_replica
+
+PENDING_EVENTS_KEY = 'pending_meeting_events'
+
+
+def record_change(meeting_id, event_type, data):
+    '''
+    Record a write to a meeting.
+
+    Args:
+        meeting_id (int): The ID of the changed meeting.
+        event_type (str): The kind of change, e.g. 'vote_added'.
+        data (dict): The serialized state of the changed object.
+
+    Returns:
+        int: The new version of the meeting.
+    '''
+    return record_changes(meeting_id, [(event_type, data)])
+
+
+def record_changes(meeting_id, changes):
+    '''
+    Record several writes to a meeting.
+
+    The version is bumped once per change with a single atomic UPDATE
+    inside the caller's transaction; the caller is responsible for
+    committing.
+
+    Args:
+        meeting_id (int): The ID of the changed meeting.
+        changes (list): (event_type, data) tuples, in order.
+
+    Returns:
+        int: The new version of the meeting.
+    '''
+    db.session.execute(
+        update(Meeting)
+        .where(Meeting.id == meeting_id)
+        .values(version=Meeting.version + len(changes))
+        .execution_options(synchronize_session=False))
+    version = db.session.scalar(
+        select(Meeting.version).where(Meeting.id == meeting_id))
+    meeting_cache.discard(meeting_id)
+
+    first_version = version - len(changes) + 1
+    entries = [{
+        'meeting_id': meeting_id,
+        'version': first_version + offset,
+        'type': event_type,
+        'data': data,
+    } for offset, (event_type, data) in enumerate(changes)]
+    db.session.execute(insert(MeetingChange), entries)
+
+    retention = current_app.config['MEETING_CHANGES_RETENTION']
+    if version > retention:
+        db.session.execute(
+            delete(MeetingChange)
+            .where(MeetingChange.meeting_id == meeting_id,
+                   MeetingChange.version <= version - retention)
+            .execution_options(synchronize_session=False))
+
+    pending = db.session.info.setdefault(PENDING_EVENTS_KEY, [])
+    pending.extend((meeting_id, entry) for entry in entries)
+    return version
+
+
+def oldest_change_query(meeting_id):
+    '''
+    Build the query selecting the oldest version of a meeting still in
+    its change log.
+
+    Args:
+        meeting_id (int): The ID of the meeting.
+
+    Returns:
+        Select: The query.
+    '''
+    return (select(func.min(MeetingChange.version))
+            .where(MeetingChange.meeting_id == meeting_id))
+
+
+def changes_query(meeting_id, since):
+    '''
+    Build the query selecting the changes made to a meeting after a
+    version, in order.
+
+    Args:
+        meeting_id (int): The ID of the meeting.
+        since (int): The version of the meeting the caller holds.
+
+    Returns:
+        Select: The query.
+    '''
+    return (select(MeetingChange)
+            .where(MeetingChange.meeting_id == meeting_id,
+                   MeetingChange.version > since)
+            .order_by(MeetingChange.version))
+
+
+@reads_from_replica
+def get_changes(meeting_id, since):
+    '''
+    Fetch the changes made to a meeting after a given version.
+
+    Args:
+        meeting_id (int): The ID of the meeting.
+        since (int): The version of the meeting the caller holds.
+
+    Returns:
+        None if the meeting does not exist. Otherwise a tuple of the
+        current version of the meeting and the list of MeetingChange
+        objects after `since`, in order; the list is None when the log
+        no longer reaches back to `since` and the caller must resync.
+    '''
+    try:
+        version = db.session.scalar(
+            select(Meeting.version).where(Meeting.id == meeting_id))
+        if version is None:
+            return None
+        if since >= version:
+            return version, []
+
+        oldest = db.session.scalar(oldest_change_query(meeting_id))
+        if oldest is None or oldest > since + 1:
+            return version, None
+
+        return version, list(db.session.scalars(changes_query(meeting_id, since)))
+    except Exception as error:
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in get_changes") from error
+
+
+def delete_changes(meeting_id):
+    '''
+    Delete the change log of a meeting that is being deleted. The caller
+    is responsible for committing.
+
+    Args:
+        meeting_id (int): The ID of the meeting.
+    '''
+    db.session.execute(
+        delete(MeetingChange)
+        .where(MeetingChange.meeting_id == meeting_id)
+        .execution_options(synchronize_session=False))
+
+
+def forget_meeting(meeting_id):
+    '''
+    Drop everything derived from a deleted meeting and notify its
+    subscribers. Called after the deletion is committed.
+
+    Args:
+        meeting_id (int): The ID of the deleted meeting.
+    '''
+    meeting_cache.discard(meeting_id)
+    event_broker.publish(meeting_id, {
+        'type': 'meeting_deleted',
+        'meeting_id': meeting_id,
+        'version': None,
+        'data': {'id': meeting_id},
+    })
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending_events(session):
+    '''Publish the events staged by the committed transaction.'''
+    for meeting_id, change in session.info.pop(PENDING_EVENTS_KEY, []):
+        event_broker.publish(meeting_id, change)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending_events(session, previous_transaction):  # pylint: disable=unused-argument
+    '''Discard the events staged by the rolled back transaction.'''
+    session.info.pop(PENDING_EVENTS_KEY, None)
@@ -1,22 +1,41 @@
 '''
-This module provides services for creating, updating and deleting a Meeting.
+This module provides services for fetching, creating, updating and
+deleting a Meeting.
 
 Functions:
+    get_meeting: Fetch a meeting.
+    meeting_version_query: Build the query of a meeting's version counter.
+    get_meeting_version: Fetch the version counter of a meeting.
+    get_meeting_payload: Fetch a serialized meeting through the cache.
+    add_user_vote_ids: Add a user's own vote IDs to a tally payload.
+    get_meeting_tally_payload: Fetch a serialized meeting with vote counts.
+    get_meeting_ids: Fetch a page of the IDs of a user's meetings.
+    get_meeting_versions: Fetch a page of the IDs and versions of a
+                          user's meetings.
+    iter_meetings: Lazily load meetings in batches.
+    get_meetings: Fetch the meetings a user is involved in.
     create_meeting: Create a new meeting.
     update_meeting: Update an existing meeting.
     delete_meeting: Delete a meeting.
 '''
 from flask import current_app
-from sqlalchemy.orm import joinedload
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
-from . import timeslot_service
+from . import change_service, participant_service, timeslot_service, vote_service
+from ..cache import meeting_cache
 from ..models.meeting import Meeting
-from ..models.vote import Vote
+from ..models.meeting_participant import MeetingParticipant
 from ..models.timeslot import TimeSlot
 from ..database import db
-from ..exceptions import ResourceCreationError, UnexpectedError
+from ..replica import reads_from_replica
+from ..serialization import FULL_MEETING, TALLY_MEETING
+from ..exceptions import ResourceConflictError, ResourceCreationError, UnexpectedError
 
+# Number of meetings loaded per query when streaming meeting lists
+STREAM_BATCH_SIZE = 50
 
+@reads_from_replica
 def get_meeting(meeting_id):
     '''
     Fetch a meeting with a given ID.
@@ -29,9 +48,9 @@ def get_meeting(meeting_id):
     '''
 
     try:
-        meeting = Meeting.query.options(
-            joinedload(Meeting.timeslots),
-        ).get(meeting_id)
+        meeting = db.session.get(Meeting, meeting_id, options=[
+            selectinload(Meeting.timeslots).selectinload(TimeSlot.votes),
+        ])
         return meeting
     except Exception as error:
         current_app.logger.error(f"Unexpected error: {error}")
@@ -39,55 +58,265 @@ def get_meeting(meeting_id):
             "Unexpected error occurred in get_meeting") from error
 
 
-def get_meetings(user_id):
+def meeting_version_query(meeting_id):
+    '''
+    Build the query selecting the version counter of a meeting.
+
+    Args:
+        meeting_id (int): The ID of the meeting.
+
+    Returns:
+        Select: The query.
+    '''
+    return select(Meeting.version).where(Meeting.id == meeting_id)
+
+
+@reads_from_replica
+def get_meeting_version(meeting_id):
+    '''
+    Fetch the version counter of a meeting, without loading the meeting.
+
+    Args:
+        meeting_id (int): The ID of the meeting.
+
+    Returns:
+        int: The version of the meeting, or None if it does not exist.
+    '''
+    try:
+        return db.session.scalar(meeting_version_query(meeting_id))
+    except Exception as error:
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in get_meeting_version") from error
+
+
+@reads_from_replica
+def get_meeting_payload(meeting_id, shape=FULL_MEETING):
+    '''
+    Fetch the serialized form of a meeting, going through the meeting cache.
+
+    Only the meeting's version is read on every call; the meeting, its
+    timeslots and their votes are loaded and serialized on cache misses.
+    Other shapes than the full one are not cached: their relationships
+    alone are loaded and serialized on every call.
+
+    Args:
+        meeting_id (int): The ID of the meeting to fetch.
+        shape (Shape, optional): The relationships and fields to serialize.
+
+    Returns:
+        The meeting as a dictionary, or None if the meeting does not exist.
+    '''
+    try:
+        if shape != FULL_MEETING:
+            meeting = db.session.get(Meeting, meeting_id,
+                                     options=shape.loader_options(Meeting))
+            return meeting.to_dict(shape=shape) if meeting is not None else None
+
+        version = get_meeting_version(meeting_id)
+        if version is None:
+            meeting_cache.discard(meeting_id)
+            return None
+
+        payload = meeting_cache.get(meeting_id, version)
+        if payload is None:
+            meeting = get_meeting(meeting_id)
+            if meeting is None:
+                return None
+            payload = meeting.to_dict()
+            meeting_cache.set(meeting_id, meeting.version, payload)
+        return payload
+    except UnexpectedError:
+        raise
+    except Exception as error:
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in get_meeting_payload") from error
+
+
+def add_user_vote_ids(meeting, payload, user_votes):
+    '''
+    Add the IDs of a user's own votes to the timeslots of a serialized
+    meeting, if it embeds them. The timeslots are matched by position,
+    as `fields` may leave their IDs out of the payload.
+
+    Args:
+        meeting (Meeting): The meeting.
+        payload (dict): The serialized meeting.
+        user_votes (dict): The user's vote IDs keyed by timeslot ID.
+
+    Returns:
+        dict: The payload.
+    '''
+    for timeslot, data in zip(meeting.timeslots, payload.get('timeslots', ())):
+        data['my_vote_ids'] = user_votes.get(timeslot.id, [])
+    return payload
+
+
+@reads_from_replica
+def get_meeting_tally_payload(meeting_id, user_id, shape=TALLY_MEETING):
+    '''
+    Fetch the serialized form of a meeting with vote counts instead of votes.
+
+    Each timeslot carries its `vote_count` counter and the `my_vote_ids`
+    of the given user; the votes of other users are never loaded.
+
+    Args:
+        meeting_id (int): The ID of the meeting to fetch.
+        user_id (int): The ID of the user whose own votes are reported.
+        shape (Shape, optional): The relationships and fields to serialize.
+
+    Returns:
+        The meeting as a dictionary, or None if the meeting does not exist.
+    '''
+    try:
+        meeting = db.session.get(Meeting, meeting_id,
+                                 options=shape.loader_options(Meeting))
+        if meeting is None:
+            return None
+
+        payload = meeting.to_dict(shape=shape)
+        if 'timeslots' not in payload:
+            return payload
+        return add_user_vote_ids(
+            meeting, payload, vote_service.get_user_vote_ids(meeting_id, user_id))
+    except UnexpectedError:
+        raise
+    except Exception as error:
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in get_meeting_tally_payload") from error
+
+
+def get_meeting_ids(user_id, limit=None, after=None):
+    '''
+    Fetch the IDs of the meetings a user is involved in, newest first.
+
+    See get_meeting_versions for the ordering and pagination.
+
+    Args:
+        user_id (int): The ID of the user.
+        limit (int, optional): The maximum number of IDs to return.
+        after (int, optional): The ID of the meeting to continue after.
+
+    Returns:
+        A list of meeting IDs.
+    '''
+    return [meeting_id for meeting_id, _ in
+            get_meeting_versions(user_id, limit=limit, after=after)]
+
+
+@reads_from_replica
+def get_meeting_versions(user_id, limit=None, after=None):
+    '''
+    Fetch the IDs and versions of the meetings a user is involved in,
+    newest first.
+
+    Meetings are ordered by (created_at, id) descending and paginated with
+    a keyset cursor: `after` is the ID of the last meeting of the previous
+    page, so every page costs the same regardless of how deep it is.
+    The cursor must still be one of the user's meetings.
+
+    Args:
+        user_id (int): The ID of the user.
+        limit (int, optional): The maximum number of IDs to return.
+        after (int, optional): The ID of the meeting to continue after.
+
+    Returns:
+        A list of (meeting ID, version) tuples.
+
+    Raises:
+        ValueError: If the cursor is not a meeting of the user, e.g.
+                    because it was deleted since the previous page.
+    '''
+    try:
+        member_ids = select(MeetingParticipant.meeting_id).where(
+            MeetingParticipant.user_id == user_id)
+        query = select(Meeting.id, Meeting.version).where(Meeting.id.in_(member_ids))
+
+        if after is not None:
+            if db.session.execute(select(Meeting.id).where(
+                    Meeting.id == after, Meeting.id.in_(member_ids))).first() is None:
+                raise ValueError(f'Unknown cursor {after}')
+            # compared in SQL, as stored, rather than as a bound datetime
+            after_created_at = select(Meeting.created_at).where(
+                Meeting.id == after).scalar_subquery()
+            query = query.where(or_(
+                Meeting.created_at < after_created_at,
+                and_(Meeting.created_at == after_created_at,
+                     Meeting.id < after)))
+
+        query = query.order_by(Meeting.created_at.desc(), Meeting.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+
+        return [tuple(row) for row in db.session.execute(query)]
+    except ValueError:
+        raise
+    except Exception as error:
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in get_meeting_versions") from error
+
+
+@reads_from_replica
+def iter_meetings(meeting_ids, batch_size=STREAM_BATCH_SIZE, shape=FULL_MEETING):
+    '''
+    Lazily load meetings, with their timeslots and votes, in batches.
+
+    Only one batch is held in memory at a time, which lets callers
+    stream arbitrarily long meeting lists.
+
+    Args:
+        meeting_ids (list): The IDs of the meetings, in the wanted order.
+        batch_size (int): The number of meetings loaded per query.
+        shape (Shape, optional): The shape the meetings are serialized
+                                 in; only its relationships are loaded.
+
+    Yields:
+        Meeting objects in the order of `meeting_ids`.
+    '''
+    for start in range(0, len(meeting_ids), batch_size):
+        batch_ids = meeting_ids[start:start + batch_size]
+        meetings = {
+            meeting.id: meeting
+            for meeting in Meeting.query.options(
+                *shape.loader_options(Meeting),
+            ).filter(Meeting.id.in_(batch_ids))
+        }
+        for meeting_id in batch_ids:
+            if meeting_id in meetings:
+                yield meetings[meeting_id]
+
+
+@reads_from_replica
+def get_meetings(user_id, limit=None, after=None):
     '''
     Fetch all meetings created by a user, created a timeslot in, or voted on.
 
+    The lookup goes through the meeting_participants membership index,
+    so it costs one query regardless of how many votes the user has cast.
+
     Args:
         user_id (int): The ID of the user.
+        limit (int, optional): The maximum number of meetings to return.
+        after (int, optional): The ID of the meeting to continue after.
 
     Returns:
-        A list of Meeting objects.
+        A list of Meeting objects, newest first.
     '''
     try:
-        # Fetch all meetings where the user is the creator
-        created_meetings = Meeting.query.options(
-            joinedload(Meeting.timeslots),
-        ).filter_by(user_id=user_id).order_by(Meeting.created_at.desc()).all()
-
-        # Fetch all meetings where the user has created a timeslot
-        timeslots = TimeSlot.query.filter_by(user_id=user_id).all()
-        timeslot_created_meetings = []
-        for timeslot in timeslots:
-            meeting = Meeting.query.options(
-                joinedload(Meeting.timeslots),
-            ).get(timeslot.meeting_id)
-            if meeting not in timeslot_created_meetings:
-                timeslot_created_meetings.append(meeting)
-
-        # Fetch all meetings where the user has voted
-        votes = Vote.query.filter_by(user_id=user_id).all()
-        voted_meetings = []
-        for vote in votes:
-            timeslot = TimeSlot.query.get(vote.timeslot_id)
-            meeting = Meeting.query.options(
-                joinedload(Meeting.timeslots),
-            ).get(timeslot.meeting_id)
-            if meeting not in voted_meetings:
-                voted_meetings.append(meeting)
-
-        # Merge the three sets of meetings together
-        meetings = list(
-            set(created_meetings + voted_meetings + timeslot_created_meetings))
-
-        return meetings
+        meeting_ids = get_meeting_ids(user_id, limit=limit, after=after)
+        return list(iter_meetings(meeting_ids))
+    except UnexpectedError:
+        raise
     except Exception as error:
         current_app.logger.error(f"Unexpected error: {error}")
         raise UnexpectedError(error,
             "Unexpected error occurred in get_all_meetings_by_user") from error
 
 
-def create_meeting(user_id, title, description, time_slots):
+def create_meeting(user_id, title, description, time_slots, merge=False):
     '''
     Create a new meeting with given title, description, user_id and time_slots.
 
@@ -96,30 +325,43 @@ def create_meeting(user_id, title, description, time_slots):
         description (str): The description of the meeting.
         user_id (int): The ID of the user who creates the meeting.
         time_slots (list): A list of time slots.
+        merge (bool): Whether to merge time slots with the same bounds
+                        into one timeslot instead of raising.
+
+    The meeting and all of its time slots are created in a single
+    transaction; if any time slot is invalid nothing is stored.
 
     Returns:
         The created Meeting object.
 
     Raises:
-        Exception: If there is a problem creating the meeting.
+        ResourceConflictError: If a time slot duplicates another one and
+                        merge is False.
+        ResourceCreationError: If the meeting or one of its time slots
+                        is invalid.
+        UnexpectedError: If there is a problem creating the meeting.
     '''
     try:
         meeting = Meeting(
             title=title, description=description, user_id=user_id)
         db.session.add(meeting)
         db.session.flush()  # Flush to get the meeting id
+        participant_service.add_participant(
+            user_id, meeting.id, MeetingParticipant.ROLE_CREATOR)
 
-        for slot in time_slots:
-            timeslot_service.create_timeslot(
-                user_id=user_id,
-                meeting_id=meeting.id,
-                start_time=slot['startTime'],
-                end_time=slot['endTime']
-            )
+        timeslot_service.create_timeslots(
+            user_id=user_id,
+            meeting_id=meeting.id,
+            time_slots=time_slots,
+            commit=False,
+            merge=merge)
 
         db.session.commit()
         return meeting
 
+    except (ResourceConflictError, ResourceCreationError):
+        db.session.rollback()
+        raise
     except IntegrityError as error:
         db.session.rollback()
         current_app.logger.error(f"Meeting creation failed: {error}")
@@ -159,6 +401,11 @@ def update_meeting(user_id, meeting_id, title, description):
         if description is not None:
             meeting.description = description
 
+        change_service.record_change(meeting_id, 'meeting_updated', {
+            'id': meeting.id,
+            'title': meeting.title,
+            'description': meeting.description,
+        })
         db.session.commit()
         return meeting
     except Exception as error:
@@ -186,8 +433,10 @@ def delete_meeting(user_id, meeting_id):
         if meeting and meeting.user_id != user_id:
             return None
 
+        change_service.delete_changes(meeting_id)
         db.session.delete(meeting)
         db.session.commit()
+        change_service.forget_meeting(meeting_id)
         return True
     except Exception as error:
         db.session.rollback()
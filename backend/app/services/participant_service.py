@@ -0,0 +1,106 @@
+'''
+This module provides services for maintaining the meeting membership index.
+
+The helpers here do not commit; they are called by the meeting, timeslot
+and vote services inside their own transactions so that the membership
+rows always change together with the data they describe.
+
+Functions:
+    add_participant: Record that a user took part in a meeting.
+    sync_participant: Recompute a user's suggester and voter roles.
+    rebuild_participants: Rebuild the whole index from the source tables.
+'''
+
+from datetime import datetime
+from sqlalchemy import delete, exists, insert, select
+from ..models.meeting import Meeting
+from ..models.meeting_participant import MeetingParticipant
+from ..models.timeslot import TimeSlot
+from ..models.vote import Vote
+from ..database import db
+
+
+def add_participant(user_id, meeting_id, role):
+    '''
+    Record that a user took part in a meeting in the given role.
+
+    The membership row is created if it does not exist yet,
+    otherwise its last_activity is refreshed.
+
+    Args:
+        user_id (int): The ID of the participating user.
+        meeting_id (int): The ID of the meeting.
+        role (str): One of the MeetingParticipant.ROLE_* values.
+
+    Returns:
+        The MeetingParticipant object.
+    '''
+    participant = db.session.get(
+        MeetingParticipant, (user_id, meeting_id, role))
+    if participant is None:
+        participant = MeetingParticipant(
+            user_id=user_id, meeting_id=meeting_id, role=role)
+        db.session.add(participant)
+    participant.last_activity = datetime.utcnow()
+    return participant
+
+
+def sync_participant(user_id, meeting_id):
+    '''
+    Recompute the suggester and voter roles of a user in a meeting.
+
+    Used after deletions, where a user may have lost their last
+    timeslot or vote in the meeting.
+
+    Args:
+        user_id (int): The ID of the user.
+        meeting_id (int): The ID of the meeting.
+    '''
+    db.session.flush()
+
+    has_timeslot = db.session.scalar(select(exists().where(
+        TimeSlot.user_id == user_id,
+        TimeSlot.meeting_id == meeting_id)))
+    has_vote = db.session.scalar(select(exists().where(
+        Vote.user_id == user_id,
+        Vote.timeslot_id == TimeSlot.id,
+        TimeSlot.meeting_id == meeting_id)))
+
+    for role, active in ((MeetingParticipant.ROLE_SUGGESTER, has_timeslot),
+                         (MeetingParticipant.ROLE_VOTER, has_vote)):
+        participant = db.session.get(
+            MeetingParticipant, (user_id, meeting_id, role))
+        if not active and participant is not None:
+            db.session.delete(participant)
+
+
+def rebuild_participants():
+    '''
+    Rebuild the meeting membership index from the meetings,
+    timeslots and votes tables.
+
+    Intended for backfilling existing databases; runs three
+    INSERT ... SELECT statements and commits.
+    '''
+    db.session.execute(delete(MeetingParticipant))
+
+    columns = ['user_id', 'meeting_id', 'role', 'last_activity']
+    db.session.execute(insert(MeetingParticipant).from_select(
+        columns,
+        select(Meeting.user_id, Meeting.id,
+               db.literal(MeetingParticipant.ROLE_CREATOR),
+               Meeting.created_at)))
+    db.session.execute(insert(MeetingParticipant).from_select(
+        columns,
+        select(TimeSlot.user_id, TimeSlot.meeting_id,
+               db.literal(MeetingParticipant.ROLE_SUGGESTER),
+               db.func.max(TimeSlot.created_at))
+        .group_by(TimeSlot.user_id, TimeSlot.meeting_id)))
+    db.session.execute(insert(MeetingParticipant).from_select(
+        columns,
+        select(Vote.user_id, TimeSlot.meeting_id,
+               db.literal(MeetingParticipant.ROLE_VOTER),
+               db.func.max(Vote.created_at))
+        .join(TimeSlot, Vote.timeslot_id == TimeSlot.id)
+        .group_by(Vote.user_id, TimeSlot.meeting_id)))
+    db.session.commit()
@@ -0,0 +1,242 @@
+'''
+This module provides services for recommending the best time for a Meeting.
+
+A vote on a timeslot is read as its voter being available for the whole
+timeslot. The timeslots of a meeting and the availability of its voters
+are swept in time order, which splits the meeting's timeline into
+windows with a constant number of available voters and overlapping
+suggestions, including the sub-intervals shared by several timeslots.
+The windows are then ranked by available voters, then suggestions,
+then duration. Sorting the boundaries dominates, so the whole pass is
+O(n log n) in the number of timeslots and votes.
+
+Meetings with at least RECOMMENDATION_NUMPY_THRESHOLD intervals are
+swept with NumPy when it is installed. NumPy is only imported by the
+first such sweep, so it never slows down the start of a worker.
+
+Functions:
+    get_recommendation: Rank the candidate windows of a meeting.
+    sweep: Split intervals into ranked windows.
+    numpy_module: Import NumPy on first use.
+'''
+
+from datetime import datetime, timedelta
+from functools import cache
+from flask import current_app
+from sqlalchemy import select
+from ..models.meeting import Meeting
+from ..models.timeslot import TimeSlot
+from ..models.vote import Vote
+from ..database import db
+from ..replica import reads_from_replica
+from ..exceptions import UnexpectedError
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+@reads_from_replica
+def get_recommendation(meeting_id, limit=5, min_duration=None):
+    '''
+    Rank the candidate windows of a meeting.
+
+    Args:
+        meeting_id (int): The ID of the meeting.
+        limit (int): The maximum number of windows to return.
+        min_duration (timedelta, optional): The shortest window to consider.
+
+    Returns:
+        A dictionary with the number of distinct voters and the best
+        windows, each with its start and end time, the number of voters
+        available throughout and the number of timeslots covering it;
+        or None if the meeting does not exist.
+    '''
+    try:
+        if db.session.get(Meeting, meeting_id) is None:
+            return None
+
+        slots = [(_to_micros(start), _to_micros(end)) for start, end in
+                 db.session.execute(
+                     select(TimeSlot.start_time, TimeSlot.end_time)
+                     .where(TimeSlot.meeting_id == meeting_id))]
+        votes = db.session.execute(
+            select(Vote.user_id, TimeSlot.start_time, TimeSlot.end_time)
+            .join(TimeSlot, TimeSlot.id == Vote.timeslot_id)
+            .where(TimeSlot.meeting_id == meeting_id)
+            .order_by(Vote.user_id, TimeSlot.start_time))
+        availability, participants = _merge_availability(votes)
+
+        use_numpy = (len(slots) + len(availability)
+                     >= current_app.config['RECOMMENDATION_NUMPY_THRESHOLD']
+                     and numpy_module() is not None)
+        windows = sweep(slots, availability, limit,
+                        min_duration // MICROSECOND if min_duration else 0,
+                        use_numpy=use_numpy)
+        return {
+            'meeting_id': meeting_id,
+            'participants': participants,
+            'windows': [{
+                'start_time': _from_micros(start),
+                'end_time': _from_micros(end),
+                'available': available,
+                'suggestions': suggestions,
+            } for start, end, available, suggestions in windows],
+        }
+    except Exception as error:
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in get_recommendation") from error
+
+
+def sweep(slots, availability, limit, min_duration=0, use_numpy=False):
+    '''
+    Split intervals into windows and rank them.
+
+    Args:
+        slots (list): The (start, end) integer bounds of the timeslots.
+        availability (list): The (start, end) integer bounds of the
+                             voters' availability, disjoint per voter.
+        limit (int): The maximum number of windows to return.
+        min_duration (int): The shortest window to consider.
+        use_numpy (bool): Whether to sweep with NumPy.
+
+    Returns:
+        A list of (start, end, available, suggestions) tuples, best first.
+    '''
+    if not slots:
+        return []
+    if use_numpy:
+        return _sweep_numpy(slots, availability, limit, min_duration)
+    return _sweep_python(slots, availability, limit, min_duration)
+
+
+@cache
+def numpy_module():
+    '''
+    Import NumPy on first use.
+
+    Returns:
+        The numpy module, or None if it is not installed.
+    '''
+    try:
+        # pylint: disable=import-outside-toplevel
+        import numpy
+    except ImportError:  # pragma: no cover - NumPy is an optional dependency
+        return None
+    return numpy
+
+
+def _sweep_python(slots, availability, limit, min_duration):
+    '''Sweep the intervals in pure Python.'''
+    boundaries = sorted(
+        [(start, 1, 0) for start, _ in availability] +
+        [(end, -1, 0) for _, end in availability] +
+        [(start, 0, 1) for start, _ in slots] +
+        [(end, 0, -1) for _, end in slots])
+
+    windows = []
+    available = suggestions = 0
+    for index, (time, available_delta, suggestions_delta) in enumerate(boundaries):
+        available += available_delta
+        suggestions += suggestions_delta
+        if index + 1 == len(boundaries):
+            break
+        next_time = boundaries[index + 1][0]
+        if next_time == time or not suggestions:
+            continue
+        if (windows and windows[-1][1] == time
+                and windows[-1][2:] == [available, suggestions]):
+            windows[-1][1] = next_time
+        else:
+            windows.append([time, next_time, available, suggestions])
+
+    windows = [window for window in windows
+               if window[1] - window[0] >= min_duration]
+    windows.sort(key=lambda window: (-window[2], -window[3],
+                                     window[0] - window[1], window[0]))
+    return [tuple(window) for window in windows[:limit]]
+
+
+def _sweep_numpy(slots, availability, limit, min_duration):
+    '''Sweep the intervals with vectorized NumPy operations.'''
+    np = numpy_module()
+    slots = np.asarray(slots, dtype=np.int64).reshape(-1, 2)
+    availability = np.asarray(availability, dtype=np.int64).reshape(-1, 2)
+    times = np.concatenate((availability[:, 0], availability[:, 1],
+                            slots[:, 0], slots[:, 1]))
+    ones = np.ones(len(availability), dtype=np.int64)
+    available_deltas = np.concatenate(
+        (ones, -ones, np.zeros(2 * len(slots), dtype=np.int64)))
+    ones = np.ones(len(slots), dtype=np.int64)
+    suggestions_deltas = np.concatenate(
+        (np.zeros(2 * len(availability), dtype=np.int64), ones, -ones))
+
+    order = np.argsort(times, kind='stable')
+    times = times[order]
+    available = np.cumsum(available_deltas[order])
+    suggestions = np.cumsum(suggestions_deltas[order])
+
+    # a window spans two consecutive distinct boundaries, at the
+    # levels reached after the last event of the first one
+    keep = (times[:-1] < times[1:]) & (suggestions[:-1] > 0)
+    starts, ends = times[:-1][keep], times[1:][keep]
+    available, suggestions = available[:-1][keep], suggestions[:-1][keep]
+    if not len(starts):
+        return []
+
+    # merge adjacent windows with the same levels
+    first = np.ones(len(starts), dtype=bool)
+    first[1:] = ((starts[1:] != ends[:-1])
+                 | (available[1:] != available[:-1])
+                 | (suggestions[1:] != suggestions[:-1]))
+    group_starts = np.flatnonzero(first)
+    group_ends = np.append(group_starts[1:], len(starts)) - 1
+    starts, ends = starts[group_starts], ends[group_ends]
+    available, suggestions = available[group_starts], suggestions[group_starts]
+
+    long_enough = ends - starts >= min_duration
+    starts, ends = starts[long_enough], ends[long_enough]
+    available, suggestions = available[long_enough], suggestions[long_enough]
+
+    ranking = np.lexsort((starts, starts - ends, -suggestions, -available))[:limit]
+    return [(int(starts[index]), int(ends[index]),
+             int(available[index]), int(suggestions[index]))
+            for index in ranking]
+
+
+def _merge_availability(votes):
+    '''
+    Merge the overlapping voted timeslots of each voter, so a voter is
+    counted once per instant.
+
+    Args:
+        votes: (user_id, start_time, end_time) rows ordered by user and
+               start time.
+
+    Returns:
+        A tuple of the list of (start, end) availability intervals and
+        the number of distinct voters.
+    '''
+    intervals = []
+    participants = 0
+    current_user = None
+    for user_id, start_time, end_time in votes:
+        start, end = _to_micros(start_time), _to_micros(end_time)
+        if user_id != current_user:
+            current_user = user_id
+            participants += 1
+        elif start <= intervals[-1][1]:
+            intervals[-1][1] = max(intervals[-1][1], end)
+            continue
+        intervals.append([start, end])
+    return [tuple(interval) for interval in intervals], participants
+
+
+def _to_micros(value):
+    '''Convert a naive UTC datetime to microseconds since the epoch.'''
+    return (value - EPOCH) // MICROSECOND
+
+
+def _from_micros(value):
+    '''Convert microseconds since the epoch to a naive UTC datetime.'''
+    return EPOCH + value * MICROSECOND
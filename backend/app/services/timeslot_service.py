@@ -4,21 +4,74 @@ a TimeSlot.
 
 Functions:
     create_timeslot: Create a new timeslot.
+    create_timeslots: Create several timeslots in one transaction.
     update_timeslot: Update an existing timeslot.
     delete_timeslot: Delete a timeslot.
+
+Duplicates are detected with an interval index of the meeting's
+timeslots around the new ones, fetched with one range query: a timeslot
+with the same bounds as an existing one of the same meeting is
+rejected, or merged into the existing one on request, and the
+timeslots it overlaps are reported in its `overlaps` attribute. The
+unique constraint on the bounds settles concurrent suggestions.
 '''
 
 from flask import current_app
+from sqlalchemy import insert, select
 from sqlalchemy.exc import IntegrityError
 from dateutil.parser import isoparse
+from . import change_service, participant_service
+from ..intervals import IntervalIndex
 from ..utils import is_valid_time_slot
+from ..models.meeting import Meeting
+from ..models.meeting_participant import MeetingParticipant
 from ..models.timeslot import TimeSlot
 from ..database import db
-from ..exceptions import ResourceCreationError, UnexpectedError
+from ..exceptions import (
+    ResourceConflictError,
+    ResourceCreationError,
+    UnexpectedError)
+
+
+def _load_interval_index(meeting_id, start_time, end_time, exclude_id=None):
+    '''
+    Index the timeslots of a meeting overlapping a period by their bounds.
+
+    The range query is served by the (meeting_id, start_time) index, so
+    only the timeslots around the period are read.
+
+    Args:
+        meeting_id (int): The ID of the meeting.
+        start_time (datetime): The start of the period.
+        end_time (datetime): The end of the period.
+        exclude_id (int, optional): The ID of a timeslot to leave out.
 
+    Returns:
+        IntervalIndex: The index, keyed by timeslot ID.
+    '''
+    query = select(TimeSlot.start_time, TimeSlot.end_time, TimeSlot.id).where(
+        TimeSlot.meeting_id == meeting_id,
+        TimeSlot.start_time < end_time,
+        TimeSlot.end_time > start_time)
+    if exclude_id is not None:
+        query = query.where(TimeSlot.id != exclude_id)
+    return IntervalIndex(db.session.execute(query))
+
+
+def _find_duplicate(meeting_id, start_time, end_time):
+    '''
+    Find the timeslot of a meeting with exactly the given bounds.
+
+    Returns:
+        int: The ID of the timeslot, or None.
+    '''
+    return db.session.scalar(select(TimeSlot.id).where(
+        TimeSlot.meeting_id == meeting_id,
+        TimeSlot.start_time == start_time,
+        TimeSlot.end_time == end_time))
 
 
-def create_timeslot(user_id, meeting_id, start_time, end_time):
+def create_timeslot(user_id, meeting_id, start_time, end_time, merge=False):
     '''
     Create a new timeslot for a specific meeting with given
     start_time and end_time.
@@ -29,40 +82,212 @@ def create_timeslot(user_id, meeting_id, start_time, end_time):
                         the timeslot is created.
         start_time (datetime or str): The start time of the timeslot in ISO 8601 format or as a datetime object.
         end_time (datetime or str): The end time of the timeslot in ISO 8601 format or as a datetime object.
+        merge (bool): Whether to return the existing timeslot, marked as
+                        `merged`, when the meeting already has one with the
+                        same bounds, instead of raising.
 
     Returns:
-        The created TimeSlot object.
+        The created TimeSlot object, with the IDs of the timeslots it
+        overlaps in its `overlaps` attribute.
 
     Raises:
         ValueError: If the timeslot is invalid.
+        ResourceConflictError: If the meeting already has a timeslot with
+                        the same bounds and merge is False.
         ResourceCreationError: If there is a problem creating the timeslot.
         UnexpectedError: If an unexpected error occurs during timeslot creation.
     '''
     try:
         if not is_valid_time_slot(start_time, end_time):
             raise ValueError('Invalid time slot')
+        start_time, end_time = isoparse(start_time), isoparse(end_time)
+
+        index = _load_interval_index(meeting_id, start_time, end_time)
+        existing_id = index.find(start_time, end_time)
+        if existing_id is not None:
+            if not merge:
+                raise ResourceConflictError(
+                    existing_id, 'Duplicate time slot', existing_id=existing_id)
+            timeslot = db.session.get(TimeSlot, existing_id)
+            timeslot.merged = True
+            timeslot.overlaps = [timeslot_id for timeslot_id
+                                 in index.overlapping(start_time, end_time)
+                                 if timeslot_id != existing_id]
+            return timeslot
 
         timeslot = TimeSlot(
             user_id=user_id,
             meeting_id=meeting_id,
-            start_time=isoparse(start_time),
-            end_time=isoparse(end_time))
+            start_time=start_time,
+            end_time=end_time)
+        timeslot.overlaps = index.overlapping(start_time, end_time)
         db.session.add(timeslot)
+        participant_service.add_participant(
+            user_id, meeting_id, MeetingParticipant.ROLE_SUGGESTER)
+        db.session.flush()
+        change_service.record_change(
+            meeting_id, 'timeslot_added', timeslot.to_dict(include_votes=False))
         db.session.commit()
         return timeslot
     except IntegrityError as error:
         db.session.rollback()
+        # a concurrent request created the same timeslot since the check
+        existing_id = _find_duplicate(meeting_id, start_time, end_time)
+        if existing_id is not None:
+            raise ResourceConflictError(
+                existing_id, 'Duplicate time slot', existing_id=existing_id) from error
         current_app.logger.error(f"TimeSlot creation failed: {error}")
         raise ResourceCreationError("TimeSlot creation failed") from error
     except ValueError as error:
         db.session.rollback()
         current_app.logger.error(f"Invalid time slot: {error}")
         raise ResourceCreationError("Invalid time slot") from error
+    except ResourceConflictError:
+        db.session.rollback()
+        raise
     except Exception as error:
         db.session.rollback()
         current_app.logger.error(f"Unexpected error: {error}")
         raise UnexpectedError(error, "Unexpected error occurred in create_timeslot") from error
 
+def create_timeslots(user_id, meeting_id, time_slots, commit=True, merge=False):
+    '''
+    Create several timeslots for a specific meeting at once.
+
+    Every slot is validated and checked for duplicates, against the
+    meeting's timeslots and the other slots of the batch, before
+    anything is written; then all of them are inserted with a single
+    multi-row INSERT. Either all the timeslots are created or none is.
+
+    Args:
+        user_id (int): The ID of the user creating the timeslots.
+        meeting_id (int): The ID of the meeting for which
+                        the timeslots are created.
+        time_slots (list): A list of dictionaries with `startTime` and
+                        `endTime` keys in ISO 8601 format.
+        commit (bool): Whether to commit the transaction. Callers that
+                        create the timeslots as part of a larger unit of
+                        work pass False and commit themselves.
+        merge (bool): Whether to merge duplicate slots into the timeslot
+                        with the same bounds instead of raising.
+
+    Returns:
+        A list of the TimeSlot objects, in the order of `time_slots`,
+        with the IDs of the timeslots they overlap in their `overlaps`
+        attribute; or None if the meeting does not exist.
+
+    Raises:
+        ResourceConflictError: If a slot duplicates another one and
+                        merge is False.
+        ResourceCreationError: If any of the timeslots is invalid or
+                        there is a problem creating them.
+        UnexpectedError: If an unexpected error occurs during creation.
+    '''
+    try:
+        if db.session.get(Meeting, meeting_id) is None:
+            return None
+
+        parsed_slots = []
+        for index, slot in enumerate(time_slots):
+            try:
+                start_time = isoparse(slot['startTime'])
+                end_time = isoparse(slot['endTime'])
+            except (KeyError, TypeError, ValueError) as error:
+                raise ValueError(f'Malformed time slot at index {index}') from error
+            if not is_valid_time_slot(start_time, end_time):
+                raise ValueError(f'Invalid time slot at index {index}')
+            parsed_slots.append((start_time, end_time))
+
+        # each slot resolves to the ID of an existing timeslot it merges
+        # into, or to the position of the row that creates it; the index
+        # covers the span of the batch, and then holds the new rows too
+        index = IntervalIndex()
+        if parsed_slots:
+            index = _load_interval_index(
+                meeting_id,
+                min(start_time for start_time, _ in parsed_slots),
+                max(end_time for _, end_time in parsed_slots))
+        rows, targets = [], []
+        for position, (start_time, end_time) in enumerate(parsed_slots):
+            target = index.find(start_time, end_time)
+            if target is None:
+                target = ('row', len(rows))
+                index.add(start_time, end_time, target)
+                rows.append({'user_id': user_id,
+                             'meeting_id': meeting_id,
+                             'start_time': start_time,
+                             'end_time': end_time})
+            elif not merge:
+                existing_id = target if isinstance(target, int) else None
+                raise ResourceConflictError(
+                    position, 'Duplicate time slot at index',
+                    existing_id=existing_id)
+            targets.append(target)
+
+        timeslots = []
+        if rows:
+            if db.session.get_bind().dialect.insert_returning:
+                timeslot_ids = db.session.scalars(
+                    insert(TimeSlot).values(rows).returning(TimeSlot.id)).all()
+                timeslots = TimeSlot.query.filter(
+                    TimeSlot.id.in_(timeslot_ids)).order_by(TimeSlot.id).all()
+            else:
+                # Without RETURNING the generated IDs can only be
+                # fetched row by row, which the unit of work does for us
+                timeslots = [TimeSlot(**row) for row in rows]
+                db.session.add_all(timeslots)
+            participant_service.add_participant(
+                user_id, meeting_id, MeetingParticipant.ROLE_SUGGESTER)
+            change_service.record_changes(meeting_id, [
+                ('timeslot_added', timeslot.to_dict(include_votes=False))
+                for timeslot in timeslots
+            ])
+
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+
+        def timeslot_id(target):
+            return timeslots[target[1]].id if isinstance(target, tuple) else target
+
+        results = []
+        for target in targets:
+            if isinstance(target, tuple):
+                timeslot = timeslots[target[1]]
+            else:
+                timeslot = db.session.get(TimeSlot, target)
+                timeslot.merged = True
+            timeslot.overlaps = [
+                timeslot_id(other) for other
+                in index.overlapping(timeslot.start_time, timeslot.end_time)
+                if other != target]
+            results.append(timeslot)
+        return results
+    except IntegrityError as error:
+        db.session.rollback()
+        # a concurrent request created one of the timeslots since the check
+        for position, (start_time, end_time) in enumerate(parsed_slots):
+            existing_id = _find_duplicate(meeting_id, start_time, end_time)
+            if existing_id is not None:
+                raise ResourceConflictError(
+                    position, 'Duplicate time slot at index',
+                    existing_id=existing_id) from error
+        current_app.logger.error(f"TimeSlot creation failed: {error}")
+        raise ResourceCreationError("TimeSlot creation failed") from error
+    except ValueError as error:
+        db.session.rollback()
+        current_app.logger.error(f"Invalid time slot: {error}")
+        raise ResourceCreationError(error, "Invalid time slot") from error
+    except ResourceConflictError:
+        db.session.rollback()
+        raise
+    except Exception as error:
+        db.session.rollback()
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error, "Unexpected error occurred in create_timeslots") from error
+
+
 def update_timeslot(user_id, timeslot_id, meeting_id=None, start_time=None, end_time=None):
     '''
     Update an existing timeslot with given meeting_id and/or start_time
@@ -78,9 +303,13 @@ def update_timeslot(user_id, timeslot_id, meeting_id=None, start_time=None, end_
                                         Defaults to None.
 
     Returns:
-        The updated TimeSlot object or None if the timeslot does not exist.
+        The updated TimeSlot object, with the IDs of the timeslots it
+        overlaps in its `overlaps` attribute, or None if the timeslot
+        does not exist.
 
     Raises:
+        ResourceConflictError: If another timeslot of the meeting has
+                        the new bounds.
         Exception: If there is a problem updating the timeslot.
     '''
     try:
@@ -102,14 +331,38 @@ def update_timeslot(user_id, timeslot_id, meeting_id=None, start_time=None, end_
         else:
             new_end_time = timeslot.end_time
 
-        if not is_valid_time_slot(start_time, end_time):
+        if not is_valid_time_slot(new_start_time, new_end_time):
             raise ValueError('Invalid time slot')
 
+        index = _load_interval_index(timeslot.meeting_id, new_start_time,
+                                     new_end_time, exclude_id=timeslot.id)
+        existing_id = index.find(new_start_time, new_end_time)
+        if existing_id is not None:
+            raise ResourceConflictError(
+                existing_id, 'Duplicate time slot', existing_id=existing_id)
+        timeslot.overlaps = index.overlapping(new_start_time, new_end_time)
+
         timeslot.start_time = new_start_time
         timeslot.end_time = new_end_time
 
+        db.session.flush()
+        change_service.record_change(
+            timeslot.meeting_id, 'timeslot_updated',
+            timeslot.to_dict(include_votes=False))
         db.session.commit()
         return timeslot
+    except IntegrityError as error:
+        db.session.rollback()
+        existing_id = _find_duplicate(meeting_id, new_start_time, new_end_time)
+        if existing_id is None:
+            current_app.logger.error(f"Unexpected error: {error}")
+            raise UnexpectedError(error,
+                "Unexpected error occurred in update_timeslot") from error
+        raise ResourceConflictError(
+            existing_id, 'Duplicate time slot', existing_id=existing_id) from error
+    except ResourceConflictError:
+        db.session.rollback()
+        raise
     except Exception as error:
         db.session.rollback()
         current_app.logger.error(f"Unexpected error: {error}")
@@ -137,7 +390,15 @@ def delete_timeslot(user_id, timeslot_id):
         if timeslot and timeslot.user_id != user_id:
             return 'Unauthorized'
 
+        meeting_id = timeslot.meeting_id
+        affected_users = {timeslot.user_id}
+        affected_users.update(vote.user_id for vote in timeslot.votes)
+
         db.session.delete(timeslot)
+        for affected_user_id in affected_users:
+            participant_service.sync_participant(affected_user_id, meeting_id)
+        change_service.record_change(
+            meeting_id, 'timeslot_deleted', {'id': timeslot_id})
         db.session.commit()
         return True
     except Exception as error:
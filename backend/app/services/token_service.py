@@ -0,0 +1,241 @@
+'''
+This module provides services for issuing, rotating and revoking the
+tokens of a User.
+
+Every login or registration issues a short-lived access token and a
+long-lived refresh token. A refresh token can be exchanged once for a
+new pair, which costs a signature check and an indexed update instead
+of a password hash. Presenting a refresh token that was already
+exchanged revokes every refresh token of the user, since one of the
+two parties holding it is not the user.
+
+Browsers cannot send an Authorization header when they open an event
+stream, so a user may get an events token instead: a short-lived token
+passed in the query string, accepted by the event stream of a single
+meeting and by no other route.
+
+Functions:
+    issue_tokens: Issue an access and a refresh token to a user.
+    issue_events_token: Issue a token opening the event stream of a meeting.
+    read_events_token: Read the user an events token was issued to.
+    is_bearer_token: Tell whether a token may be sent as a bearer token.
+    refresh_tokens: Exchange a refresh token for a new pair of tokens.
+    revoke_token: Revoke a refresh token.
+    purge_expired_tokens: Delete the refresh tokens that have expired.
+'''
+
+from datetime import datetime, timedelta
+from uuid import uuid4
+from flask import current_app
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from sqlalchemy import delete, select, update
+from ..models.refresh_token import RefreshToken
+from ..database import db
+from ..exceptions import UnexpectedError
+
+# The claim of an events token holding the ID of its meeting
+EVENTS_CLAIM = 'events'
+
+
+def _refresh_token_lifetime():
+    lifetime = current_app.config['JWT_REFRESH_TOKEN_EXPIRES']
+    if isinstance(lifetime, int):
+        lifetime = timedelta(seconds=lifetime)
+    return lifetime
+
+
+def issue_tokens(user_id, commit=True):
+    '''
+    Issue an access token and a refresh token to a user.
+
+    Args:
+        user_id (int): The ID of the user.
+        commit (bool): Whether to commit the transaction. Callers that
+                        issue the tokens as part of a larger unit of
+                        work pass False and commit themselves.
+
+    Returns:
+        dict: The `token` and `refresh_token` of the user.
+    '''
+    try:
+        jti = str(uuid4())
+        db.session.add(RefreshToken(
+            jti=jti,
+            user_id=user_id,
+            expires_at=datetime.utcnow() + _refresh_token_lifetime()))
+        if commit:
+            db.session.commit()
+        return {
+            'token': create_access_token(identity=user_id),
+            'refresh_token': create_refresh_token(
+                identity=user_id, additional_claims={'jti': jti}),
+        }
+    except Exception as error:
+        db.session.rollback()
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in issue_tokens") from error
+
+
+def issue_events_token(user_id, meeting_id):
+    '''
+    Issue a token opening the event stream of a meeting, valid for
+    EVENTS_TOKEN_EXPIRES seconds.
+
+    Args:
+        user_id (int): The ID of the user.
+        meeting_id (int): The ID of the meeting.
+
+    Returns:
+        str: The token.
+    '''
+    return create_access_token(
+        identity=user_id, additional_claims={EVENTS_CLAIM: meeting_id},
+        expires_delta=timedelta(seconds=current_app.config['EVENTS_TOKEN_EXPIRES']))
+
+
+def read_events_token(token, meeting_id):
+    '''
+    Read the user an events token was issued to.
+
+    Args:
+        token (str): The token from the query string.
+        meeting_id (int): The ID of the meeting whose events are asked for.
+
+    Returns:
+        The ID of the user, or None if the token is invalid, expired or
+        issued for another meeting.
+    '''
+    try:
+        claims = decode_token(token)
+    except (JWTExtendedException, PyJWTError):
+        return None
+    if claims.get(EVENTS_CLAIM) != meeting_id:
+        return None
+    return claims.get(current_app.config['JWT_IDENTITY_CLAIM'])
+
+
+def is_bearer_token(jwt_header, jwt_data):  # pylint: disable=unused-argument
+    '''
+    Tell whether a token may be sent as a bearer token, which events
+    tokens may not. Registered as the JWT manager's token verification
+    callback.
+
+    Args:
+        jwt_header (dict): The header of the token.
+        jwt_data (dict): The claims of the token.
+
+    Returns:
+        bool: Whether the token is not an events token.
+    '''
+    return EVENTS_CLAIM not in jwt_data
+
+
+def refresh_tokens(user_id, jti):
+    '''
+    Exchange a refresh token for a new access token and refresh token.
+
+    The presented token is revoked with a single conditional UPDATE, so
+    it can be exchanged only once even under concurrent requests.
+
+    Args:
+        user_id (int): The ID of the user the token was issued to.
+        jti (str): The unique identifier of the presented token.
+
+    Returns:
+        dict: The new `token` and `refresh_token`, or None if the
+        presented token is unknown, expired or revoked.
+    '''
+    try:
+        now = datetime.utcnow()
+        result = db.session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.jti == jti,
+                   RefreshToken.user_id == user_id,
+                   RefreshToken.revoked_at.is_(None),
+                   RefreshToken.expires_at > now)
+            .values(revoked_at=now)
+            .execution_options(synchronize_session=False))
+        if result.rowcount != 1:
+            reused = db.session.scalar(
+                select(RefreshToken.id).where(
+                    RefreshToken.jti == jti,
+                    RefreshToken.revoked_at.is_not(None)))
+            if reused is not None:
+                current_app.logger.warning(
+                    f"Refresh token reused for user {user_id}, revoking all")
+                _revoke_user_tokens(user_id, now)
+            db.session.commit()
+            return None
+
+        tokens = issue_tokens(user_id, commit=False)
+        db.session.commit()
+        return tokens
+    except UnexpectedError:
+        raise
+    except Exception as error:
+        db.session.rollback()
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in refresh_tokens") from error
+
+
+def revoke_token(user_id, jti):
+    '''
+    Revoke a refresh token, e.g. when the user logs out.
+
+    Args:
+        user_id (int): The ID of the user the token was issued to.
+        jti (str): The unique identifier of the token.
+
+    Returns:
+        bool: Whether a valid token was revoked.
+    '''
+    try:
+        result = db.session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.jti == jti,
+                   RefreshToken.user_id == user_id,
+                   RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow())
+            .execution_options(synchronize_session=False))
+        db.session.commit()
+        return result.rowcount == 1
+    except Exception as error:
+        db.session.rollback()
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in revoke_token") from error
+
+
+def purge_expired_tokens():
+    '''
+    Delete the refresh tokens that have expired. Revoked tokens are
+    kept until they expire so that their reuse can be detected.
+
+    Returns:
+        int: The number of deleted tokens.
+    '''
+    try:
+        result = db.session.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.expires_at <= datetime.utcnow())
+            .execution_options(synchronize_session=False))
+        db.session.commit()
+        return result.rowcount
+    except Exception as error:
+        db.session.rollback()
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in purge_expired_tokens") from error
+
+
+def _revoke_user_tokens(user_id, now):
+    db.session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id,
+               RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+        .execution_options(synchronize_session=False))
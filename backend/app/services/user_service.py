@@ -4,30 +4,54 @@ This module provides services for registering and logging in a User.
 Functions:
     register_user: Register a new user.
     login_user: Log in a user.
+    get_busy_intervals: Fetch the times a user is committed to.
 '''
 
-from datetime import timedelta
-from flask_jwt_extended import create_access_token
-from ..exceptions import UnexpectedError
+from flask import current_app
+from sqlalchemy import select, union
+from sqlalchemy.orm import selectinload
+from . import token_service
+from ..exceptions import ServiceUnavailableError, UnexpectedError
+from ..intervals import merge_intervals
+from ..models.meeting import Meeting
+from ..models.timeslot import TimeSlot
 from ..models.user import User
+from ..models.vote import Vote
 from ..database import db
+from ..replica import reads_from_replica
 
 
-def register_user(email, password):
+def _user_query(include_meetings):
+    '''
+    Build the query loading a user, with their meetings, timeslots and
+    votes loaded in one batched query per level when they are included.
+    '''
+    query = select(User)
+    if include_meetings:
+        query = query.options(
+            selectinload(User.meetings)
+            .selectinload(Meeting.timeslots)
+            .selectinload(TimeSlot.votes))
+    return query
+
+
+def register_user(email, password, include_meetings=False):
     '''
     Register a new user with given email and password.
 
     If the user already exists, an error message will be returned.
     Otherwise, the new user is added to the database,
-    and an access token is returned for the user.
+    and an access token and a refresh token are returned for the user.
 
     Args:
         email (str): The email of the user to register.
         password (str): The password of the user to register.
+        include_meetings (bool): Whether to embed the user's meetings
+                                in the returned user.
 
     Returns:
-        dict: A dictionary with the access token for the registered user,
-        or an error message.
+        dict: A dictionary with a summary of the registered user and
+        their tokens, or an error message.
 
     Raises:
         Exception: If there is a problem registering the user.
@@ -41,35 +65,103 @@ def register_user(email, password):
         new_user.set_password(password)
 
         db.session.add(new_user)
+        db.session.flush()
+        tokens = token_service.issue_tokens(new_user.id, commit=False)
+        user = new_user.to_dict(include_meetings=include_meetings)
         db.session.commit()
 
-        access_token = create_access_token(
-            identity=new_user.id, expires_delta=timedelta(minutes=30))
-        return {'user': new_user.to_dict(), 'token': access_token}, 201
+        return {'user': user, **tokens}, 201
 
+    except ServiceUnavailableError:
+        db.session.rollback()
+        raise
     except Exception as error:
         db.session.rollback()
-        raise UnexpectedError(error, 'Registration failed')
+        raise UnexpectedError(error, 'Registration failed') from error
 
 
-def login_user(email, password):
+def login_user(email, password, include_meetings=False):
     '''
     Log in a user with given email and password.
 
     If the credentials are invalid, an error message will be returned.
-    Otherwise, an access token is returned for the user.
+    Otherwise, an access token and a refresh token are returned for the
+    user, and the password is hashed again if its hash predates the
+    configured cost parameters.
 
     Args:
         email (str): The email of the user to log in.
         password (str): The password of the user to log in.
+        include_meetings (bool): Whether to embed the user's meetings
+                                in the returned user.
 
     Returns:
-        dict: A dictionary with the access token for the user,
+        dict: A dictionary with a summary of the user and their tokens,
         or an error message.
+
+    Raises:
+        ServiceUnavailableError: If the password hasher is saturated.
+        UnexpectedError: If the tokens cannot be issued.
     '''
-    user = User.query.filter_by(email=email).first()
+    user = db.session.scalar(
+        _user_query(include_meetings).where(User.email == email))
     if not user or not user.check_password(password):
         return {'error': 'Invalid email or password'}, 401
+    # serialized before the commits below expire the loaded meetings
+    user_payload = user.to_dict(include_meetings=include_meetings)
+
+    if user.password_needs_rehash():
+        try:
+            user.set_password(password)
+            db.session.commit()
+        except ServiceUnavailableError:
+            # the old hash is still valid; try again on the next login
+            db.session.rollback()
+
+    tokens = token_service.issue_tokens(user.id)
+    return {'user': user_payload, **tokens}, 200
 
-    access_token = create_access_token(identity=user.id)
-    return {'user': user.to_dict(), 'token': access_token}, 200
+
+@reads_from_replica
+def get_busy_intervals(user_id, start, end):
+    '''
+    Fetch the times a user is committed to, across all their meetings.
+
+    The timeslots of the meetings the user created, the timeslots they
+    suggested and the timeslots they voted for are fetched with a range
+    query on their start and end times, then merged into disjoint
+    intervals. No meeting is loaded.
+
+    Args:
+        user_id (int): The ID of the user.
+        start (datetime): The start of the period to look at.
+        end (datetime): The end of the period to look at.
+
+    Returns:
+        list: The disjoint (start_time, end_time) tuples, in order.
+    '''
+    try:
+        def in_range(query):
+            return query.where(TimeSlot.start_time < end,
+                               TimeSlot.end_time > start)
+
+        created = in_range(
+            select(TimeSlot.start_time, TimeSlot.end_time)
+            .join(Meeting, Meeting.id == TimeSlot.meeting_id)
+            .where(Meeting.user_id == user_id))
+        suggested = in_range(
+            select(TimeSlot.start_time, TimeSlot.end_time)
+            .where(TimeSlot.user_id == user_id))
+        voted = in_range(
+            select(TimeSlot.start_time, TimeSlot.end_time)
+            .join(Vote, Vote.timeslot_id == TimeSlot.id)
+            .where(Vote.user_id == user_id))
+
+        rows = db.session.execute(
+            union(created, suggested, voted).order_by('start_time'))
+        return merge_intervals(
+            (max(row.start_time, start), min(row.end_time, end)) for row in rows)
+    except Exception as error:
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in get_busy_intervals") from error
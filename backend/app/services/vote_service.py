@@ -1,18 +1,109 @@
 '''
-This module provides services for creating and deleting a Vote.
+This module provides services for creating, deleting and counting votes.
 
 Functions:
     create_vote: Creates a new vote.
     delete_vote: Deletes an existing vote.
+    set_vote: Idempotently sets whether a user votes for a timeslot.
+    apply_ballot: Adds and removes several votes in one transaction.
+    user_vote_ids_query: Builds the query of a user's votes in a meeting.
+    group_vote_ids: Keys the vote IDs of that query by timeslot ID.
+    get_user_vote_ids: Fetches the IDs of the votes a user cast in a meeting.
+    get_tally: Counts the votes of every timeslot of a meeting.
+    reconcile_vote_counts: Recomputes the vote counters of all timeslots.
 '''
 
+from importlib import import_module
 from flask import current_app
+from sqlalchemy import delete, func, insert, select, update
 from sqlalchemy.exc import IntegrityError
+from . import change_service, participant_service
+from ..models.meeting import Meeting
+from ..models.meeting_participant import MeetingParticipant
+from ..models.timeslot import TimeSlot
 from ..models.vote import Vote
 from ..database import db
+from ..replica import reads_from_replica
+from ..sqlite import serialized_write
 from ..exceptions import ResourceCreationError, UnexpectedError
 
 
+def _adjust_vote_counts(timeslot_ids, delta):
+    '''
+    Atomically add `delta` to the vote counter of the given timeslots.
+
+    The increment is done by the database, so concurrent votes
+    never overwrite each other's updates.
+    '''
+    db.session.execute(
+        update(TimeSlot)
+        .where(TimeSlot.id.in_(timeslot_ids))
+        .values(vote_count=TimeSlot.vote_count + delta)
+        .execution_options(synchronize_session=False))
+
+
+def _insert_votes(user_id, timeslot_ids):
+    '''
+    Insert a user's votes for the given timeslots, skipping the ones
+    that already exist.
+
+    Duplicates are resolved by the (user_id, timeslot_id) unique
+    constraint, so retried and concurrent requests never fail:
+    - SQLite and PostgreSQL run INSERT ... ON CONFLICT DO NOTHING
+      RETURNING, which hands back the inserted rows only.
+    - MySQL has no RETURNING. The existing votes are read first, the
+      missing ones written with INSERT IGNORE, and read back. A vote
+      cast concurrently in between is skipped by the insert, and not read
+      back as it is outside the transaction's REPEATABLE READ snapshot.
+    - Other databases insert the missing votes in a savepoint, and read
+      the existing votes again if a concurrent request won the race.
+
+    Returns:
+        list: The newly created Vote objects.
+    '''
+    rows = [{'user_id': user_id, 'timeslot_id': timeslot_id}
+            for timeslot_id in timeslot_ids]
+    if not rows:
+        return []
+
+    dialect = db.session.get_bind().dialect
+    if dialect.name in ('sqlite', 'postgresql'):
+        # the dialect's module is already loaded by its engine
+        dialect_insert = import_module(f'sqlalchemy.dialects.{dialect.name}').insert
+        statement = dialect_insert(Vote).values(rows).on_conflict_do_nothing(
+            index_elements=['user_id', 'timeslot_id'])
+        if dialect.insert_returning:
+            return list(db.session.scalars(statement.returning(Vote)))
+
+    def missing_rows():
+        existing = set(db.session.scalars(
+            select(Vote.timeslot_id).where(Vote.user_id == user_id,
+                                           Vote.timeslot_id.in_(timeslot_ids))))
+        return [row for row in rows if row['timeslot_id'] not in existing]
+
+    rows = missing_rows()
+    if not rows:
+        return []
+
+    if dialect.name == 'mysql':
+        db.session.execute(insert(Vote).values(rows).prefix_with('IGNORE'))
+        return list(db.session.scalars(
+            select(Vote).where(Vote.user_id == user_id,
+                               Vote.timeslot_id.in_(row['timeslot_id'] for row in rows))))
+
+    try:
+        with db.session.begin_nested():
+            votes = [Vote(**row) for row in rows]
+            db.session.add_all(votes)
+    except IntegrityError:
+        # a concurrent request cast some of the votes since the read
+        votes = [Vote(**row) for row in missing_rows()]
+        db.session.add_all(votes)
+        db.session.flush()
+    return votes
+
+
+@serialized_write
 def create_vote(user_id, timeslot_id):
     '''
     Create a new vote.
@@ -24,22 +115,45 @@ def create_vote(user_id, timeslot_id):
         timeslot_id (int): The ID of the timeslot for which
                         the vote is being cast.
 
+    Creating a vote is idempotent: if the user already voted for the
+    timeslot, the existing vote is returned and nothing is written.
+
     Returns:
-        Vote: The created Vote object.
+        Vote: The created or existing Vote object.
 
     Raises:
-        Exception: If there is a problem creating the vote.
+        ResourceCreationError: If the timeslot does not exist or
+                        the vote could not be stored.
+        UnexpectedError: If an unexpected error occurs during vote creation.
+        ServiceUnavailableError: If the database writer is busy.
     '''
 
     try:
-        vote = Vote(timeslot_id=timeslot_id, user_id=user_id)
-        db.session.add(vote)
+        timeslot = db.session.get(TimeSlot, timeslot_id)
+        if timeslot is None:
+            raise ValueError('Timeslot not found')
+
+        inserted = _insert_votes(user_id, [timeslot_id])
+        if not inserted:
+            db.session.rollback()
+            return db.session.scalar(select(Vote).where(
+                Vote.user_id == user_id, Vote.timeslot_id == timeslot_id))
+
+        _adjust_vote_counts([timeslot_id], 1)
+        participant_service.add_participant(
+            user_id, timeslot.meeting_id, MeetingParticipant.ROLE_VOTER)
+        change_service.record_change(
+            timeslot.meeting_id, 'vote_added', inserted[0].to_dict())
         db.session.commit()
-        return vote
+        return inserted[0]
     except IntegrityError as error:
         db.session.rollback()
         current_app.logger.error(f"Vote creation failed: {error}")
         raise ResourceCreationError("Vote creation failed") from error
+    except ValueError as error:
+        db.session.rollback()
+        current_app.logger.error(f"Invalid vote: {error}")
+        raise ResourceCreationError("Invalid vote") from error
     except Exception as error:
         db.session.rollback()
         current_app.logger.error(f"Unexpected error: {error}")
@@ -47,6 +161,7 @@ def create_vote(user_id, timeslot_id):
             "Unexpected error occurred in create_vote") from error
 
 
+@serialized_write
 def delete_vote(user_id, vote_id):
     '''
     Delete a vote.
@@ -60,6 +175,7 @@ def delete_vote(user_id, vote_id):
 
     Raises:
         Exception: If there is a problem deleting the vote.
+        ServiceUnavailableError: If the database writer is busy.
     '''
     try:
         vote = db.session.get(Vote, vote_id)
@@ -68,7 +184,15 @@ def delete_vote(user_id, vote_id):
         if vote and vote.user_id != user_id:
             return 'Unauthorized'
 
+        timeslot = db.session.get(TimeSlot, vote.timeslot_id)
+        removed_vote = vote.to_dict()
         db.session.delete(vote)
+        _adjust_vote_counts([vote.timeslot_id], -1)
+        if timeslot is not None:
+            participant_service.sync_participant(
+                user_id, timeslot.meeting_id)
+            change_service.record_change(
+                timeslot.meeting_id, 'vote_removed', removed_vote)
         db.session.commit()
         return True
     except Exception as error:
@@ -76,3 +200,276 @@ def delete_vote(user_id, vote_id):
         current_app.logger.error(f"Unexpected error: {error}")
         raise UnexpectedError(error,
             "Unexpected error occurred in delete_vote") from error
+
+
+@serialized_write
+def set_vote(user_id, timeslot_id, voted):
+    '''
+    Set whether a user votes for a timeslot.
+
+    Both directions are idempotent, which makes this suitable for
+    PUT-style toggles that clients can safely retry.
+
+    Args:
+        user_id (int): The ID of the user.
+        timeslot_id (int): The ID of the timeslot.
+        voted (bool): Whether the user should have a vote for the timeslot.
+
+    Returns:
+        Vote: The user's vote for the timeslot, or None if they have none.
+
+    Raises:
+        ResourceCreationError: If the timeslot does not exist.
+        UnexpectedError: If an unexpected error occurs.
+        ServiceUnavailableError: If the database writer is busy.
+    '''
+    if voted:
+        return create_vote(user_id, timeslot_id)
+
+    try:
+        timeslot = db.session.get(TimeSlot, timeslot_id)
+        if timeslot is None:
+            raise ValueError('Timeslot not found')
+
+        vote = db.session.scalar(select(Vote).where(
+            Vote.user_id == user_id, Vote.timeslot_id == timeslot_id))
+        if vote is not None:
+            removed_vote = vote.to_dict()
+            db.session.delete(vote)
+            _adjust_vote_counts([timeslot_id], -1)
+            participant_service.sync_participant(user_id, timeslot.meeting_id)
+            change_service.record_change(
+                timeslot.meeting_id, 'vote_removed', removed_vote)
+        db.session.commit()
+        return None
+    except ValueError as error:
+        db.session.rollback()
+        current_app.logger.error(f"Invalid vote: {error}")
+        raise ResourceCreationError("Invalid vote") from error
+    except Exception as error:
+        db.session.rollback()
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in set_vote") from error
+
+
+@serialized_write
+def apply_ballot(user_id, meeting_id, add=(), remove=()):
+    '''
+    Add and remove several of a user's votes in a meeting at once.
+
+    All the changes are applied in a single transaction: the new votes
+    with one multi-row upsert, the withdrawn ones with one DELETE.
+    Voting again for a timeslot the user already voted for is a no-op.
+
+    Args:
+        user_id (int): The ID of the voting user.
+        meeting_id (int): The ID of the meeting.
+        add (iterable): The IDs of the timeslots to vote for.
+        remove (iterable): The IDs of the timeslots to withdraw votes from.
+
+    Returns:
+        list: The user's resulting votes in the meeting as Vote objects,
+        or None if the meeting does not exist.
+
+    Raises:
+        ResourceCreationError: If a timeslot does not belong to the meeting
+                        or appears in both lists.
+        UnexpectedError: If an unexpected error occurs.
+        ServiceUnavailableError: If the database writer is busy.
+    '''
+    try:
+        add, remove = set(add), set(remove)
+        if add & remove:
+            raise ValueError('A timeslot cannot be both added and removed')
+
+        if db.session.get(Meeting, meeting_id) is None:
+            return None
+
+        requested = add | remove
+        known = set(db.session.scalars(
+            select(TimeSlot.id).where(TimeSlot.meeting_id == meeting_id,
+                                      TimeSlot.id.in_(requested))))
+        if requested - known:
+            raise ValueError('Timeslots not found in meeting: '
+                             f'{sorted(requested - known)}')
+
+        added = _insert_votes(user_id, sorted(add))
+        if added:
+            _adjust_vote_counts([vote.timeslot_id for vote in added], 1)
+            participant_service.add_participant(
+                user_id, meeting_id, MeetingParticipant.ROLE_VOTER)
+
+        removed = list(db.session.scalars(
+            select(Vote).where(Vote.user_id == user_id,
+                               Vote.timeslot_id.in_(remove))))
+        if removed:
+            db.session.execute(
+                delete(Vote)
+                .where(Vote.id.in_([vote.id for vote in removed]))
+                .execution_options(synchronize_session=False))
+            _adjust_vote_counts([vote.timeslot_id for vote in removed], -1)
+            participant_service.sync_participant(user_id, meeting_id)
+
+        changes = [('vote_added', vote.to_dict()) for vote in added]
+        changes += [('vote_removed', vote.to_dict()) for vote in removed]
+        if changes:
+            change_service.record_changes(meeting_id, changes)
+        db.session.commit()
+
+        return Vote.query.join(TimeSlot, Vote.timeslot_id == TimeSlot.id).filter(
+            TimeSlot.meeting_id == meeting_id,
+            Vote.user_id == user_id).order_by(Vote.timeslot_id).all()
+    except IntegrityError as error:
+        db.session.rollback()
+        current_app.logger.error(f"Ballot update failed: {error}")
+        raise ResourceCreationError("Ballot update failed") from error
+    except ValueError as error:
+        db.session.rollback()
+        current_app.logger.error(f"Invalid ballot: {error}")
+        raise ResourceCreationError(error, "Invalid ballot") from error
+    except Exception as error:
+        db.session.rollback()
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in apply_ballot") from error
+
+
+@reads_from_replica
+def user_vote_ids_query(meeting_id, user_id):
+    '''
+    Build the query selecting the IDs and timeslot IDs of the votes a
+    user cast in a meeting.
+
+    Args:
+        meeting_id (int): The ID of the meeting.
+        user_id (int): The ID of the user.
+
+    Returns:
+        Select: The query.
+    '''
+    return (select(Vote.id, Vote.timeslot_id)
+            .join(TimeSlot, Vote.timeslot_id == TimeSlot.id)
+            .where(TimeSlot.meeting_id == meeting_id, Vote.user_id == user_id))
+
+
+def group_vote_ids(rows):
+    '''
+    Key the vote IDs selected by user_vote_ids_query by timeslot ID.
+
+    Args:
+        rows (iterable): The (vote ID, timeslot ID) rows.
+
+    Returns:
+        dict: The vote IDs keyed by timeslot ID.
+    '''
+    user_votes = {}
+    for vote_id, timeslot_id in rows:
+        user_votes.setdefault(timeslot_id, []).append(vote_id)
+    return user_votes
+
+
+def get_user_vote_ids(meeting_id, user_id):
+    '''
+    Fetch the IDs of the votes a user cast in a meeting.
+
+    Args:
+        meeting_id (int): The ID of the meeting.
+        user_id (int): The ID of the user.
+
+    Returns:
+        dict: The user's vote IDs keyed by timeslot ID.
+    '''
+    return group_vote_ids(
+        db.session.execute(user_vote_ids_query(meeting_id, user_id)))
+
+
+@reads_from_replica
+def get_tally(meeting_id, user_id):
+    '''
+    Count the votes of every timeslot of a meeting.
+
+    The counts come from a single GROUP BY aggregate; only the votes
+    cast by the given user are fetched individually.
+
+    Args:
+        meeting_id (int): The ID of the meeting.
+        user_id (int): The ID of the user whose own votes are reported.
+
+    Returns:
+        list: One dictionary per timeslot with its `timeslot_id`,
+        `vote_count` and the `my_vote_ids` of the user, or None if the
+        meeting does not exist.
+
+    Raises:
+        Exception: If there is a problem counting the votes.
+    '''
+    try:
+        if db.session.get(Meeting, meeting_id) is None:
+            return None
+
+        counts = db.session.execute(
+            select(TimeSlot.id, func.count(Vote.id))
+            .outerjoin(Vote, Vote.timeslot_id == TimeSlot.id)
+            .where(TimeSlot.meeting_id == meeting_id)
+            .group_by(TimeSlot.id)
+            .order_by(TimeSlot.id)).all()
+
+        my_votes = get_user_vote_ids(meeting_id, user_id)
+        return [
+            {'timeslot_id': timeslot_id,
+             'vote_count': vote_count,
+             'my_vote_ids': my_votes.get(timeslot_id, [])}
+            for timeslot_id, vote_count in counts
+        ]
+    except Exception as error:
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in get_tally") from error
+
+
+def reconcile_vote_counts():
+    '''
+    Recompute the vote counters of all timeslots from the votes table.
+
+    Only the timeslots whose counter drifted are updated, with one
+    correlated UPDATE, and their meetings are recorded as changed.
+
+    Returns:
+        int: The number of timeslots whose counter was corrected.
+
+    Raises:
+        Exception: If there is a problem recomputing the counters.
+    '''
+    try:
+        actual_count = (
+            select(func.count(Vote.id))
+            .where(Vote.timeslot_id == TimeSlot.id)
+            .correlate(TimeSlot)
+            .scalar_subquery())
+
+        drifted = db.session.execute(
+            select(TimeSlot.id, TimeSlot.meeting_id)
+            .where(TimeSlot.vote_count != actual_count)).all()
+        if not drifted:
+            return 0
+
+        db.session.execute(
+            update(TimeSlot)
+            .where(TimeSlot.id.in_([timeslot_id for timeslot_id, _ in drifted]))
+            .values(vote_count=actual_count)
+            .execution_options(synchronize_session=False))
+        drifted_per_meeting = {}
+        for timeslot_id, meeting_id in drifted:
+            drifted_per_meeting.setdefault(meeting_id, []).append(timeslot_id)
+        for meeting_id, timeslot_ids in drifted_per_meeting.items():
+            change_service.record_change(
+                meeting_id, 'vote_counts_reconciled',
+                {'timeslot_ids': timeslot_ids})
+        db.session.commit()
+        return len(drifted)
+    except Exception as error:
+        db.session.rollback()
+        current_app.logger.error(f"Unexpected error: {error}")
+        raise UnexpectedError(error,
+            "Unexpected error occurred in reconcile_vote_counts") from error
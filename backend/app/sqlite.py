@@ -0,0 +1,197 @@
+'''
+This module tunes the SQLite databases of the application for serving.
+
+Every connection to an SQLite file is set up with the pragmas of the
+configuration:
+- journal_mode=WAL lets readers go on while a write commits, instead
+  of blocking on the rollback journal.
+- synchronous=NORMAL syncs the write-ahead log at checkpoints rather than
+  at every commit; the database cannot be corrupted, but a power loss
+  may undo the last transactions.
+- cache_size and mmap_size keep the hot pages in memory.
+- busy_timeout makes a connection wait for the write lock instead of
+  failing right away with "database is locked".
+
+SQLite lets a single connection write at a time. Concurrent writers of
+the same process would all poll the file lock until one gets it, so
+the write services marked with `serialized_write` take an in-process
+lock first and reach the database one after the other. Writers waiting
+longer than the busy timeout are shed with ServiceUnavailableError.
+
+Classes:
+    SQLiteProfile: Applies the pragmas and serializes the writers.
+
+Functions:
+    serialized_write: Mark a service function as writing.
+
+Variables:
+    sqlite_profile: The application's SQLite profile.
+'''
+
+from functools import partial, wraps
+from threading import Lock, RLock
+from time import perf_counter
+from sqlalchemy import event
+from .database import db
+from .exceptions import ServiceUnavailableError
+
+
+def _is_sqlite_file(url):
+    '''Whether the URL points to an SQLite file rather than to memory.'''
+    return (url.get_backend_name() == 'sqlite'
+            and url.database not in (None, '', ':memory:'))
+
+
+def _apply_pragmas(pragmas, dbapi_connection, connection_record):  # pylint: disable=unused-argument
+    '''Set the pragmas on a new DBAPI connection.'''
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+class SQLiteProfile:
+    '''
+    Applies the configured pragmas to the SQLite engines and serializes
+    the writes of the process.
+
+    Attributes:
+        pragmas (list): The (name, value) pairs set on every connection.
+        serialize_writes (bool): Whether the writers queue on the
+                                 in-process lock.
+        write_timeout (float): How long, in seconds, a writer waits for
+                               its turn.
+    '''
+
+    def __init__(self):
+        self.pragmas = []
+        self.serialize_writes = False
+        self.write_timeout = 5.0
+        self._write_lock = RLock()
+        self._stats_lock = Lock()
+        self._writes = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+
+    def init_app(self, app):
+        '''
+        Set the pragmas up on the application's SQLite engines. Must be
+        called after the database is initialized and before it is
+        connected to.
+
+        Args:
+            app (flask.Flask): The application.
+        '''
+        busy_timeout = app.config.get('SQLITE_BUSY_TIMEOUT', 5000)
+        # the busy timeout comes first, so the others wait for the lock
+        self.pragmas = [
+            ('busy_timeout', busy_timeout),
+            ('journal_mode', app.config.get('SQLITE_JOURNAL_MODE', 'WAL')),
+            ('synchronous', app.config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+            # negative sizes are in kibibytes
+            ('cache_size', -app.config.get('SQLITE_CACHE_SIZE', 20000)),
+            ('mmap_size', app.config.get('SQLITE_MMAP_SIZE', 268435456)),
+        ]
+        self.write_timeout = busy_timeout / 1000
+
+        with app.app_context():
+            engines = db.engines
+        for engine in engines.values():
+            self.tune(engine)
+        self.serialize_writes = (app.config.get('SQLITE_SERIALIZE_WRITES', True)
+                                 and _is_sqlite_file(engines[None].url))
+
+    def tune(self, engine):
+        '''
+        Set the pragmas on the future connections of an engine, if it
+        connects to an SQLite file.
+
+        Args:
+            engine (sqlalchemy.engine.Engine): The engine.
+        '''
+        if _is_sqlite_file(engine.url):
+            event.listen(engine, 'connect', partial(_apply_pragmas, self.pragmas))
+
+    def acquire_write(self):
+        '''
+        Wait for the turn of the current thread to write. Does nothing
+        when the writes are not serialized.
+
+        Returns:
+            bool: Whether the write lock was taken, and must be released
+            with `release_write`.
+
+        Raises:
+            ServiceUnavailableError: If the turn did not come within the
+                                     write timeout.
+        '''
+        if not self.serialize_writes:
+            return False
+        start = perf_counter()
+        if not self._write_lock.acquire(timeout=self.write_timeout):
+            with self._stats_lock:
+                self._timeouts += 1
+            raise ServiceUnavailableError(message='Database writer is busy')
+        wait = perf_counter() - start
+        with self._stats_lock:
+            self._writes += 1
+            self._wait_time += wait
+            self._max_wait = max(self._max_wait, wait)
+        return True
+
+    def release_write(self):
+        '''
+        Let the next writer go.
+        '''
+        self._write_lock.release()
+
+    def stats(self):
+        '''
+        Report the writes serialized so far.
+
+        Returns:
+            dict: Whether the writes are serialized, the writes and the
+            writers shed, and the time waited for a turn.
+        '''
+        with self._stats_lock:
+            return {
+                'serialize_writes': self.serialize_writes,
+                'writes': self._writes,
+                'timeouts': self._timeouts,
+                'wait_ms_avg': round(self._wait_time * 1000 / self._writes, 3)
+                               if self._writes else 0.0,
+                'wait_ms_max': round(self._max_wait * 1000, 3),
+            }
+
+
+sqlite_profile = SQLiteProfile()
+
+
+def serialized_write(function):
+    '''
+    Decorator marking a service function as writing, so that it waits
+    for the other writers of the process to finish when the database is
+    SQLite. Nested writes take their turn once.
+
+    Args:
+        function (function): The service function.
+
+    Returns:
+        function: The decorated function.
+
+    Raises:
+        ServiceUnavailableError: If the function could not get its turn
+                                 within the write timeout.
+    '''
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        acquired = sqlite_profile.acquire_write()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            if acquired:
+                sqlite_profile.release_write()
+    return wrapper
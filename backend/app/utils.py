@@ -3,9 +3,11 @@ This module defines utility functions for use in the app.
 '''
 from functools import wraps
 from datetime import datetime
+from hashlib import sha1
 from dateutil.parser import isoparse
-from flask import g
+from flask import Response, current_app, g, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from .services import token_service
 
 
 def jwt_required_and_user_loaded(function):
@@ -36,6 +38,65 @@ def jwt_required_and_user_loaded(function):
     return wrapper
 
 
+def events_token_or_jwt_required(function):
+    '''
+    Decorator for the event stream routes, which browsers open without
+    an Authorization header. A `token` query parameter must be an
+    events token issued for the route's meeting; without one, the
+    route requires a JWT like `jwt_required_and_user_loaded`.
+
+    Args:
+        function (function): The route to be decorated. It takes the
+                             `meeting_id` keyword argument.
+
+    Returns:
+        function: The decorated route.
+    '''
+    with_jwt = jwt_required_and_user_loaded(function)
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        token = request.args.get('token')
+        if token is None:
+            return with_jwt(*args, **kwargs)
+        g.user_id = token_service.read_events_token(token, kwargs['meeting_id'])
+        if g.user_id is None:
+            return {"msg": "Invalid events token"}, 401
+        return function(*args, **kwargs)
+    return wrapper
+
+
+def merge_requested():
+    '''
+    Whether the request asks for duplicate timeslots to be merged into
+    the existing ones (`?merge=true`) rather than rejected.
+    '''
+    return request.args.get('merge', 'false').lower() in ('true', '1')
+
+
+def shape_not_supported(function):
+    '''
+    Decorator for the GET routes whose payload cannot be shaped, as it
+    is computed rather than serialized from models. The `include` and
+    `fields` query parameters are answered with a 400 rather than
+    silently ignored.
+
+    Args:
+        function (function): The route to be decorated.
+
+    Returns:
+        function: The decorated route.
+    '''
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        unsupported = sorted({'include', 'fields'} & request.args.keys())
+        if unsupported:
+            return {'error': f"{' and '.join(unsupported)} not supported "
+                             'by this route'}, 400
+        return function(*args, **kwargs)
+    return wrapper
+
+
 def is_valid_time_slot(start_time, end_time):
     """
     Validate a time slot.
@@ -61,3 +122,94 @@ def is_valid_time_slot(start_time, end_time):
         end_time = isoparse(end_time)
 
     return (start_time < end_time) and (end_time > start_time > now)
+
+
+def stream_json_array(items, serialize):
+    """
+    Generate a JSON array chunk by chunk.
+
+    Each item is serialized and emitted on its own, so a response built
+    from this generator never holds the whole array in memory.
+
+    Args:
+        items (iterable): The items to serialize, possibly lazily loaded.
+        serialize (function): Converts an item into a JSON-serializable value.
+
+    Yields:
+        str: Consecutive fragments of the JSON document.
+    """
+    yield '['
+    for index, item in enumerate(items):
+        if index:
+            yield ','
+        yield current_app.json.dumps(serialize(item))
+    yield ']'
+
+
+def meeting_etag(meeting_id, version, variant):
+    """
+    Build the strong entity tag of a serialized meeting.
+
+    The tag only depends on the meeting's version counter, which every
+    write to the meeting, its timeslots or their votes bumps, so it can
+    be computed from a single indexed lookup.
+
+    Args:
+        meeting_id (int): The ID of the meeting.
+        version (int): The version of the meeting.
+        variant (str): Identifies the shape of the representation.
+
+    Returns:
+        str: The entity tag, unquoted.
+    """
+    return f'meeting-{meeting_id}-v{version}-{variant}'
+
+
+def meeting_list_etag(meeting_versions, variant):
+    """
+    Build the strong entity tag of a list of serialized meetings.
+
+    Args:
+        meeting_versions (list): The (meeting ID, version) tuples of the
+                                 listed meetings, in order.
+        variant (str): Identifies the shape of the representation.
+
+    Returns:
+        str: The entity tag, unquoted.
+    """
+    digest = sha1(variant.encode())
+    for meeting_id, version in meeting_versions:
+        digest.update(f',{meeting_id}:{version}'.encode())
+    return f'meetings-{digest.hexdigest()}'
+
+
+def not_modified(etag):
+    """
+    Answer a conditional GET whose If-None-Match matches an entity tag.
+
+    Args:
+        etag (str): The current entity tag of the resource, unquoted.
+
+    Returns:
+        flask.Response: An empty 304 response if the client's copy is
+        current, None otherwise.
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return with_etag(Response(status=304), etag)
+
+
+def with_etag(response, etag):
+    """
+    Tag a response and ask clients to revalidate it before reuse.
+
+    Args:
+        response (flask.Response): The response to tag.
+        etag (str): The entity tag of the response body, unquoted.
+
+    Returns:
+        flask.Response: The tagged response.
+    """
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
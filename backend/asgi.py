@@ -0,0 +1,20 @@
+'''
+This module is the asynchronous entry point of the application.
+
+It creates the ASGI application, which serves meeting reads and event
+streams from coroutines and every other request through the Flask
+application, with the configuration named by the APP_CONFIG environment
+variable ('production' by default). It requires the dependencies in
+`requirements-async.txt` and an ASGI server, e.g. Hypercorn, which
+Quart installs.
+
+Usage:
+    hypercorn asgi:app
+'''
+
+import os
+from app.aio import create_asgi_app #pylint: disable=import-error
+
+app = create_asgi_app(os.getenv('APP_CONFIG', 'production'))
+# ASGI application instance.
+# A call to create_asgi_app creates the Flask application instance too.
@@ -8,7 +8,34 @@ Environment Variables:
 - SECRET_KEY: The secret key for the application, used in session management and CSRF protection.
 - DATABASE_URL: The URL of the SQL database to use for the application.
 - JWT_SECRET_KEY: The secret key used for encoding and decoding JWT tokens.
+- JWT_ACCESS_TOKEN_EXPIRES: The lifetime of access tokens, in seconds.
+- JWT_REFRESH_TOKEN_EXPIRES: The lifetime of refresh tokens, in seconds.
 - SQLALCHEMY_TRACK_MODIFICATIONS: Flag to enable or disable SQLAlchemy event system. 
+- MEETINGS_MAX_PAGE_SIZE: The largest page size accepted by GET /api/meetings.
+- MAX_BATCH_SIZE: The largest number of items accepted by bulk endpoints.
+- MEETING_CACHE_SIZE: The number of serialized meetings kept in the in-process cache.
+- MEETING_CACHE_TTL: The number of seconds a cached meeting stays valid.
+- EVENTS_QUEUE_SIZE: The number of undelivered events buffered per event stream.
+- EVENTS_HEARTBEAT_INTERVAL: The number of seconds between keep-alives on idle event streams.
+- EVENTS_TOKEN_EXPIRES: The lifetime of the tokens opening a meeting's event stream, in seconds.
+- MEETING_CHANGES_RETENTION: The number of changes kept in each meeting's change log.
+- RECOMMENDATION_NUMPY_THRESHOLD: The number of intervals from which recommendations are computed with NumPy.
+- BUSY_MAX_RANGE_DAYS: The longest period, in days, accepted by GET /api/users/me/busy.
+- PASSWORD_HASH_METHOD: The werkzeug password hash method and cost, e.g. scrypt:32768:8:1.
+- PASSWORD_HASH_WORKERS: The number of password hashing processes, 0 to hash inline.
+- PASSWORD_HASH_QUEUE_SIZE: The number of hashes that may wait for a worker before requests get a 503.
+- PASSWORD_HASH_TIMEOUT: The number of seconds a request waits for its hash.
+- INTERNAL_STATS_TOKEN: The bearer token of GET /internal/stats, which is disabled when empty.
+- REPLICA_PIN_SECONDS: How long, in seconds, the reads of a client that wrote are served by the primary.
+- SQLITE_JOURNAL_MODE: The journal mode of SQLite databases, WAL by default.
+- SQLITE_SYNCHRONOUS: How often SQLite syncs to disk: NORMAL by default, FULL to survive power losses.
+- SQLITE_BUSY_TIMEOUT: How long, in milliseconds, an SQLite write waits for the database lock.
+- SQLITE_CACHE_SIZE: The page cache of each SQLite connection, in kibibytes.
+- SQLITE_MMAP_SIZE: The number of bytes of an SQLite database read through memory mapping.
+- SQLITE_SERIALIZE_WRITES: Whether the vote writes of a process to SQLite are serialized (1 or 0).
+- JSON_PROVIDER: The JSON encoder of the responses: orjson (falling back to json when it is not installed) or json.
+- DEV_SQLALCHEMY_REPLICA_URI / PROD_SQLALCHEMY_REPLICA_URI: The URL of the read replica, if any.
+- DEV_DB_* / PROD_DB_*: The connection pool settings, listed in engine_options.
 
 Note: It is recommended to set the environment variables for security reasons. 
 Default values should only be used for testing and development purposes.
@@ -16,9 +43,54 @@ Default values should only be used for testing and development purposes.
 
 import os
 from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
 
 load_dotenv()
 
+
+def engine_options(prefix, database_uri):
+    '''
+    Build the SQLAlchemy engine options of a database from the
+    environment variables starting with `prefix`:
+    - POOL_SIZE, MAX_OVERFLOW: The pooled and extra connections (5, 10).
+    - POOL_TIMEOUT, POOL_RECYCLE: The seconds to wait for a connection
+      and to keep one (30, 1800).
+    - POOL_PRE_PING: Whether to test connections before use, 1 or 0.
+    - STATEMENT_TIMEOUT: In milliseconds, 0 for none; PostgreSQL and
+      MySQL only.
+
+    Args:
+        prefix (str): The prefix of the variables, e.g. 'PROD_DB_'.
+        database_uri (str): The URL of the database.
+
+    Returns:
+        dict: The engine options.
+    '''
+    url = make_url(database_uri)
+    backend = url.get_backend_name()
+    if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+        # in-memory databases live in a single static connection
+        return {}
+
+    options = {
+        'pool_size': int(os.getenv(f'{prefix}POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv(f'{prefix}MAX_OVERFLOW', '10')),
+        'pool_timeout': float(os.getenv(f'{prefix}POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.getenv(f'{prefix}POOL_RECYCLE', '1800')),
+        # a file on the local disk cannot drop the connection
+        'pool_pre_ping': os.getenv(f'{prefix}POOL_PRE_PING',
+                                   '0' if backend == 'sqlite' else '1') == '1',
+    }
+    statement_timeout = int(os.getenv(f'{prefix}STATEMENT_TIMEOUT', '0'))
+    if statement_timeout and backend == 'postgresql':
+        options['connect_args'] = {
+            'options': f'-c statement_timeout={statement_timeout}'}
+    elif statement_timeout and backend == 'mysql':
+        options['connect_args'] = {
+            'init_command': f'SET SESSION max_execution_time={statement_timeout}'}
+    return options
+
+
 class Config:
     '''
     The Config class encapsulates the configuration parameters of the application.
@@ -27,13 +99,63 @@ class Config:
     - SECRET_KEY: The secret key for session management and CSRF protection.
     - SQLALCHEMY_DATABASE_URI: The URL of the SQL database to use for the application.
     - JWT_SECRET_KEY: The secret key used for encoding and decoding JWT tokens.
+    - JWT_ACCESS_TOKEN_EXPIRES: The lifetime of access tokens, in seconds.
+    - JWT_REFRESH_TOKEN_EXPIRES: The lifetime of refresh tokens, in seconds.
     - SQLALCHEMY_TRACK_MODIFICATIONS: Flag to enable or disable SQLAlchemy event system. 
+    - MEETINGS_MAX_PAGE_SIZE: The largest page size accepted by GET /api/meetings.
+    - MAX_BATCH_SIZE: The largest number of items accepted by bulk endpoints.
+    - MEETING_CACHE_SIZE: The number of serialized meetings kept in the in-process cache.
+    - MEETING_CACHE_TTL: The number of seconds a cached meeting stays valid.
+    - EVENTS_QUEUE_SIZE: The number of undelivered events buffered per event stream.
+    - EVENTS_HEARTBEAT_INTERVAL: The number of seconds between keep-alives on idle event streams.
+    - EVENTS_TOKEN_EXPIRES: The lifetime of the tokens opening a meeting's event stream, in seconds.
+    - MEETING_CHANGES_RETENTION: The number of changes kept in each meeting's change log.
+    - RECOMMENDATION_NUMPY_THRESHOLD: The number of intervals from which recommendations are computed with NumPy.
+    - BUSY_MAX_RANGE_DAYS: The longest period, in days, accepted by GET /api/users/me/busy.
+    - PASSWORD_HASH_METHOD: The werkzeug password hash method and cost, e.g. scrypt:32768:8:1.
+    - PASSWORD_HASH_WORKERS: The number of password hashing processes, 0 to hash inline.
+    - PASSWORD_HASH_QUEUE_SIZE: The number of hashes that may wait for a worker before requests get a 503.
+    - PASSWORD_HASH_TIMEOUT: The number of seconds a request waits for its hash.
+    - INTERNAL_STATS_TOKEN: The bearer token of GET /internal/stats, which is disabled when empty.
+    - REPLICA_PIN_SECONDS: How long, in seconds, the reads of a client that wrote are served by the primary.
+    - SQLITE_JOURNAL_MODE: The journal mode of SQLite databases, WAL by default.
+    - SQLITE_SYNCHRONOUS: How often SQLite syncs to disk: NORMAL by default, FULL to survive power losses.
+    - SQLITE_BUSY_TIMEOUT: How long, in milliseconds, an SQLite write waits for the database lock.
+    - SQLITE_CACHE_SIZE: The page cache of each SQLite connection, in kibibytes.
+    - SQLITE_MMAP_SIZE: The number of bytes of an SQLite database read through memory mapping.
+    - SQLITE_SERIALIZE_WRITES: Whether the vote writes of a process to SQLite are serialized (1 or 0).
+    - JSON_PROVIDER: The JSON encoder of the responses: orjson (falling back to json when it is not installed) or json.
     '''
     SECRET_KEY = os.getenv('SECRET_KEY', 'default-secret-key')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'default-jwt-secret-key')
     JWT_ALGORITHM=os.getenv('JWT_ALGORITHM')
+    JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', '1800'))
+    JWT_REFRESH_TOKEN_EXPIRES = int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES', '2592000'))
     CORS_HEADERS=os.getenv('CORS_HEADERS')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    MEETINGS_MAX_PAGE_SIZE = int(os.getenv('MEETINGS_MAX_PAGE_SIZE', '100'))
+    MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '100'))
+    MEETING_CACHE_SIZE = int(os.getenv('MEETING_CACHE_SIZE', '1024'))
+    MEETING_CACHE_TTL = float(os.getenv('MEETING_CACHE_TTL', '300'))
+    EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '100'))
+    EVENTS_HEARTBEAT_INTERVAL = float(os.getenv('EVENTS_HEARTBEAT_INTERVAL', '15'))
+    EVENTS_TOKEN_EXPIRES = int(os.getenv('EVENTS_TOKEN_EXPIRES', '60'))
+    MEETING_CHANGES_RETENTION = int(os.getenv('MEETING_CHANGES_RETENTION', '500'))
+    RECOMMENDATION_NUMPY_THRESHOLD = int(os.getenv('RECOMMENDATION_NUMPY_THRESHOLD', '1000'))
+    BUSY_MAX_RANGE_DAYS = int(os.getenv('BUSY_MAX_RANGE_DAYS', '366'))
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv('PASSWORD_HASH_QUEUE_SIZE', '16'))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+    INTERNAL_STATS_TOKEN = os.getenv('INTERNAL_STATS_TOKEN', '')
+    REPLICA_PIN_SECONDS = float(os.getenv('REPLICA_PIN_SECONDS', '5'))
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '20000'))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', '268435456'))
+    SQLITE_SERIALIZE_WRITES = os.getenv('SQLITE_SERIALIZE_WRITES', '1') == '1'
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson')
 
     raw_origins = os.getenv('ALLOWED_ORIGINS', '')
     ALLOWED_ORIGINS = raw_origins.split(',') if raw_origins else []
@@ -46,9 +168,16 @@ class DevelopmentConfig(Config):
         - DEVELOPMENT: Indicates app is in test mode.
         - SQLALCHEMY_DATABASE_URI: The URL of the SQL database to use
         for the application in development.
+        - SQLALCHEMY_ENGINE_OPTIONS: The connection pool settings of
+        the development database.
+        - SQLALCHEMY_BINDS: The read replica of the development
+        database, if any.
     '''
     DEVELOPMENT = True
     SQLALCHEMY_DATABASE_URI = os.getenv('DEV_SQLALCHEMY_DATABASE_URI', 'sqlite:///db.sqlite3')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options('DEV_DB_', SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_BINDS = ({'replica': os.getenv('DEV_SQLALCHEMY_REPLICA_URI')}
+                        if os.getenv('DEV_SQLALCHEMY_REPLICA_URI') else {})
 
 class ProductionConfig(Config):
     '''
@@ -59,6 +188,13 @@ class ProductionConfig(Config):
         PRODUCTION: Indicates app is in live mode.
         SQLALCHEMY_DATABASE_URI: The URL of the SQL database to use for
                                 the application in production.
+        SQLALCHEMY_ENGINE_OPTIONS: The connection pool settings of the
+                                production database.
+        SQLALCHEMY_BINDS: The read replica of the production database,
+                          if any.
     '''
     PRODUCTION = True
     SQLALCHEMY_DATABASE_URI = os.getenv('PROD_SQLALCHEMY_DATABASE_URI', 'sqlite:///db.sqlite3')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options('PROD_DB_', SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_BINDS = ({'replica': os.getenv('PROD_SQLALCHEMY_REPLICA_URI')}
+                        if os.getenv('PROD_SQLALCHEMY_REPLICA_URI') else {})
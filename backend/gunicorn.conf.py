@@ -0,0 +1,40 @@
+'''
+This module configures Gunicorn to serve `wsgi:app`.
+
+The application is loaded once in the master process and the workers
+are forked from it, so adding a worker costs a fork instead of a boot.
+Each worker drops the database connections inherited from the master.
+
+Every setting can be overridden with the environment variables below.
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
+'''
+
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+preload_app = True
+
+
+def post_fork(server, worker):  # pylint: disable=unused-argument
+    '''
+    Drop the pooled database connections inherited from the master
+    without closing them, since the master still owns them. The password
+    hashing pool needs no such care: it is only started on first use.
+
+    The application is the one Gunicorn preloaded, whichever module it
+    was loaded from.
+    '''
+    # pylint: disable=import-outside-toplevel,import-error
+    from app.database import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -3,17 +3,20 @@ This module is the entry point of the Flask application.
 
 It creates an instance of the application and runs it. 
 By default, the application will run in debug mode when run directly.
-When deployed in a production environment, the WSGI server will use the `app` object.
+When deployed in a production environment, the WSGI server uses the
+`app` object of the `wsgi` module instead.
 
 Usage:
     python3 main.py
 '''
 
+import os
 from app import create_app #pylint: disable=import-error
 
-app = create_app('development')
+app = create_app(os.getenv('APP_CONFIG', 'development'))
 # Flask application instance.
 # A call to create_app creates application instance from the app module.
+# The configuration is named by the APP_CONFIG environment variable.
 
 if __name__ == '__main__':
     # The application instance will be run directly if this script is executed as the main script.
@@ -0,0 +1,66 @@
+"""Add the meeting_participants membership index
+
+Creates the table when it is missing (databases booted with
+`db.create_all()` already have it) and backfills it from the
+meetings, timeslots and votes tables.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('meeting_participants'):
+        op.create_table(
+            'meeting_participants',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('meeting_id', sa.Integer(), nullable=False),
+            sa.Column('role', sa.String(length=16), nullable=False),
+            sa.Column('last_activity', sa.DateTime(timezone=True),
+                      server_default=sa.text('(CURRENT_TIMESTAMP)'),
+                      nullable=False),
+            sa.ForeignKeyConstraint(['meeting_id'], ['meetings.id'],
+                                    ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('user_id', 'meeting_id', 'role')
+        )
+        op.create_index('ix_meeting_participants_meeting_id',
+                        'meeting_participants', ['meeting_id'], unique=False)
+
+    op.execute('DELETE FROM meeting_participants')
+    op.execute(
+        "INSERT INTO meeting_participants "
+        "(user_id, meeting_id, role, last_activity) "
+        "SELECT user_id, id, 'creator', "
+        "COALESCE(created_at, CURRENT_TIMESTAMP) FROM meetings")
+    op.execute(
+        "INSERT INTO meeting_participants "
+        "(user_id, meeting_id, role, last_activity) "
+        "SELECT user_id, meeting_id, 'suggester', "
+        "COALESCE(MAX(created_at), CURRENT_TIMESTAMP) FROM timeslots "
+        "GROUP BY user_id, meeting_id")
+    op.execute(
+        "INSERT INTO meeting_participants "
+        "(user_id, meeting_id, role, last_activity) "
+        "SELECT votes.user_id, timeslots.meeting_id, 'voter', "
+        "COALESCE(MAX(votes.created_at), CURRENT_TIMESTAMP) FROM votes "
+        "JOIN timeslots ON timeslots.id = votes.timeslot_id "
+        "GROUP BY votes.user_id, timeslots.meeting_id")
+
+
+def downgrade():
+    op.drop_index('ix_meeting_participants_meeting_id',
+                  table_name='meeting_participants')
+    op.drop_table('meeting_participants')
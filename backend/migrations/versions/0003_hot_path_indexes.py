@@ -0,0 +1,36 @@
+"""Add indexes for the meeting, timeslot and vote lookups
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:20:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_meetings_user_id_created_at', 'meetings',
+                    ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_timeslots_meeting_id', 'timeslots',
+                    ['meeting_id'], unique=False)
+    op.create_index('ix_timeslots_user_id', 'timeslots',
+                    ['user_id'], unique=False)
+    op.create_index('ix_votes_timeslot_id', 'votes',
+                    ['timeslot_id'], unique=False)
+    op.create_index('ix_votes_user_id', 'votes',
+                    ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_votes_user_id', table_name='votes')
+    op.drop_index('ix_votes_timeslot_id', table_name='votes')
+    op.drop_index('ix_timeslots_user_id', table_name='timeslots')
+    op.drop_index('ix_timeslots_meeting_id', table_name='timeslots')
+    op.drop_index('ix_meetings_user_id_created_at', table_name='meetings')
@@ -0,0 +1,31 @@
+"""Add a denormalized vote counter to timeslots
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('timeslots', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('vote_count', sa.Integer(),
+                                      server_default='0', nullable=False))
+
+    op.execute(
+        'UPDATE timeslots SET vote_count = '
+        '(SELECT COUNT(*) FROM votes WHERE votes.timeslot_id = timeslots.id)')
+
+
+def downgrade():
+    with op.batch_alter_table('timeslots', schema=None) as batch_op:
+        batch_op.drop_column('vote_count')
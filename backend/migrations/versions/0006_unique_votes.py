@@ -0,0 +1,37 @@
+"""Make votes unique per user and timeslot
+
+Duplicate votes left by retried requests are removed, keeping the
+oldest one, and the timeslot vote counters are recomputed.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        'DELETE FROM votes WHERE id NOT IN ('
+        'SELECT id FROM (SELECT MIN(id) AS id FROM votes '
+        'GROUP BY user_id, timeslot_id) AS kept_votes)')
+    op.execute(
+        'UPDATE timeslots SET vote_count = '
+        '(SELECT COUNT(*) FROM votes WHERE votes.timeslot_id = timeslots.id)')
+
+    with op.batch_alter_table('votes', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_votes_user_id_timeslot_id',
+                                          ['user_id', 'timeslot_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('votes', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_votes_user_id_timeslot_id', type_='unique')
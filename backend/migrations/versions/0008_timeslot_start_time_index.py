@@ -0,0 +1,30 @@
+"""Index timeslots by meeting and start time
+
+The composite index serves the interval lookups done when timeslots
+are created or updated, and replaces the index on meeting_id alone.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_timeslots_meeting_id_start_time', 'timeslots',
+                    ['meeting_id', 'start_time'], unique=False)
+    op.drop_index('ix_timeslots_meeting_id', table_name='timeslots')
+
+
+def downgrade():
+    op.create_index('ix_timeslots_meeting_id', 'timeslots',
+                    ['meeting_id'], unique=False)
+    op.drop_index('ix_timeslots_meeting_id_start_time', table_name='timeslots')
@@ -0,0 +1,30 @@
+"""Index timeslots by suggesting user and start time
+
+The composite index serves the free/busy range queries and replaces
+the index on user_id alone.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_timeslots_user_id_start_time', 'timeslots',
+                    ['user_id', 'start_time'], unique=False)
+    op.drop_index('ix_timeslots_user_id', table_name='timeslots')
+
+
+def downgrade():
+    op.create_index('ix_timeslots_user_id', 'timeslots',
+                    ['user_id'], unique=False)
+    op.drop_index('ix_timeslots_user_id_start_time', table_name='timeslots')
@@ -0,0 +1,64 @@
+"""Make timeslot bounds unique per meeting
+
+Duplicate timeslots left by concurrent suggestions are merged into the
+oldest one: their votes move over, unless the voter already voted for
+it, and the timeslot vote counters are recomputed.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+timeslots = sa.table('timeslots', sa.column('id'), sa.column('meeting_id'),
+                     sa.column('start_time'), sa.column('end_time'),
+                     sa.column('vote_count'))
+votes = sa.table('votes', sa.column('id'), sa.column('user_id'),
+                 sa.column('timeslot_id'))
+
+
+def upgrade():
+    bind = op.get_bind()
+    bounds = (timeslots.c.meeting_id, timeslots.c.start_time, timeslots.c.end_time)
+    duplicated = bind.execute(
+        sa.select(*bounds).group_by(*bounds).having(sa.func.count() > 1)).all()
+
+    for meeting_id, start_time, end_time in duplicated:
+        kept_id, *duplicate_ids = bind.scalars(
+            sa.select(timeslots.c.id)
+            .where(timeslots.c.meeting_id == meeting_id,
+                   timeslots.c.start_time == start_time,
+                   timeslots.c.end_time == end_time)
+            .order_by(timeslots.c.id)).all()
+        voters = sa.select(votes.c.user_id).where(votes.c.timeslot_id == kept_id)
+        for duplicate_id in duplicate_ids:
+            bind.execute(votes.delete().where(
+                votes.c.timeslot_id == duplicate_id,
+                votes.c.user_id.in_(list(bind.scalars(voters)))))
+            bind.execute(votes.update()
+                         .where(votes.c.timeslot_id == duplicate_id)
+                         .values(timeslot_id=kept_id))
+            bind.execute(timeslots.delete().where(timeslots.c.id == duplicate_id))
+        bind.execute(timeslots.update().where(timeslots.c.id == kept_id).values(
+            vote_count=sa.select(sa.func.count()).select_from(votes)
+            .where(votes.c.timeslot_id == kept_id).scalar_subquery()))
+
+    with op.batch_alter_table('timeslots', schema=None) as batch_op:
+        batch_op.create_unique_constraint(
+            'uq_timeslots_meeting_id_start_time_end_time',
+            ['meeting_id', 'start_time', 'end_time'])
+
+
+def downgrade():
+    with op.batch_alter_table('timeslots', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_timeslots_meeting_id_start_time_end_time',
+                                 type_='unique')
@@ -0,0 +1,224 @@
+'''
+This module contains tests for the asynchronous (ASGI) application.
+'''
+
+from datetime import datetime, timedelta
+import asyncio
+import importlib.util
+import json
+import unittest
+
+# pylint: disable=import-error
+from app.database import db
+from app.services import (
+    token_service,
+    user_service,
+    meeting_service,
+    timeslot_service,
+    vote_service)
+
+ASYNC_DEPENDENCIES = ('quart', 'quart_cors', 'hypercorn', 'aiosqlite')
+MISSING_DEPENDENCIES = [name for name in ASYNC_DEPENDENCIES
+                        if importlib.util.find_spec(name) is None]
+
+START_TIME = (datetime.utcnow() + timedelta(days=1)).replace(microsecond=0)
+
+
+@unittest.skipIf(MISSING_DEPENDENCIES,
+                 f'Missing async dependencies: {MISSING_DEPENDENCIES}')
+class TestAsgi(unittest.TestCase):
+    '''
+    This class represents the test case for the ASGI application. It
+    sets up a user with a meeting, a timeslot and a vote through the
+    synchronous services, and reads them back through the async routes.
+    '''
+    def setUp(self):
+        '''
+        This method sets up the testing environment before each test.
+        '''
+        # pylint: disable=import-outside-toplevel
+        from app.aio import create_asgi_app
+
+        self.dispatcher = create_asgi_app('testing')
+        self.app = self.dispatcher.async_app
+        self.client = self.app.test_client()
+        self.app_context = self.dispatcher.flask_app.app_context()
+        self.app_context.push()
+
+        db.create_all()
+
+        user, _ = user_service.register_user('test@example.com', 'password123')
+        self.user_id = user['user']['id']
+        self.headers = {'Authorization': f"Bearer {user['token']}"}
+        self.meeting = meeting_service.create_meeting(
+            self.user_id, 'Test Meeting', 'This is a test meeting', [])
+        self.timeslot = timeslot_service.create_timeslot(
+            self.user_id, self.meeting.id, START_TIME.isoformat(),
+            (START_TIME + timedelta(hours=1)).isoformat())
+        self.vote_id = vote_service.create_vote(self.user_id, self.timeslot.id).id
+
+    def tearDown(self):
+        '''
+        This method tears down the testing environment after each test.
+        '''
+        asyncio.run(self._dispose())
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    async def _dispose(self):
+        # pylint: disable=import-outside-toplevel
+        from app.aio.database import async_db
+        await async_db.dispose()
+
+    def test_success_route_dispatch(self):
+        '''
+        Test that only the requests matching an async route are served
+        by the async application.
+        '''
+        # pylint: disable=protected-access
+        matches = self.dispatcher._matches
+        self.assertTrue(matches({'path': '/api/meetings/1', 'method': 'GET'}))
+        self.assertTrue(matches({'path': '/api/meetings/1/events', 'method': 'GET'}))
+        self.assertFalse(matches({'path': '/api/meetings/1', 'method': 'DELETE'}))
+        self.assertFalse(matches({'path': '/api/meetings', 'method': 'GET'}))
+
+    def test_success_get_meeting(self):
+        '''
+        Test that GET /api/meetings/<id> serves the meeting and answers
+        conditional requests like the synchronous route.
+        '''
+        async def fetch():
+            response = await self.client.get(
+                f'/api/meetings/{self.meeting.id}', headers=self.headers)
+            payload = await response.get_json()
+            revalidated = await self.client.get(
+                f'/api/meetings/{self.meeting.id}',
+                headers={**self.headers, 'If-None-Match': response.headers['ETag']})
+            return response, payload, revalidated
+
+        response, payload, revalidated = asyncio.run(fetch())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(payload['timeslots'][0]['votes'][0]['id'], self.vote_id)
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_success_get_meeting_sparse_fieldset(self):
+        '''
+        Test that GET /api/meetings/<id> honours include and fields like
+        the synchronous route.
+        '''
+        async def fetch():
+            response = await self.client.get(
+                f'/api/meetings/{self.meeting.id}'
+                '?include=timeslots&fields=title,timeslots.id',
+                headers=self.headers)
+            return await response.get_json()
+
+        self.assertEqual(asyncio.run(fetch()), {
+            'title': 'Test Meeting', 'timeslots': [{'id': self.timeslot.id}]})
+
+    def test_success_get_meeting_changes(self):
+        '''
+        Test that GET /api/meetings/<id>/changes returns the change log.
+        '''
+        async def fetch():
+            response = await self.client.get(
+                f'/api/meetings/{self.meeting.id}/changes?since=1',
+                headers=self.headers)
+            return response, await response.get_json()
+
+        response, payload = asyncio.run(fetch())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([change['type'] for change in payload['changes']],
+                         ['timeslot_added', 'vote_added'])
+
+    def test_success_stream_meeting_events(self):
+        '''
+        Test that GET /api/meetings/<id>/events streams the changes
+        committed by the synchronous services.
+        '''
+        async def follow():
+            async with self.client.request(
+                    f'/api/meetings/{self.meeting.id}/events',
+                    headers=self.headers) as connection:
+                await connection.send_complete()
+                retry = await connection.receive()
+                await asyncio.to_thread(
+                    self._in_flask_context, vote_service.set_vote,
+                    self.user_id, self.timeslot.id, False)
+                frame = await connection.receive()
+                await connection.disconnect()
+            return retry, frame.decode()
+
+        retry, frame = asyncio.run(follow())
+
+        self.assertTrue(retry.startswith(b'retry:'))
+        self.assertIn('event: vote_removed', frame)
+        data = json.loads(frame.split('data: ', 1)[1])
+        self.assertEqual(data['data']['id'], self.vote_id)
+
+    def test_success_stream_meeting_events_with_events_token(self):
+        '''
+        Test that GET /api/meetings/<id>/events opens with an events
+        token in the query string, which no other async route accepts.
+        '''
+        token = token_service.issue_events_token(self.user_id, self.meeting.id)
+
+        async def fetch():
+            async with self.client.request(
+                    f'/api/meetings/{self.meeting.id}/events?token={token}'
+                    ) as connection:
+                await connection.send_complete()
+                retry = await connection.receive()
+                await connection.disconnect()
+            as_bearer = await self.client.get(
+                f'/api/meetings/{self.meeting.id}',
+                headers={'Authorization': f'Bearer {token}'})
+            return retry, as_bearer.status_code
+
+        retry, as_bearer = asyncio.run(fetch())
+
+        self.assertTrue(retry.startswith(b'retry:'))
+        self.assertEqual(as_bearer, 401)
+
+    def _in_flask_context(self, function, *args):
+        with self.dispatcher.flask_app.app_context():
+            return function(*args)
+
+    def test_failure_missing_token(self):
+        '''
+        Test that the async routes require an access token.
+        '''
+        async def fetch():
+            return await self.client.get(f'/api/meetings/{self.meeting.id}')
+
+        self.assertEqual(asyncio.run(fetch()).status_code, 401)
+
+    def test_failure_shape_not_supported(self):
+        '''
+        Test that the change log and event stream reject the include
+        and fields parameters like the synchronous routes.
+        '''
+        async def fetch(path):
+            response = await self.client.get(
+                f'/api/meetings/{self.meeting.id}/{path}', headers=self.headers)
+            return response.status_code
+
+        self.assertEqual(asyncio.run(fetch('changes?since=0&fields=type')), 400)
+        self.assertEqual(asyncio.run(fetch('events?include=timeslots')), 400)
+
+    def test_failure_meeting_not_found(self):
+        '''
+        Test that the async routes answer 404 for unknown meetings.
+        '''
+        async def fetch():
+            return await self.client.get('/api/meetings/999/changes?since=0',
+                                         headers=self.headers)
+
+        self.assertEqual(asyncio.run(fetch()).status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
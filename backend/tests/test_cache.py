@@ -0,0 +1,51 @@
+'''
+This module contains unit tests for the in-process payload cache.
+'''
+
+import unittest
+
+# pylint: disable=import-error
+from app.cache import VersionedLRUCache
+
+
+class TestVersionedLRUCache(unittest.TestCase):
+    '''
+    This class represents the test case for the VersionedLRUCache class.
+    '''
+    def test_success_hit_on_matching_version(self):
+        '''
+        Test that an entry is returned for its own version only.
+        '''
+        cache = VersionedLRUCache(maxsize=2, ttl=60)
+        cache.set(1, 3, {'id': 1})
+
+        self.assertEqual(cache.get(1, 3), {'id': 1})
+        self.assertIsNone(cache.get(1, 4))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_success_evicts_least_recently_used(self):
+        '''
+        Test that the least recently used entry is evicted when full.
+        '''
+        cache = VersionedLRUCache(maxsize=2, ttl=60)
+        cache.set(1, 1, 'first')
+        cache.set(2, 1, 'second')
+        cache.get(1, 1)
+        cache.set(3, 1, 'third')
+
+        self.assertIsNone(cache.get(2, 1))
+        self.assertEqual(cache.get(1, 1), 'first')
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_fail_get_expired_entry(self):
+        '''
+        Test that entries older than the TTL are not returned.
+        '''
+        cache = VersionedLRUCache(maxsize=2, ttl=0)
+        cache.set(1, 1, 'stale')
+        self.assertIsNone(cache.get(1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+'''
+This module contains unit tests for the in-process event broker.
+'''
+
+import asyncio
+from threading import Thread
+import unittest
+
+# pylint: disable=import-error
+from app.events import EventBroker
+
+
+class TestEventBroker(unittest.TestCase):
+    '''
+    This class represents the test case for the EventBroker class.
+    '''
+    def test_success_publish_to_meeting_subscribers(self):
+        '''
+        Test that events only reach the subscribers of their meeting.
+        '''
+        broker = EventBroker(queue_size=10)
+        first = broker.subscribe(1)
+        second = broker.subscribe(2)
+
+        broker.publish(1, {'type': 'vote_added'})
+
+        self.assertEqual(first.get(timeout=0), {'type': 'vote_added'})
+        self.assertIsNone(second.get(timeout=0))
+        self.assertEqual(broker.stats()['published'], 1)
+
+    def test_success_overflow_marks_subscription(self):
+        '''
+        Test that a subscriber that falls behind is marked as overflowed
+        without blocking the publisher.
+        '''
+        broker = EventBroker(queue_size=2)
+        subscription = broker.subscribe(1)
+
+        for version in range(3):
+            broker.publish(1, {'version': version})
+
+        self.assertTrue(subscription.overflowed)
+        self.assertEqual(broker.stats()['dropped'], 1)
+
+    def test_success_unsubscribe(self):
+        '''
+        Test that cancelled subscriptions stop receiving events.
+        '''
+        broker = EventBroker()
+        subscription = broker.subscribe(1)
+        broker.unsubscribe(subscription)
+
+        broker.publish(1, {'type': 'vote_added'})
+
+        self.assertIsNone(subscription.get(timeout=0))
+        self.assertEqual(broker.stats()['subscribers'], 0)
+
+    def test_success_publish_to_async_subscriber(self):
+        '''
+        Test that events published from another thread reach a
+        subscriber awaiting them on an event loop, and that it overflows
+        like a synchronous one.
+        '''
+        broker = EventBroker(queue_size=2)
+
+        async def consume():
+            subscription = broker.subscribe(1, loop=asyncio.get_running_loop())
+            publisher = Thread(target=broker.publish,
+                               args=(1, {'type': 'vote_added'}))
+            publisher.start()
+            publisher.join()
+            event = await subscription.get(timeout=1)
+            timed_out = await subscription.get(timeout=0)
+            for version in range(3):
+                broker.publish(1, {'version': version})
+            return event, timed_out, subscription.overflowed
+
+        event, timed_out, overflowed = asyncio.run(consume())
+
+        self.assertEqual(event, {'type': 'vote_added'})
+        self.assertIsNone(timed_out)
+        self.assertTrue(overflowed)
+        self.assertEqual(broker.stats()['dropped'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+'''
+This module contains unit tests for the password hasher.
+'''
+
+from threading import Thread
+import os
+import signal
+import time
+import unittest
+
+# pylint: disable=import-error
+from app.exceptions import ServiceUnavailableError
+from app.hashing import PasswordHasher
+
+
+class TestPasswordHasher(unittest.TestCase):
+    '''
+    This class represents the test case for the PasswordHasher class.
+    '''
+    def test_success_hash_and_verify_inline(self):
+        '''
+        Test that hashes use the configured parameters and verify.
+        '''
+        hasher = PasswordHasher(method='scrypt:16384:8:1', workers=0)
+        password_hash = hasher.hash('password123')
+
+        self.assertTrue(password_hash.startswith('scrypt:16384:8:1$'))
+        self.assertTrue(hasher.verify(password_hash, 'password123'))
+        self.assertFalse(hasher.verify(password_hash, 'wrong'))
+        self.assertFalse(hasher.needs_rehash(password_hash))
+        self.assertTrue(PasswordHasher(method='scrypt:32768:8:1')
+                        .needs_rehash(password_hash))
+
+    def test_success_needs_rehash_fills_in_default_parameters(self):
+        '''
+        Test that a method without cost parameters stands for werkzeug's
+        defaults when comparing it with a stored hash.
+        '''
+        password_hash = PasswordHasher(method='scrypt', workers=0).hash('password123')
+
+        self.assertTrue(password_hash.startswith('scrypt:32768:8:1$'))
+        self.assertFalse(PasswordHasher(method='scrypt').needs_rehash(password_hash))
+        self.assertFalse(PasswordHasher(method='scrypt:32768:8:1')
+                         .needs_rehash(password_hash))
+        self.assertTrue(PasswordHasher(method='scrypt:16384').needs_rehash(password_hash))
+        self.assertTrue(PasswordHasher(method='pbkdf2').needs_rehash(password_hash))
+
+    def test_success_hash_in_pool(self):
+        '''
+        Test that hashes made by the worker processes verify.
+        '''
+        hasher = PasswordHasher(method='scrypt:16384:8:1', workers=1)
+        try:
+            self.assertTrue(hasher.verify(hasher.hash('password123'), 'password123'))
+        finally:
+            hasher.shutdown()
+
+    def test_fail_reject_when_saturated(self):
+        '''
+        Test that hashes are rejected right away once every worker is
+        busy and the queue is full.
+        '''
+        hasher = PasswordHasher(method='scrypt:131072:8:1', workers=1, queue_size=0)
+        busy = Thread(target=hasher.hash, args=('password123',))
+        busy.start()
+        try:
+            time.sleep(0.05)
+            with self.assertRaises(ServiceUnavailableError):
+                hasher.hash('password123')
+            self.assertEqual(hasher.stats()['rejected'], 1)
+        finally:
+            busy.join()
+            hasher.shutdown()
+
+    def test_fail_restart_broken_pool(self):
+        '''
+        Test that a hash whose worker is killed fails with
+        ServiceUnavailableError, and that the next hash starts a new
+        pool.
+        '''
+        hasher = PasswordHasher(method='scrypt:131072:8:1', workers=1)
+        errors = []
+
+        def hash_password():
+            try:
+                hasher.hash('password123')
+            except ServiceUnavailableError as error:
+                errors.append(error)
+
+        busy = Thread(target=hash_password)
+        busy.start()
+        try:
+            time.sleep(0.5)
+            pool = hasher._get_pool()  # pylint: disable=protected-access
+            for pid in list(pool._processes):  # pylint: disable=protected-access
+                os.kill(pid, signal.SIGKILL)
+            busy.join()
+            self.assertEqual(len(errors), 1)
+
+            hasher.method = 'scrypt:16384:8:1'
+            self.assertTrue(hasher.verify(hasher.hash('password123'), 'password123'))
+            self.assertIsNot(hasher._get_pool(), pool)  # pylint: disable=protected-access
+        finally:
+            busy.join()
+            hasher.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
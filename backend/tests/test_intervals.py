@@ -0,0 +1,67 @@
+'''
+This module contains unit tests for the interval index.
+'''
+
+import unittest
+
+# pylint: disable=import-error
+from app.intervals import IntervalIndex, merge_intervals
+
+
+class TestIntervalIndex(unittest.TestCase):
+    '''
+    This class represents the test case for the IntervalIndex class.
+    '''
+    def test_success_find_duplicate(self):
+        '''
+        Test that only intervals with the exact same bounds are found.
+        '''
+        index = IntervalIndex([(0, 10, 'a'), (0, 5, 'b'), (3, 10, 'c')])
+
+        self.assertEqual(index.find(0, 10), 'a')
+        self.assertEqual(index.find(3, 10), 'c')
+        self.assertIsNone(index.find(0, 7))
+
+    def test_success_overlapping(self):
+        '''
+        Test that overlapping intervals are found, including long ones
+        starting well before the query, and that touching ones are not.
+        '''
+        index = IntervalIndex([(0, 100, 'long'), (40, 45, 'inside'),
+                               (50, 60, 'touching'), (70, 80, 'after')])
+
+        self.assertEqual(index.overlapping(45, 50), ['long'])
+        self.assertEqual(index.overlapping(42, 55), ['long', 'inside', 'touching'])
+        self.assertEqual(index.overlapping(100, 110), [])
+
+    def test_success_add(self):
+        '''
+        Test that added intervals are found by both lookups.
+        '''
+        index = IntervalIndex()
+        self.assertEqual(index.overlapping(0, 10), [])
+
+        index.add(5, 15, 'a')
+        index.add(0, 3, 'b')
+
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.find(0, 3), 'b')
+        self.assertEqual(index.overlapping(2, 6), ['b', 'a'])
+
+
+class TestMergeIntervals(unittest.TestCase):
+    '''
+    This class represents the test case for the merge_intervals function.
+    '''
+    def test_success_merge(self):
+        '''
+        Test that overlapping, nested and touching intervals are merged.
+        '''
+        self.assertEqual(
+            merge_intervals([(0, 5), (1, 3), (5, 8), (10, 12), (11, 15)]),
+            [(0, 8), (10, 15)])
+        self.assertEqual(merge_intervals([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+'''
+This module contains unit tests for the JSON providers.
+'''
+
+from datetime import date, datetime, timezone
+import unittest
+from flask import Flask
+
+# pylint: disable=import-error
+from app import json_provider
+from app.json_provider import json_provider_class
+
+PAYLOAD = {
+    'start_time': datetime(2030, 1, 2, 9, 30),
+    'created_at': datetime(2030, 1, 1, 12, 0, 0, 500, tzinfo=timezone.utc),
+    'day': date(2030, 1, 2),
+    'votes': {3: [7, 8]},
+}
+
+EXPECTED = {
+    'start_time': '2030-01-02T09:30:00',
+    'created_at': '2030-01-01T12:00:00.000500+00:00',
+    'day': '2030-01-02',
+    'votes': {'3': [7, 8]},
+}
+
+
+class TestJSONProvider(unittest.TestCase):
+    '''
+    This class represents the test case for the JSON providers.
+    '''
+    def _provider(self, name):
+        return json_provider_class(name)(Flask(__name__))
+
+    def test_success_json_writes_iso_datetimes(self):
+        '''
+        Test that the json module provider writes dates and times in
+        ISO 8601.
+        '''
+        provider = self._provider('json')
+
+        self.assertNotIsInstance(provider, json_provider.OrjsonMixin)
+        self.assertEqual(provider.loads(provider.dumps(PAYLOAD)), EXPECTED)
+
+    @unittest.skipIf(json_provider.orjson is None, 'orjson is not installed')
+    def test_success_orjson_matches_json(self):
+        '''
+        Test that the orjson provider writes the same documents as the
+        json module provider.
+        '''
+        provider = self._provider('orjson')
+
+        self.assertIsInstance(provider, json_provider.OrjsonMixin)
+        self.assertEqual(provider.dumps(PAYLOAD),
+                         self._provider('json').dumps(PAYLOAD, separators=(',', ':')))
+        self.assertEqual(provider.loads(provider.dumps(PAYLOAD)), EXPECTED)
+
+    def test_fail_unknown_provider(self):
+        '''
+        Test that an unknown provider name is rejected.
+        '''
+        with self.assertRaises(ValueError):
+            json_provider_class('simplejson')
+
+
+if __name__ == '__main__':
+    unittest.main()
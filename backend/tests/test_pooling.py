@@ -0,0 +1,65 @@
+'''
+This module contains unit tests for the pool monitor.
+'''
+
+import unittest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import NullPool, QueuePool
+
+# pylint: disable=import-error
+from app.pooling import PoolMonitor
+
+
+class TestPoolMonitor(unittest.TestCase):
+    '''
+    This class represents the test case for the PoolMonitor class.
+    '''
+    def test_success_pool_events_are_counted(self):
+        '''
+        Test that the checkouts of a pool of any class are counted, with
+        the connections in use and their peak.
+        '''
+        engine = create_engine('sqlite://', poolclass=NullPool)
+        monitor = PoolMonitor()
+        monitor.instrument(engine)
+        monitor.instrument(engine)
+        stats = monitor._stats[engine]  # pylint: disable=protected-access
+
+        with engine.connect() as first, engine.connect() as second:
+            first.execute(text('SELECT 1'))
+            second.execute(text('SELECT 1'))
+            self.assertEqual(stats.report()['checked_out'], 2)
+
+        report = stats.report()
+        self.assertEqual(report['connects'], 2)
+        self.assertEqual(report['checkouts'], 2)
+        self.assertEqual(report['checked_out'], 0)
+        self.assertEqual(report['max_checked_out'], 2)
+        self.assertGreater(report['hold_ms_max'], 0)
+        self.assertEqual(report['timeouts'], 0)
+
+    def test_fail_checkout_timeouts_are_counted(self):
+        '''
+        Test that checkouts waiting for a connection are timed, and
+        those that time out counted, across the pools the engine
+        recreates.
+        '''
+        engine = create_engine('sqlite://', poolclass=QueuePool, pool_size=1,
+                               max_overflow=0, pool_timeout=0.05)
+        monitor = PoolMonitor()
+        monitor.instrument(engine)
+        stats = monitor._stats[engine]  # pylint: disable=protected-access
+        engine.dispose()
+
+        with engine.connect():
+            with self.assertRaises(exc.TimeoutError):
+                engine.connect()
+
+        report = stats.report()
+        self.assertEqual(report['timeouts'], 1)
+        self.assertGreaterEqual(report['wait_ms_max'], 50)
+        self.assertGreater(report['wait_ms_avg'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+'''
+This module contains unit tests for the sweep-line recommendation engine.
+'''
+
+import random
+import unittest
+
+# pylint: disable=import-error
+from app.services import recommendation_service
+from app.services.recommendation_service import sweep
+
+
+class TestSweep(unittest.TestCase):
+    '''
+    This class represents the test case for the sweep function.
+    '''
+    def test_success_ranks_shared_sub_interval_first(self):
+        '''
+        Test that the sub-interval shared by two suggestions, where
+        every voter is available, ranks first.
+        '''
+        slots = [(0, 10), (5, 15)]
+        availability = [(0, 10), (5, 15)]
+
+        windows = sweep(slots, availability, limit=3)
+
+        self.assertEqual(windows, [(5, 10, 2, 2), (0, 5, 1, 1), (10, 15, 1, 1)])
+
+    def test_success_merges_adjacent_windows(self):
+        '''
+        Test that touching windows with the same levels are merged, and
+        that short windows are filtered out.
+        '''
+        windows = sweep([(0, 5), (5, 10), (20, 22)], [], limit=5, min_duration=3)
+
+        self.assertEqual(windows, [(0, 10, 0, 1)])
+
+    def test_success_empty(self):
+        '''
+        Test that a meeting without timeslots has no windows.
+        '''
+        self.assertEqual(sweep([], [], limit=5), [])
+
+    @unittest.skipIf(recommendation_service.numpy_module() is None,
+                     'NumPy is not installed')
+    def test_success_numpy_matches_python(self):
+        '''
+        Test that the NumPy sweep ranks the same windows as the pure
+        Python one.
+        '''
+        generator = random.Random(7)
+        slots = []
+        for _ in range(500):
+            start = generator.randrange(0, 10000)
+            slots.append((start, start + generator.randrange(1, 300)))
+        availability = generator.sample(slots, 200)
+
+        self.assertEqual(sweep(slots, availability, limit=20, min_duration=10),
+                         sweep(slots, availability, limit=20, min_duration=10,
+                               use_numpy=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+'''
+This module contains tests for routing reads to a read replica.
+'''
+
+from time import time
+import unittest
+from unittest import mock
+
+# pylint: disable=import-error
+import config
+from app import create_app
+from app.database import db
+from app.services import meeting_service, user_service
+
+
+class TestReplica(unittest.TestCase):
+    '''
+    This class represents the test case for the read replica routing.
+    The primary and the replica are two SQLite files; nothing copies
+    the primary to the replica, so a read finds the data it wrote only
+    when it is served by the primary.
+    '''
+    def setUp(self):
+        '''
+        This method sets up the testing environment before each test.
+        '''
+        with mock.patch.object(config.DevelopmentConfig, 'SQLALCHEMY_BINDS',
+                               {'replica': 'sqlite:///replica.sqlite3'}):
+            self.app = create_app('testing')
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        db.create_all()
+        db.metadata.create_all(db.engines['replica'])
+
+        user, _ = user_service.register_user('test@example.com', 'password123')
+        self.user_id = user['user']['id']
+        self.headers = {'Authorization': f"Bearer {user['token']}"}
+        self.meeting_id = meeting_service.create_meeting(
+            self.user_id, 'Test Meeting', 'This is a test meeting', []).id
+        # start afresh, like the next request would
+        db.session.remove()
+
+    def tearDown(self):
+        '''
+        This method tears down the testing environment after each test.
+        '''
+        db.session.remove()
+        db.metadata.drop_all(db.engines['replica'])
+        db.drop_all()
+        # the bind's metadata is registered on the shared extension
+        db.metadatas.pop('replica')
+        self.app_context.pop()
+
+    def test_success_reads_go_to_replica(self):
+        '''
+        Test that read-only service calls are served by the replica,
+        until the session writes to the primary.
+        '''
+        self.assertIsNone(meeting_service.get_meeting_version(self.meeting_id))
+
+        meeting_service.update_meeting(self.user_id, self.meeting_id,
+                                       'Renamed', None)
+        self.assertEqual(meeting_service.get_meeting_version(self.meeting_id), 2)
+
+    def test_success_recent_writer_reads_from_primary(self):
+        '''
+        Test that a client presenting a recent last write token is
+        served by the primary, and an old token by the replica.
+        '''
+        url = f'/api/meetings/{self.meeting_id}'
+        response = self.client.get(url, headers={
+            **self.headers, 'X-Last-Write': str(time() - 60)})
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get(url, headers={
+            **self.headers, 'X-Last-Write': str(time())})
+        self.assertEqual(response.status_code, 200)
+
+    def test_success_write_issues_last_write_token(self):
+        '''
+        Test that a write response carries the last write token and
+        that the cookie pins the following reads to the primary.
+        '''
+        response = self.client.post('/api/meetings', headers=self.headers, json={
+            'title': 'Another Meeting', 'description': 'Another test meeting'})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('X-Last-Write', response.headers)
+        db.session.remove()
+
+        response = self.client.get(f"/api/meetings/{response.get_json()['id']}",
+                                   headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Last-Write', response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
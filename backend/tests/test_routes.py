@@ -0,0 +1,503 @@
+'''
+This module contains tests for the HTTP routes of the application.
+'''
+
+from datetime import datetime, timedelta
+import json
+import unittest
+from unittest import mock
+from sqlalchemy import event
+
+# pylint: disable=import-error
+from app import create_app
+from app.database import db
+from app.exceptions import ServiceUnavailableError
+from app.hashing import password_hasher
+from app.services import (
+    user_service,
+    meeting_service,
+    timeslot_service,
+    vote_service)
+
+
+FUTURE_START_TIME = (datetime.utcnow() + timedelta(days=1)
+                     ).replace(microsecond=0).isoformat()
+FUTURE_END_TIME = (datetime.utcnow() + timedelta(days=1, hours=2)
+                   ).replace(microsecond=0).isoformat()
+
+
+class TestRoutes(unittest.TestCase):
+    '''
+    This class represents the test case for the routes of the application.
+    It sets up a user with a meeting, a timeslot and a vote, and
+    calls the routes through the Flask test client.
+    '''
+    def setUp(self):
+        '''
+        This method sets up the testing environment before each test.
+        '''
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        db.create_all()
+
+        self.test_user, _ = user_service.register_user('test@example.com', 'password123')
+        self.user_id = self.test_user['user']['id']
+        self.headers = {'Authorization': f"Bearer {self.test_user['token']}"}
+        self.test_meeting = meeting_service.create_meeting(self.user_id,
+                                                           'Test Meeting',
+                                                           'This is a test meeting', [])
+        self.test_timeslot = timeslot_service.create_timeslot(self.user_id,
+                                                              self.test_meeting.id,
+                                                              FUTURE_START_TIME,
+                                                              FUTURE_END_TIME)
+        self.test_vote = vote_service.create_vote(self.user_id, self.test_timeslot.id)
+
+    def tearDown(self):
+        '''
+        This method tears down the testing environment after each test.
+        '''
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_success_stream_meeting_events(self):
+        '''
+        Test that GET /api/meetings/<id>/events streams committed changes
+        as Server-Sent Events.
+        '''
+        response = self.client.get(f'/api/meetings/{self.test_meeting.id}/events',
+                                   headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+
+        stream = response.response
+        self.assertTrue(next(stream).startswith(b'retry:'))
+        vote_service.set_vote(self.user_id, self.test_timeslot.id, False)
+        frame = next(stream).decode()
+        self.assertIn('event: vote_removed', frame)
+        data = json.loads(frame.split('data: ', 1)[1])
+        self.assertEqual(data['data']['id'], self.test_vote.id)
+        response.close()
+
+    def test_success_get_meeting_changes(self):
+        '''
+        Test that GET /api/meetings/<id>/changes returns the changes
+        after the given version, and 410 when the log does not reach
+        back that far.
+        '''
+        url = f'/api/meetings/{self.test_meeting.id}/changes'
+        response = self.client.get(f'{url}?since=2', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['version'], 3)
+        self.assertEqual(response.get_json()['changes'][0]['type'], 'vote_added')
+
+        response = self.client.get(f'{url}?since=0', headers=self.headers)
+        self.assertEqual(response.status_code, 410)
+
+        response = self.client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_success_stream_meeting_events_with_events_token(self):
+        '''
+        Test that the event stream opens with an events token in the
+        query string, as browsers' EventSource cannot send headers, and
+        that the token is refused anywhere else.
+        '''
+        url = f'/api/meetings/{self.test_meeting.id}/events'
+        response = self.client.post(f'{url}/token', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        token = response.get_json()['token']
+
+        response = self.client.get(f'{url}?token={token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        response.close()
+
+        other = meeting_service.create_meeting(self.user_id, 'Other', '', [])
+        response = self.client.get(f'/api/meetings/{other.id}/events?token={token}')
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(f'{url}?token=invalid')
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(f'/api/meetings/{self.test_meeting.id}',
+                                   headers={'Authorization': f'Bearer {token}'})
+        self.assertNotEqual(response.status_code, 200)
+
+    def test_fail_events_token_for_missing_meeting(self):
+        '''
+        Test that no events token is issued for an unknown meeting.
+        '''
+        response = self.client.post('/api/meetings/999/events/token',
+                                    headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_fail_stream_events_for_missing_meeting(self):
+        '''
+        Test that the event stream answers 404 for unknown meetings.
+        '''
+        response = self.client.get('/api/meetings/999/events', headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_success_get_meetings_streams_all_meetings(self):
+        '''
+        Test that GET /api/meetings returns every meeting of the user,
+        newest first, as a JSON array, with their timeslots but without
+        loading their votes unless they are included.
+        '''
+        second = meeting_service.create_meeting(self.user_id, 'Second', '', [])
+        statements = []
+
+        def listener(*args):
+            statements.append(args[2])
+
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            response = self.client.get('/api/meetings', headers=self.headers)
+            meetings = response.get_json()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([meeting['id'] for meeting in meetings],
+                         [second.id, self.test_meeting.id])
+        self.assertEqual(meetings[1]['timeslots'][0]['id'], self.test_timeslot.id)
+        self.assertNotIn('votes', meetings[1]['timeslots'][0])
+        self.assertFalse([statement for statement in statements
+                          if 'FROM votes' in statement])
+
+        response = self.client.get('/api/meetings?include=timeslots.votes',
+                                   headers=self.headers)
+        self.assertEqual(response.get_json()[1]['timeslots'][0]['votes'][0]['id'],
+                         self.test_vote.id)
+
+    def test_success_get_meetings_keyset_pagination(self):
+        '''
+        Test that GET /api/meetings pages through meetings with the
+        cursor returned in the X-Next-Cursor header.
+        '''
+        second = meeting_service.create_meeting(self.user_id, 'Second', '', [])
+        third = meeting_service.create_meeting(self.user_id, 'Third', '', [])
+
+        response = self.client.get('/api/meetings?limit=2', headers=self.headers)
+        self.assertEqual([meeting['id'] for meeting in response.get_json()],
+                         [third.id, second.id])
+        cursor = response.headers['X-Next-Cursor']
+
+        response = self.client.get(f'/api/meetings?limit=2&after={cursor}',
+                                   headers=self.headers)
+        self.assertEqual([meeting['id'] for meeting in response.get_json()],
+                         [self.test_meeting.id])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_fail_get_meetings_after_deleted_cursor(self):
+        '''
+        Test that GET /api/meetings rejects a cursor whose meeting was
+        deleted, rather than answering with an empty page.
+        '''
+        second = meeting_service.create_meeting(self.user_id, 'Second', '', [])
+        meeting_service.create_meeting(self.user_id, 'Third', '', [])
+
+        response = self.client.get('/api/meetings?limit=2', headers=self.headers)
+        cursor = response.headers['X-Next-Cursor']
+        self.assertEqual(cursor, str(second.id))
+        meeting_service.delete_meeting(self.user_id, second.id)
+
+        response = self.client.get(f'/api/meetings?limit=2&after={cursor}',
+                                   headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.get_json()['error'])
+
+    def test_fail_get_meetings_with_invalid_limit(self):
+        '''
+        Test that GET /api/meetings rejects out of range page sizes.
+        '''
+        response = self.client.get('/api/meetings?limit=0', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_success_get_meeting_not_modified(self):
+        '''
+        Test that GET /api/meetings/<id> answers 304 to a matching
+        If-None-Match, and 200 with a new ETag once the meeting changes.
+        '''
+        url = f'/api/meetings/{self.test_meeting.id}'
+        response = self.client.get(url, headers=self.headers)
+        etag = response.headers['ETag']
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(url, headers={**self.headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.data, b'')
+
+        response = self.client.get(f'{url}?votes=counts',
+                                   headers={**self.headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+        vote_service.set_vote(self.user_id, self.test_timeslot.id, False)
+        response = self.client.get(url, headers={**self.headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_success_get_meetings_not_modified(self):
+        '''
+        Test that GET /api/meetings answers 304 while none of the listed
+        meetings has changed.
+        '''
+        response = self.client.get('/api/meetings', headers=self.headers)
+        etag = response.headers['ETag']
+
+        response = self.client.get('/api/meetings',
+                                   headers={**self.headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        meeting_service.update_meeting(self.user_id, self.test_meeting.id, 'Renamed', None)
+        response = self.client.get('/api/meetings',
+                                   headers={**self.headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_success_refresh_token(self):
+        '''
+        Test that POST /api/users/token/refresh exchanges a refresh token
+        once, and that access tokens are not accepted.
+        '''
+        refresh_headers = {'Authorization': f"Bearer {self.test_user['refresh_token']}"}
+        response = self.client.post('/api/users/token/refresh', headers=refresh_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', response.get_json())
+
+        response = self.client.post('/api/users/token/refresh', headers=refresh_headers)
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.post('/api/users/token/refresh', headers=self.headers)
+        self.assertEqual(response.status_code, 422)
+
+    def test_success_get_busy_intervals(self):
+        '''
+        Test that GET /api/users/me/busy returns the user's commitments
+        within the requested period only.
+        '''
+        response = self.client.get('/api/users/me/busy', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['busy'], [
+            {'start_time': FUTURE_START_TIME, 'end_time': FUTURE_END_TIME}])
+
+        response = self.client.get(f'/api/users/me/busy?from={FUTURE_END_TIME}Z',
+                                   headers=self.headers)
+        self.assertEqual(response.get_json()['busy'], [])
+
+        response = self.client.get('/api/users/me/busy?from=tomorrow',
+                                   headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_success_create_timeslots_in_bulk(self):
+        '''
+        Test that POST /api/meetings/<id>/timeslots/bulk creates every
+        timeslot in the payload, and that duplicates are rejected unless
+        merging is requested.
+        '''
+        url = f'/api/meetings/{self.test_meeting.id}/timeslots/bulk'
+        duplicate = {'startTime': FUTURE_START_TIME, 'endTime': FUTURE_END_TIME}
+        half_hour_later = datetime.fromisoformat(FUTURE_START_TIME) + timedelta(minutes=30)
+        slot = {'startTime': FUTURE_START_TIME, 'endTime': half_hour_later.isoformat()}
+        response = self.client.post(url, json={'timeSlots': [duplicate, slot]},
+                                    headers=self.headers)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['timeslot_id'], self.test_timeslot.id)
+
+        response = self.client.post(f'{url}?merge=true',
+                                    json={'timeSlots': [duplicate, slot]},
+                                    headers=self.headers)
+        timeslots = response.get_json()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(timeslots[0]['id'], self.test_timeslot.id)
+        self.assertEqual(timeslots[1]['overlaps'], [self.test_timeslot.id])
+
+    def test_success_create_meeting_merges_duplicates_on_request(self):
+        '''
+        Test that POST /api/meetings rejects duplicate time slots with a
+        409 and stores nothing, unless merging is requested.
+        '''
+        slot = {'startTime': FUTURE_START_TIME, 'endTime': FUTURE_END_TIME}
+        meeting = {'title': 'Duplicates', 'description': '', 'timeSlots': [slot, slot]}
+
+        response = self.client.post('/api/meetings', json=meeting, headers=self.headers)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(len(meeting_service.get_meeting_ids(self.user_id)), 1)
+
+        response = self.client.post('/api/meetings?merge=true', json=meeting,
+                                    headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.get_json()['timeslots']), 1)
+
+    def test_fail_create_timeslots_in_bulk_for_missing_meeting(self):
+        '''
+        Test that the bulk timeslot route answers 404 for unknown meetings.
+        '''
+        slot = {'startTime': FUTURE_START_TIME, 'endTime': FUTURE_END_TIME}
+        response = self.client.post('/api/meetings/999/timeslots/bulk',
+                                    json={'timeSlots': [slot]}, headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_success_get_meeting_with_vote_counts(self):
+        '''
+        Test that GET /api/meetings/<id>?votes=counts replaces the
+        vote lists with counts and the caller's vote IDs.
+        '''
+        response = self.client.get(f'/api/meetings/{self.test_meeting.id}?votes=counts',
+                                   headers=self.headers)
+        timeslot = response.get_json()['timeslots'][0]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('votes', timeslot)
+        self.assertEqual(timeslot['vote_count'], 1)
+        self.assertEqual(timeslot['my_vote_ids'], [self.test_vote.id])
+
+    def test_success_get_meeting_with_vote_counts_sparse_fieldset(self):
+        '''
+        Test that the caller's vote IDs are added even when the fields
+        leave the timeslot IDs out.
+        '''
+        response = self.client.get(
+            f'/api/meetings/{self.test_meeting.id}'
+            '?votes=counts&fields=timeslots.start_time', headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['timeslots'], [
+            {'start_time': FUTURE_START_TIME, 'my_vote_ids': [self.test_vote.id]}])
+
+    def test_success_get_meeting_sparse_fieldset(self):
+        '''
+        Test that GET /api/meetings/<id> returns the requested fields
+        and relationships only, under its own ETag.
+        '''
+        url = f'/api/meetings/{self.test_meeting.id}'
+        full = self.client.get(url, headers=self.headers)
+
+        response = self.client.get(
+            f'{url}?include=timeslots&fields=id,title,timeslots.start_time',
+            headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {
+            'id': self.test_meeting.id,
+            'title': 'Test Meeting',
+            'timeslots': [{'start_time': FUTURE_START_TIME}],
+        })
+        self.assertNotEqual(response.headers['ETag'], full.headers['ETag'])
+
+        response = self.client.get(f'{url}?include=&fields=version',
+                                   headers=self.headers)
+        self.assertEqual(response.get_json(), {'version': full.get_json()['version']})
+
+    def test_fail_get_meeting_unknown_include(self):
+        '''
+        Test that including an unknown relationship or listing an
+        unknown field is rejected.
+        '''
+        response = self.client.get(
+            f'/api/meetings/{self.test_meeting.id}?include=participants',
+            headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(
+            f'/api/meetings/{self.test_meeting.id}?fields=bogus',
+            headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_fail_shape_unsupported_routes(self):
+        '''
+        Test that the GET routes with computed payloads reject the
+        include and fields parameters instead of ignoring them.
+        '''
+        meeting_url = f'/api/meetings/{self.test_meeting.id}'
+        for url in (f'{meeting_url}/tally?fields=vote_count',
+                    f'{meeting_url}/recommendation?include=timeslots',
+                    f'{meeting_url}/changes?since=0&fields=type',
+                    f'{meeting_url}/events?include=timeslots',
+                    '/api/users/me/busy?fields=busy'):
+            response = self.client.get(url, headers=self.headers)
+            self.assertEqual(response.status_code, 400, url)
+            self.assertIn('not supported', response.get_json()['error'])
+
+    def test_success_apply_ballot(self):
+        '''
+        Test that POST /api/votes/batch applies the ballot and returns
+        the user's resulting votes.
+        '''
+        response = self.client.post('/api/votes/batch', headers=self.headers, json={
+            'meeting_id': self.test_meeting.id,
+            'remove': [self.test_timeslot.id]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['votes'], [])
+
+    def test_fail_apply_ballot_with_invalid_ids(self):
+        '''
+        Test that POST /api/votes/batch rejects booleans as IDs and
+        timeslots of another meeting.
+        '''
+        other = meeting_service.create_meeting(self.user_id, 'Other', '', [
+            {'startTime': self.test_timeslot.start_time.isoformat(),
+             'endTime': self.test_timeslot.end_time.isoformat()}])
+
+        for ballot in ({'meeting_id': self.test_meeting.id, 'add': [True]},
+                       {'meeting_id': True, 'add': [self.test_timeslot.id]},
+                       {'meeting_id': self.test_meeting.id,
+                        'add': [other.timeslots[0].id]}):
+            response = self.client.post('/api/votes/batch', headers=self.headers,
+                                        json=ballot)
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(vote_service.get_user_vote_ids(other.id, self.user_id))
+
+    def test_success_set_vote(self):
+        '''
+        Test that PUT /api/timeslots/<id>/vote can be repeated safely.
+        '''
+        url = f'/api/timeslots/{self.test_timeslot.id}/vote'
+        for _ in range(2):
+            response = self.client.put(url, json={'voted': True}, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()['vote']['id'], self.test_vote.id)
+
+    def test_fail_login_when_hasher_is_saturated(self):
+        '''
+        Test that a login shed by the saturated password hasher is
+        answered with a 503 asking the client to retry.
+        '''
+        with mock.patch.object(password_hasher, 'verify',
+                               side_effect=ServiceUnavailableError()):
+            response = self.client.post('/api/users/login', json={
+                'email': 'test@example.com', 'password': 'password123'})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+    def test_success_get_internal_stats(self):
+        '''
+        Test that GET /internal/stats reports the database pool and the
+        in-process components to holders of the internal token only.
+        '''
+        self.assertEqual(self.client.get('/internal/stats').status_code, 404)
+
+        self.app.config['INTERNAL_STATS_TOKEN'] = 'secret'
+        response = self.client.get('/internal/stats',
+                                   headers={'Authorization': 'Bearer wrong'})
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.get('/internal/stats',
+                                   headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+        stats = response.get_json()
+        self.assertGreater(stats['database']['default']['checkouts'], 0)
+        self.assertGreater(stats['database']['default']['max_checked_out'], 0)
+        self.assertEqual(stats['database']['default']['timeouts'], 0)
+        self.assertIn('wait_ms_max', stats['database']['default'])
+        self.assertIn('status', stats['database']['default'])
+        self.assertIn('hits', stats['meeting_cache'])
+        self.assertIn('subscribers', stats['events'])
+        self.assertIn('rejected', stats['password_hasher'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+'''
+This module contains unit tests for the shapes of serialized models.
+'''
+
+import unittest
+from werkzeug.datastructures import MultiDict
+
+# pylint: disable=import-error
+from app.models.meeting import Meeting
+from app.serialization import MEETING_FIELDS, MEETING_RELATIONSHIPS, Shape, parse_shape
+
+
+class TestShape(unittest.TestCase):
+    '''
+    This class represents the test case for the Shape class.
+    '''
+    def test_success_nested_paths(self):
+        '''
+        Test that nested relationships include their parents and that
+        the nested shapes hold the paths under their relationship.
+        '''
+        shape = Shape(include=['timeslots.votes'],
+                      fields=['title', 'timeslots.start_time'])
+
+        self.assertTrue(shape.includes('timeslots'))
+        self.assertFalse(shape.includes('votes'))
+        timeslot_shape = shape.nested('timeslots')
+        self.assertTrue(timeslot_shape.includes('votes'))
+        self.assertEqual(timeslot_shape.fields, {'start_time'})
+        self.assertIsNone(timeslot_shape.nested('votes').fields)
+
+    def test_success_pick(self):
+        '''
+        Test that only the listed attributes and the included
+        relationships are kept, and everything when none is listed.
+        '''
+        data = {'id': 1, 'title': 'Meeting', 'timeslots': []}
+
+        self.assertEqual(Shape(include=['timeslots'], fields=['title']).pick(data),
+                         {'title': 'Meeting', 'timeslots': []})
+        self.assertEqual(Shape(fields=['timeslots.id']).pick(data), data)
+
+    def test_success_loader_options(self):
+        '''
+        Test that one chain of loaders is built per included leaf.
+        '''
+        self.assertEqual(len(Shape(include=MEETING_RELATIONSHIPS)
+                             .loader_options(Meeting)), 1)
+        self.assertEqual(Shape().loader_options(Meeting), [])
+
+    def test_success_parse_shape(self):
+        '''
+        Test that the default relationships apply without an include
+        parameter, and that an empty one includes nothing.
+        '''
+        self.assertEqual(parse_shape(MultiDict(), MEETING_RELATIONSHIPS,
+                                     MEETING_FIELDS, ['timeslots']),
+                         Shape(include=['timeslots']))
+        self.assertEqual(parse_shape(MultiDict({'include': '', 'fields': 'id, title'}),
+                                     MEETING_RELATIONSHIPS, MEETING_FIELDS,
+                                     ['timeslots']),
+                         Shape(fields=['id', 'title']))
+
+    def test_fail_parse_unknown_relationship(self):
+        '''
+        Test that a relationship that cannot be included is rejected.
+        '''
+        with self.assertRaises(ValueError):
+            parse_shape(MultiDict({'include': 'timeslots,participants'}),
+                        MEETING_RELATIONSHIPS, MEETING_FIELDS)
+
+    def test_fail_parse_unknown_field(self):
+        '''
+        Test that a field that is not an attribute of the model or of
+        its embedded objects is rejected.
+        '''
+        with self.assertRaises(ValueError):
+            parse_shape(MultiDict({'fields': 'id,bogus'}),
+                        MEETING_RELATIONSHIPS, MEETING_FIELDS)
+        with self.assertRaises(ValueError):
+            parse_shape(MultiDict({'fields': 'timeslots.title'}),
+                        MEETING_RELATIONSHIPS, MEETING_FIELDS)
+
+
+if __name__ == '__main__':
+    unittest.main()
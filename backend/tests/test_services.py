@@ -4,6 +4,9 @@ This module contains unit tests for the service layer of the application.
 
 from datetime import datetime, timedelta
 import unittest
+from unittest import mock
+from flask_jwt_extended import decode_token
+from sqlalchemy import event
 
 # pylint: disable=unused-import,import-error
 from app import create_app
@@ -13,11 +16,18 @@ from app.models.timeslot import TimeSlot
 from app.models.vote import Vote
 from app.database import db
 from app.services import (
+    change_service,
+    recommendation_service,
+    token_service,
     user_service,
     meeting_service,
     timeslot_service,
     vote_service)
-from app.exceptions import ResourceCreationError
+from app.exceptions import ResourceConflictError, ResourceCreationError
+from app.cache import meeting_cache
+from app.events import event_broker
+from app.hashing import password_hasher
+from app.intervals import IntervalIndex
 
 
 # Remove milliseconds from formatted strings
@@ -28,6 +38,17 @@ FUTURE_END_TIME = (datetime.utcnow() + timedelta(days=1, hours=2)
 PAST_START_TIME = (datetime.utcnow() - timedelta(hours=1)).isoformat()
 PAST_END_TIME = (datetime.utcnow() - timedelta(hours=1)).isoformat()
 
+
+def later_slot(hours):
+    '''Return the test slot shifted by a number of hours.'''
+    return {
+        'startTime': (datetime.fromisoformat(FUTURE_START_TIME)
+                      + timedelta(hours=hours)).isoformat(),
+        'endTime': (datetime.fromisoformat(FUTURE_END_TIME)
+                    + timedelta(hours=hours)).isoformat(),
+    }
+
+
 class TestServices(unittest.TestCase):
     '''
     This class represents the test case for the service layer of
@@ -89,6 +110,30 @@ class TestServices(unittest.TestCase):
         '''
         response, _ = user_service.login_user('test@example.com', 'password123')
         self.assertEqual(response['user']['email'], 'test@example.com')
+        self.assertNotIn('meetings', response['user'])
+
+    def test_success_login_user_with_meetings(self):
+        '''
+        This method tests that login_user embeds the user's meetings on
+        request, loading them with one query per level of the tree.
+        '''
+        statements = []
+
+        def listener(*args):
+            statements.append(args[2])
+
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            response, _ = user_service.login_user('test@example.com', 'password123',
+                                                  include_meetings=True)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        meeting = response['user']['meetings'][0]
+        self.assertEqual(meeting['id'], self.test_meeting.id)
+        self.assertEqual(meeting['timeslots'][0]['votes'][0]['id'], self.test_vote.id)
+        self.assertEqual(len([statement for statement in statements
+                              if statement.lstrip().startswith('SELECT')]), 4)
 
     def test_success_create_meeting(self):
         '''
@@ -207,7 +252,403 @@ class TestServices(unittest.TestCase):
                                              FUTURE_END_TIME,
                                              FUTURE_START_TIME)
 
+    def test_success_get_meetings_includes_voted_meetings(self):
+        '''
+        This method tests the meeting_service.get_meetings function.
+        It registers a second user who votes on the test meeting and
+        asserts that the meeting is listed for that user, and that it is
+        no longer listed once the vote is deleted.
+        '''
+        voter, _ = user_service.register_user('voter@example.com', 'password123')
+        vote = vote_service.create_vote(voter['user']['id'], self.test_timeslot.id)
+
+        meetings = meeting_service.get_meetings(voter['user']['id'])
+        self.assertEqual([meeting.id for meeting in meetings], [self.test_meeting.id])
+
+        vote_service.delete_vote(voter['user']['id'], vote.id)
+        self.assertEqual(meeting_service.get_meetings(voter['user']['id']), [])
+
+    def test_success_get_meetings_lists_each_meeting_once(self):
+        '''
+        This method tests that a meeting the user created, suggested
+        a timeslot in and voted on is only returned once.
+        '''
+        meetings = meeting_service.get_meetings(self.test_user['user']['id'])
+        self.assertEqual(len(meetings), 1)
+
+    def test_success_create_timeslots(self):
+        '''
+        This method tests the timeslot_service.create_timeslots function.
+        It asserts that every slot is created for the meeting.
+        '''
+        timeslots = timeslot_service.create_timeslots(
+            self.test_user['user']['id'],
+            self.test_meeting.id,
+            [later_slot(hours) for hours in (3, 6, 9)])
+        self.assertEqual(len(timeslots), 3)
+        self.assertTrue(all(timeslot.id for timeslot in timeslots))
+        self.assertEqual(TimeSlot.query.filter_by(
+            meeting_id=self.test_meeting.id).count(), 4)
+
+    def test_success_create_timeslot_reports_overlaps(self):
+        '''
+        This method tests that a new timeslot reports the timeslots it
+        overlaps, and that touching timeslots do not overlap.
+        '''
+        user_id = self.test_user['user']['id']
+        overlapping = later_slot(1)
+        touching = later_slot(2)
+
+        timeslot = timeslot_service.create_timeslot(
+            user_id, self.test_meeting.id,
+            overlapping['startTime'], overlapping['endTime'])
+        self.assertEqual(timeslot.overlaps, [self.test_timeslot.id])
+
+        timeslot = timeslot_service.create_timeslot(
+            user_id, self.test_meeting.id, touching['startTime'], touching['endTime'])
+        self.assertEqual(timeslot.overlaps, [timeslot.id - 1])
+
+    def test_success_merge_duplicate_timeslots(self):
+        '''
+        This method tests that with merge, duplicate suggestions resolve
+        to the existing timeslot instead of creating new ones.
+        '''
+        user_id = self.test_user['user']['id']
+        timeslot = timeslot_service.create_timeslot(
+            user_id, self.test_meeting.id, FUTURE_START_TIME, FUTURE_END_TIME,
+            merge=True)
+        self.assertEqual(timeslot.id, self.test_timeslot.id)
+        self.assertTrue(timeslot.merged)
+
+        timeslots = timeslot_service.create_timeslots(
+            user_id, self.test_meeting.id,
+            [later_slot(0), later_slot(3), later_slot(3)], merge=True)
+        self.assertEqual([timeslot.id for timeslot in timeslots],
+                         [self.test_timeslot.id, timeslots[1].id, timeslots[1].id])
+        self.assertEqual(TimeSlot.query.count(), 2)
+
+    def test_success_get_meeting_payload_is_cached_until_a_write(self):
+        '''
+        This method tests the meeting_service.get_meeting_payload function.
+        It asserts that a second read is answered from the meeting cache
+        and that casting a vote invalidates the cached payload.
+        '''
+        meeting_cache.clear()
+        meeting_service.get_meeting_payload(self.test_meeting.id)
+        meeting_service.get_meeting_payload(self.test_meeting.id)
+        self.assertEqual(meeting_cache.stats()['hits'], 1)
+
+        voter, _ = user_service.register_user('voter@example.com', 'password123')
+        vote_service.create_vote(voter['user']['id'], self.test_timeslot.id)
+
+        payload = meeting_service.get_meeting_payload(self.test_meeting.id)
+        self.assertEqual(len(payload['timeslots'][0]['votes']), 2)
+        self.assertEqual(meeting_cache.stats()['hits'], 1)
+
+    def test_success_get_tally(self):
+        '''
+        This method tests the vote_service.get_tally function.
+        It asserts that the count covers every voter while only the
+        caller's own vote IDs are reported.
+        '''
+        voter, _ = user_service.register_user('voter@example.com', 'password123')
+        vote_service.create_vote(voter['user']['id'], self.test_timeslot.id)
+
+        tally = vote_service.get_tally(self.test_meeting.id, self.test_user['user']['id'])
+        self.assertEqual(tally, [{'timeslot_id': self.test_timeslot.id,
+                                  'vote_count': 2,
+                                  'my_vote_ids': [self.test_vote.id]}])
+
+    def test_success_vote_count_follows_votes(self):
+        '''
+        This method tests that create_vote and delete_vote keep the
+        timeslot's vote_count counter in step with its votes.
+        '''
+        self.assertEqual(db.session.get(TimeSlot, self.test_timeslot.id).vote_count, 1)
+
+        vote_service.delete_vote(self.test_user['user']['id'], self.test_vote.id)
+        self.assertEqual(db.session.get(TimeSlot, self.test_timeslot.id).vote_count, 0)
+
+    def test_success_reconcile_vote_counts(self):
+        '''
+        This method tests the vote_service.reconcile_vote_counts function.
+        It corrupts a counter and asserts that it is recomputed.
+        '''
+        timeslot = db.session.get(TimeSlot, self.test_timeslot.id)
+        timeslot.vote_count = 7
+        db.session.commit()
+
+        self.assertEqual(vote_service.reconcile_vote_counts(), 1)
+        self.assertEqual(db.session.get(TimeSlot, self.test_timeslot.id).vote_count, 1)
+        self.assertEqual(vote_service.reconcile_vote_counts(), 0)
+
+    def test_success_apply_ballot(self):
+        '''
+        This method tests the vote_service.apply_ballot function.
+        It withdraws the existing vote, votes for a new timeslot and
+        re-votes for it, and asserts the resulting ballot and counters.
+        '''
+        user_id = self.test_user['user']['id']
+        slot = later_slot(3)
+        other = timeslot_service.create_timeslot(user_id, self.test_meeting.id,
+                                                 slot['startTime'], slot['endTime'])
+
+        votes = vote_service.apply_ballot(user_id, self.test_meeting.id,
+                                          add=[other.id], remove=[self.test_timeslot.id])
+        votes = vote_service.apply_ballot(user_id, self.test_meeting.id, add=[other.id])
+
+        self.assertEqual([vote.timeslot_id for vote in votes], [other.id])
+        self.assertEqual(db.session.get(TimeSlot, other.id).vote_count, 1)
+        self.assertEqual(db.session.get(TimeSlot, self.test_timeslot.id).vote_count, 0)
+
+    def test_success_create_vote_is_idempotent(self):
+        '''
+        This method tests that voting twice for a timeslot returns the
+        existing vote instead of creating a duplicate.
+        '''
+        vote = vote_service.create_vote(self.test_user['user']['id'],
+                                        self.test_timeslot.id)
+
+        self.assertEqual(vote.id, self.test_vote.id)
+        self.assertEqual(Vote.query.count(), 1)
+        self.assertEqual(db.session.get(TimeSlot, self.test_timeslot.id).vote_count, 1)
+
+    def test_success_insert_votes_without_returning(self):
+        '''
+        This method tests that votes are inserted without RETURNING, and
+        that a vote cast concurrently between the read of the existing
+        votes and the insert is skipped rather than failing the ballot.
+        '''
+        user_id = self.test_user['user']['id']
+        slots = [later_slot(hours) for hours in (3, 6)]
+        others = [timeslot_service.create_timeslot(user_id, self.test_meeting.id,
+                                                   slot['startTime'], slot['endTime'])
+                  for slot in slots]
+        racing = []
+
+        def cast_concurrent_vote(conn, cursor, statement, *args):
+            if statement.startswith('SAVEPOINT') and not racing:
+                racing.append(statement)
+                conn.exec_driver_sql(
+                    'INSERT INTO votes (user_id, timeslot_id) VALUES (?, ?)',
+                    (user_id, others[0].id))
+
+        dialect = db.engine.dialect
+        event.listen(db.engine, 'before_cursor_execute', cast_concurrent_vote)
+        dialect.insert_returning = False
+        try:
+            votes = vote_service.apply_ballot(
+                user_id, self.test_meeting.id,
+                add=[self.test_timeslot.id] + [other.id for other in others])
+        finally:
+            dialect.insert_returning = True
+            event.remove(db.engine, 'before_cursor_execute', cast_concurrent_vote)
+
+        self.assertTrue(racing)
+        self.assertEqual([vote.timeslot_id for vote in votes],
+                         [self.test_timeslot.id] + [other.id for other in others])
+        self.assertEqual(Vote.query.count(), 3)
+        # the concurrent vote bypassed the counter
+        self.assertEqual([db.session.get(TimeSlot, other.id).vote_count
+                          for other in others], [0, 1])
+
+    def test_success_set_vote(self):
+        '''
+        This method tests the vote_service.set_vote function.
+        It withdraws the vote twice and casts it again.
+        '''
+        user_id = self.test_user['user']['id']
+        self.assertIsNone(vote_service.set_vote(user_id, self.test_timeslot.id, False))
+        self.assertIsNone(vote_service.set_vote(user_id, self.test_timeslot.id, False))
+        self.assertEqual(db.session.get(TimeSlot, self.test_timeslot.id).vote_count, 0)
+
+        vote = vote_service.set_vote(user_id, self.test_timeslot.id, True)
+        self.assertEqual(vote.timeslot_id, self.test_timeslot.id)
+        self.assertEqual(db.session.get(TimeSlot, self.test_timeslot.id).vote_count, 1)
+
+    def test_success_publish_change_events(self):
+        '''
+        This method tests that committed writes are published to the
+        subscribers of the meeting, with the new meeting version.
+        '''
+        subscription = event_broker.subscribe(self.test_meeting.id)
+        try:
+            user_id = self.test_user['user']['id']
+            vote_service.set_vote(user_id, self.test_timeslot.id, False)
+            vote = vote_service.set_vote(user_id, self.test_timeslot.id, True)
+
+            removed = subscription.get(timeout=0)
+            added = subscription.get(timeout=0)
+            self.assertEqual(removed['type'], 'vote_removed')
+            self.assertEqual(removed['data']['id'], self.test_vote.id)
+            self.assertEqual(added['type'], 'vote_added')
+            self.assertEqual(added['data']['id'], vote.id)
+            self.assertEqual(added['version'],
+                             meeting_service.get_meeting_version(self.test_meeting.id))
+            self.assertIsNone(subscription.get(timeout=0))
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    def test_success_get_recommendation(self):
+        '''
+        This method tests the recommendation_service.get_recommendation
+        function. A second suggestion overlapping the first one by an
+        hour makes the shared hour the best window.
+        '''
+        start = datetime.fromisoformat(FUTURE_START_TIME)
+        later = timeslot_service.create_timeslot(
+            self.test_user['user']['id'], self.test_meeting.id,
+            (start + timedelta(hours=1)).isoformat(),
+            (start + timedelta(hours=3)).isoformat())
+        other_user, _ = user_service.register_user('other@example.com', 'password123')
+        vote_service.create_vote(other_user['user']['id'], later.id)
+
+        recommendation = recommendation_service.get_recommendation(
+            self.test_meeting.id, limit=2)
+
+        self.assertEqual(recommendation['participants'], 2)
+        self.assertEqual(recommendation['windows'][0], {
+            'start_time': start + timedelta(hours=1),
+            'end_time': datetime.fromisoformat(FUTURE_END_TIME),
+            'available': 2,
+            'suggestions': 2,
+        })
+        self.assertEqual(len(recommendation['windows']), 2)
+        self.assertIsNone(recommendation_service.get_recommendation(999))
+
+    def test_success_login_user_rehashes_password(self):
+        '''
+        This method tests that logging in hashes the password again
+        when the configured hash cost has changed.
+        '''
+        self.app.config['PASSWORD_HASH_METHOD'] = 'scrypt:16384:8:1'
+        password_hasher.init_app(self.app)
+
+        response, status_code = user_service.login_user('test@example.com', 'password123')
+
+        self.assertEqual(status_code, 200)
+        user = db.session.get(User, response['user']['id'])
+        self.assertTrue(user.password.startswith('scrypt:16384:8:1$'))
+        self.assertTrue(user.check_password('password123'))
+
+    def test_success_refresh_tokens_rotates(self):
+        '''
+        This method tests the token_service.refresh_tokens function.
+        A refresh token can be exchanged once, and exchanging it again
+        revokes the tokens issued in its place.
+        '''
+        user_id = self.test_user['user']['id']
+        first_jti = decode_token(self.test_user['refresh_token'])['jti']
+
+        tokens = token_service.refresh_tokens(user_id, first_jti)
+        second_jti = decode_token(tokens['refresh_token'])['jti']
+        self.assertNotEqual(second_jti, first_jti)
+
+        self.assertIsNone(token_service.refresh_tokens(user_id, first_jti))
+        self.assertIsNone(token_service.refresh_tokens(user_id, second_jti))
+
+    def test_success_get_busy_intervals(self):
+        '''
+        This method tests the user_service.get_busy_intervals function.
+        The test timeslot is merged with an overlapping one, and a
+        timeslot voted for in another user's meeting is included.
+        '''
+        user_id = self.test_user['user']['id']
+        overlapping, elsewhere = later_slot(1), later_slot(24)
+        timeslot_service.create_timeslot(user_id, self.test_meeting.id,
+                                         overlapping['startTime'], overlapping['endTime'])
+        other_user, _ = user_service.register_user('other@example.com', 'password123')
+        other_meeting = meeting_service.create_meeting(
+            other_user['user']['id'], 'Other', '', [elsewhere, later_slot(48)])
+        vote_service.create_vote(user_id, other_meeting.timeslots[0].id)
+
+        start = datetime.utcnow()
+        busy = user_service.get_busy_intervals(user_id, start, start + timedelta(days=3))
+
+        self.assertEqual([(busy_start.isoformat(), busy_end.isoformat())
+                          for busy_start, busy_end in busy],
+                         [(FUTURE_START_TIME, overlapping['endTime']),
+                          (elsewhere['startTime'], elsewhere['endTime'])])
+
+    def test_success_get_changes(self):
+        '''
+        This method tests the change_service.get_changes function.
+        It replays the timeslot and the vote created in setUp.
+        '''
+        version, changes = change_service.get_changes(self.test_meeting.id, 1)
+
+        self.assertEqual(version, 3)
+        self.assertEqual([change.type for change in changes],
+                         ['timeslot_added', 'vote_added'])
+        self.assertEqual(changes[1].data['id'], self.test_vote.id)
+        self.assertEqual(change_service.get_changes(self.test_meeting.id, 3), (3, []))
+
+    def test_success_get_changes_truncated(self):
+        '''
+        This method tests that changes older than the retention are
+        truncated and that asking for them requires a resync.
+        '''
+        self.app.config['MEETING_CHANGES_RETENTION'] = 2
+        user_id = self.test_user['user']['id']
+        vote_service.set_vote(user_id, self.test_timeslot.id, False)
+        vote_service.set_vote(user_id, self.test_timeslot.id, True)
+
+        self.assertEqual(change_service.get_changes(self.test_meeting.id, 2), (5, None))
+        version, changes = change_service.get_changes(self.test_meeting.id, 3)
+        self.assertEqual(version, 5)
+        self.assertEqual([change.version for change in changes], [4, 5])
+
+    def test_success_discard_change_events_on_rollback(self):
+        '''
+        This method tests that writes that fail are not published.
+        '''
+        subscription = event_broker.subscribe(self.test_meeting.id)
+        try:
+            change_service.record_change(self.test_meeting.id, 'meeting_updated', {})
+            db.session.rollback()
+            db.session.commit()
+            self.assertIsNone(subscription.get(timeout=0))
+        finally:
+            event_broker.unsubscribe(subscription)
+
     # Test Fails
+    def test_fail_apply_ballot_with_foreign_timeslot(self):
+        """
+        Test that apply_ballot rejects timeslots of another meeting
+        and changes nothing.
+        """
+        user_id = self.test_user['user']['id']
+        with self.assertRaises(ResourceCreationError):
+            vote_service.apply_ballot(user_id, self.test_meeting.id,
+                                      add=[999], remove=[self.test_timeslot.id])
+        self.assertEqual(Vote.query.count(), 1)
+
+    def test_fail_create_timeslots_with_one_invalid_slot(self):
+        """
+        Test that create_timeslots creates nothing when one of the
+        slots is invalid.
+        """
+        with self.assertRaises(ResourceCreationError):
+            timeslot_service.create_timeslots(
+                self.test_user['user']['id'],
+                self.test_meeting.id,
+                [{'startTime': FUTURE_START_TIME, 'endTime': FUTURE_END_TIME},
+                 {'startTime': PAST_START_TIME, 'endTime': FUTURE_END_TIME}])
+        self.assertEqual(TimeSlot.query.filter_by(
+            meeting_id=self.test_meeting.id).count(), 1)
+
+    def test_fail_create_meeting_with_invalid_time_slot(self):
+        """
+        Test that create_meeting stores neither the meeting nor its
+        time slots when one of the time slots is invalid.
+        """
+        with self.assertRaises(ResourceCreationError):
+            meeting_service.create_meeting(
+                self.test_user['user']['id'], 'Broken Meeting', '',
+                [{'startTime': FUTURE_START_TIME, 'endTime': FUTURE_END_TIME},
+                 {'startTime': FUTURE_END_TIME, 'endTime': FUTURE_START_TIME}])
+        self.assertIsNone(Meeting.query.filter_by(title='Broken Meeting').first())
+
     def test_fail_register_user_with_existing_email(self):
         """
         Test that registering a user with an existing email fails and
@@ -291,6 +732,51 @@ class TestServices(unittest.TestCase):
                                                             self.test_timeslot.id)
         self.assertEqual(deleted_timeslot, 'Unauthorized')
 
+    def test_fail_create_duplicate_timeslot(self):
+        '''
+        This method tests that duplicate timeslots are rejected, alone,
+        in bulk or through an update, and that nothing is written.
+        '''
+        user_id = self.test_user['user']['id']
+        with self.assertRaises(ResourceConflictError) as context:
+            timeslot_service.create_timeslot(user_id, self.test_meeting.id,
+                                             FUTURE_START_TIME, FUTURE_END_TIME)
+        self.assertEqual(context.exception.existing_id, self.test_timeslot.id)
+
+        with self.assertRaises(ResourceConflictError):
+            timeslot_service.create_timeslots(user_id, self.test_meeting.id,
+                                              [later_slot(3), later_slot(3)])
+        self.assertEqual(TimeSlot.query.count(), 1)
+
+        slot = later_slot(3)
+        other = timeslot_service.create_timeslot(user_id, self.test_meeting.id,
+                                                 slot['startTime'], slot['endTime'])
+        with self.assertRaises(ResourceConflictError):
+            timeslot_service.update_timeslot(user_id, other.id, self.test_meeting.id,
+                                             FUTURE_START_TIME, FUTURE_END_TIME)
+
+    def test_fail_create_duplicate_timeslot_concurrently(self):
+        '''
+        This method tests that a duplicate missed by the interval index,
+        as when two requests suggest the same slot at once, is caught by
+        the unique constraint and still reported as a conflict.
+        '''
+        user_id = self.test_user['user']['id']
+        with mock.patch.object(timeslot_service, '_load_interval_index',
+                               return_value=IntervalIndex()):
+            with self.assertRaises(ResourceConflictError) as context:
+                timeslot_service.create_timeslot(user_id, self.test_meeting.id,
+                                                 FUTURE_START_TIME, FUTURE_END_TIME)
+            self.assertEqual(context.exception.existing_id, self.test_timeslot.id)
+
+            with self.assertRaises(ResourceConflictError) as context:
+                timeslot_service.create_timeslots(
+                    user_id, self.test_meeting.id,
+                    [later_slot(3), {'startTime': FUTURE_START_TIME,
+                                     'endTime': FUTURE_END_TIME}])
+            self.assertEqual(context.exception.existing_id, self.test_timeslot.id)
+        self.assertEqual(TimeSlot.query.count(), 1)
+
     def test_fail_delete_vote_with_wrong_user_id(self):
         """
         Test that deleting a vote with a wrong user ID fails and returns None.
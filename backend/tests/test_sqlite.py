@@ -0,0 +1,132 @@
+'''
+This module contains tests for the SQLite profile of the database.
+'''
+
+from datetime import datetime, timedelta
+from threading import Event, Thread
+import unittest
+from sqlalchemy import text
+
+# pylint: disable=import-error
+from app import create_app
+from app.database import db
+from app.models.timeslot import TimeSlot
+from app.models.vote import Vote
+from app.services import meeting_service, user_service, vote_service
+from app.sqlite import serialized_write, sqlite_profile
+
+START_TIME = (datetime.utcnow() + timedelta(days=1)).replace(microsecond=0)
+
+
+class TestSQLiteProfile(unittest.TestCase):
+    '''
+    This class represents the test case for the SQLite pragmas and the
+    serialization of the writes.
+    '''
+    def setUp(self):
+        '''
+        This method sets up the testing environment before each test.
+        '''
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user, _ = user_service.register_user('test@example.com', 'password123')
+        self.user_id = user['user']['id']
+        self.headers = {'Authorization': f"Bearer {user['token']}"}
+        meeting = meeting_service.create_meeting(
+            self.user_id, 'Test Meeting', 'This is a test meeting', [
+                {'startTime': (START_TIME + timedelta(hours=hours)).isoformat(),
+                 'endTime': (START_TIME + timedelta(hours=hours + 1)).isoformat()}
+                for hours in range(8)])
+        self.timeslot_ids = [timeslot.id for timeslot in meeting.timeslots]
+
+    def tearDown(self):
+        '''
+        This method tears down the testing environment after each test.
+        '''
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_success_connections_get_pragmas(self):
+        '''
+        Test that the connections to the database are set up with the
+        configured pragmas.
+        '''
+        with db.engine.connect() as connection:
+            def pragma(name):
+                return connection.execute(text(f'PRAGMA {name}')).scalar()
+
+            self.assertEqual(pragma('journal_mode'), 'wal')
+            # NORMAL
+            self.assertEqual(pragma('synchronous'), 1)
+            self.assertEqual(pragma('busy_timeout'),
+                             self.app.config['SQLITE_BUSY_TIMEOUT'])
+            self.assertEqual(pragma('cache_size'),
+                             -self.app.config['SQLITE_CACHE_SIZE'])
+
+    def test_success_concurrent_votes_are_serialized(self):
+        '''
+        Test that votes cast at the same time from several threads are
+        all stored, one after the other.
+        '''
+        writes = sqlite_profile.stats()['writes']
+        errors = []
+
+        def vote(timeslot_id):
+            with self.app.app_context():
+                try:
+                    vote_service.create_vote(self.user_id, timeslot_id)
+                except Exception as error:  # pylint: disable=broad-except
+                    errors.append(error)
+
+        voters = [Thread(target=vote, args=(timeslot_id,))
+                  for timeslot_id in self.timeslot_ids]
+        for voter in voters:
+            voter.start()
+        for voter in voters:
+            voter.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Vote.query.count(), len(self.timeslot_ids))
+        self.assertEqual({timeslot.vote_count for timeslot in TimeSlot.query}, {1})
+        self.assertTrue(sqlite_profile.serialize_writes)
+        self.assertEqual(sqlite_profile.stats()['writes'] - writes,
+                         len(self.timeslot_ids))
+
+    def test_failure_busy_writer_sheds_votes(self):
+        '''
+        Test that a vote waiting longer than the write timeout for its
+        turn is answered with a 503.
+        '''
+        holding, release = Event(), Event()
+
+        @serialized_write
+        def hold():
+            holding.set()
+            release.wait()
+
+        busy = Thread(target=hold)
+        busy.start()
+        holding.wait()
+        write_timeout = sqlite_profile.write_timeout
+        sqlite_profile.write_timeout = 0.05
+        try:
+            response = self.client.post('/api/votes', headers=self.headers,
+                                        json={'timeslot_id': self.timeslot_ids[0]})
+        finally:
+            sqlite_profile.write_timeout = write_timeout
+            release.set()
+            busy.join()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(Vote.query.count(), 0)
+        self.assertGreater(sqlite_profile.stats()['timeouts'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
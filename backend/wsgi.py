@@ -0,0 +1,19 @@
+'''
+This module is the production entry point of the Flask application.
+
+It creates the application for a WSGI server, with the configuration
+named by the APP_CONFIG environment variable ('production' by default)
+and without the command line commands and migrations, which servers
+never use. Creating the application touches neither the database nor
+the password hashing pool, so servers may create it once and fork their
+workers from it; see `gunicorn.conf.py`.
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
+'''
+
+import os
+from app import create_app #pylint: disable=import-error
+
+app = create_app(os.getenv('APP_CONFIG', 'production'), cli=False)
+# WSGI application instance.
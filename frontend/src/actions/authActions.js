@@ -32,6 +32,7 @@ export const register = (credentials) => async (dispatch) => {
   return apiRegister(credentials)
     .then((response) => {
       localStorage.setItem('token', response.token);
+      localStorage.setItem('refreshToken', response.refresh_token);
       localStorage.setItem('user', JSON.stringify(response.user));
       dispatch(registerSuccess(response.user));
     })
@@ -44,6 +45,7 @@ export const login = (credentials) => async (dispatch) => {
   return apiLogin(credentials)
     .then((response) => {
       localStorage.setItem('token', response.token);
+      localStorage.setItem('refreshToken', response.refresh_token);
       localStorage.setItem('user', JSON.stringify(response.user));
       dispatch(loginSuccess(response.user));
     })
@@ -54,6 +56,7 @@ export const login = (credentials) => async (dispatch) => {
 
 export const logout = () => (dispatch) => {
   localStorage.removeItem('token');
+  localStorage.removeItem('refreshToken');
   localStorage.removeItem('user');
   dispatch(logoutSuccess());
 };
\ No newline at end of file
@@ -8,6 +8,7 @@ import {
   MEETING_DELETE_SUCCESS,
   VOTE_CREATE_SUCCESS,
   VOTE_DELETE_SUCCESS,
+  BALLOT_CAST_SUCCESS,
   TIMESLOT_CREATE_SUCCESS,
   TIMESLOT_UPDATE_SUCCESS,
   TIMESLOT_DELETE_SUCCESS,
@@ -51,6 +52,11 @@ import {
     payload: { voteId, timeslotId, meetingId },
   });
 
+  export const castBallotSuccess = (votes, userId, meetingId) => ({
+    type: BALLOT_CAST_SUCCESS,
+    payload: { votes, userId, meetingId },
+  });
+
   // Manage timeslot success
   export const createTimeSlotSuccess = (timeslot, meetingId) => ({
     type: TIMESLOT_CREATE_SUCCESS,
@@ -78,15 +84,13 @@ import {
       const response = await api.getMeeting(id);
       dispatch(selectMeeting(response.id));
   
-      // Update the meeting in the array of meetings
+      // Replace the meeting in the array of meetings, where the list
+      // may hold a copy without votes. The id may come from the URL as a
+      // string, so compare with the one of the response.
       const { meetings } = getState().meeting;
-      const meetingIndex = meetings.findIndex(meeting => meeting.id === id);
-      const updatedMeetings = [...meetings];
-      if (meetingIndex !== -1) {
-        updatedMeetings[meetingIndex] = response;
-      } else {
-        updatedMeetings.push(response);
-      }
+      const updatedMeetings = meetings.some(meeting => meeting.id === response.id)
+        ? meetings.map(meeting => meeting.id === response.id ? response : meeting)
+        : [...meetings, response];
       dispatch(fetchMeetingsSuccess(updatedMeetings));
     } catch (error) {
       if (error.message === 'Unauthorized') {
@@ -187,6 +191,26 @@ import {
       });
   };
 
+  // Add and remove several votes of the user in one request
+  export const castBallot = (ballot) => async (dispatch) => {
+    return await api.castBallot({
+      meeting_id: ballot.meeting_id,
+      add: ballot.add,
+      remove: ballot.remove,
+    })
+      .then((response) => {
+        dispatch(castBallotSuccess(response.votes, ballot.user_id, ballot.meeting_id));
+        return true;
+      })
+      .catch((error) => {
+        if (error.message === 'Unauthorized') {
+          dispatch(logout());
+      } else {
+          dispatch(requestError(error.toString()));
+      }
+      });
+  };
+
   // Call timeslots endpoint
   export const createTimeSlot = (timeslot) => async (dispatch) => {
     return await api.createTimeSlot(timeslot)
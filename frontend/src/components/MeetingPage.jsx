@@ -15,8 +15,7 @@ import { clearError, clearSuccess } from '../actions';
 import {
   fetchMeeting,
   createTimeSlot,
-  createVote,
-  deleteVote,
+  castBallot,
   deleteTimeSlot,
 } from '../actions/meetingActions';
 
@@ -30,6 +29,8 @@ const MeetingPage = () => {
   const [newStartTime, setNewStartTime] = useState('');
   const [newEndTime, setNewEndTime] = useState('');
   const [loading, setLoading] = useState(true);
+  // Votes changed since the last submit, by timeslot ID
+  const [ballot, setBallot] = useState({});
 
     // Reset error and success messages
   useEffect(() => {
@@ -39,6 +40,7 @@ const MeetingPage = () => {
 
   useEffect(() => {
     dispatch(fetchMeeting(meeting_id));
+    setBallot({});
     setLoading(false);
   }, [dispatch, meeting_id]);
 
@@ -63,15 +65,23 @@ const MeetingPage = () => {
 
   const handleVote = (timeslot) => {
     // Check if user has already voted on this timeslot
-    const userVote = timeslot.votes.find(vote => vote.user_id === user.id);
-    if (userVote) {
-      dispatch(deleteVote({
-        vote_id: userVote.id,
-        timeslot_id: userVote.timeslot_id,
-        meeting_id: meeting.id
-      }));
-    } else {
-      dispatch(createVote({ meeting_id: meeting.id, timeslot_id: timeslot.id }));
+    const voted = (timeslot.votes || []).some(vote => vote.user_id === user.id);
+    const { [timeslot.id]: pending, ...others } = ballot;
+    // Toggling back to the saved vote leaves nothing to submit
+    setBallot(pending === undefined ? { ...others, [timeslot.id]: !voted } : others);
+  };
+
+  const handleSubmitBallot = async () => {
+    const timeslotIds = Object.keys(ballot).map(Number);
+    const saved = await dispatch(castBallot({
+      meeting_id: meeting.id,
+      user_id: user.id,
+      add: timeslotIds.filter(id => ballot[id]),
+      remove: timeslotIds.filter(id => !ballot[id]),
+    }));
+    // Keep the changes to retry them if the ballot was rejected
+    if (saved) {
+      setBallot({});
     }
   };
 
@@ -107,10 +117,16 @@ const MeetingPage = () => {
           key={timeslot.id} 
           timeslot={timeslot} 
           user={user} 
+          pendingVote={ballot[timeslot.id] ?? null}
           handleVote={handleVote} 
           handleDeleteTimeslot={handleDeleteTimeslot}
         />
       ))}
+      {Object.keys(ballot).length > 0 && (
+        <div className='mb-4'>
+          <Button onClick={handleSubmitBallot}>Submit Votes</Button>
+        </div>
+      )}
       {!meeting.final_time && (
         <div className="flex flex-col sm:flex-row justify-center">
           <input 
@@ -1,9 +1,13 @@
-import { timeSlotShape, userShape, funcType } from '../utils/propTypes';
+import { timeSlotShape, userShape, funcType, boolType } from '../utils/propTypes';
 import { FaTrash } from 'react-icons/fa';
 import Button from './Button';
 
-const TimeSlot = ({ timeslot, user, handleVote, handleDeleteTimeslot }) => {
-  const userVote = timeslot.votes.find(vote => vote.user_id === user.id);
+const TimeSlot = ({ timeslot, user, pendingVote, handleVote, handleDeleteTimeslot }) => {
+  // meeting lists leave the votes out until the meeting itself is fetched
+  const votes = timeslot.votes || [];
+  const userVote = votes.find(vote => vote.user_id === user.id);
+  // A change not submitted yet shows over the saved vote
+  const checked = pendingVote ?? !!userVote;
 
   return (
     <div 
@@ -14,7 +18,7 @@ const TimeSlot = ({ timeslot, user, handleVote, handleDeleteTimeslot }) => {
       <div className='flex items-center'>
         <input 
           type="checkbox" 
-          checked={!!userVote} 
+          checked={checked} 
           onChange={() => handleVote(timeslot)} 
         />
         <div 
@@ -22,15 +26,15 @@ const TimeSlot = ({ timeslot, user, handleVote, handleDeleteTimeslot }) => {
           className={`
             ml-4 cursor-pointer px-4 py-2 rounded-lg flex 
             flex-row justify-between items-center 
-            ${userVote ? 'bg-blue-500 text-white' 
+            ${checked ? 'bg-blue-500 text-white' 
             : 'bg-white'}`}>
           <div className=''>{timeslot.start_time} - {timeslot.end_time} 
             <span 
               className={
                 `rounded-full ml-2 w-[100%] h-[100%] 
-                ${userVote && 'bg-white text-blue-500'}`}
+                ${checked && 'bg-white text-blue-500'}`}
               >
-              ({timeslot.votes.length} votes)
+              ({votes.length} votes)
             </span>
           </div>
         </div>
@@ -57,12 +61,14 @@ const TimeSlot = ({ timeslot, user, handleVote, handleDeleteTimeslot }) => {
 TimeSlot.propTypes = {
   timeslot: timeSlotShape.isRequired,
   user: userShape,
+  pendingVote: boolType,
   handleVote: funcType,
   handleDeleteTimeslot: funcType,
 };
 
 TimeSlot.defaultProps = {
   user: {},
+  pendingVote: null,
   handleVote: () => {},
   handleDeleteTimeslot: () => {},
 };
@@ -10,6 +10,7 @@ export const MEETING_DELETE_SUCCESS = 'MEETING_DELETE_SUCCESS';
 export const VOTE_FETCH_SUCCESS = 'VOTE_FETCH_SUCCESS';
 export const VOTE_CREATE_SUCCESS = 'VOTE_CREATE_SUCCESS';
 export const VOTE_DELETE_SUCCESS = 'VOTE_DELETE_SUCCESS';
+export const BALLOT_CAST_SUCCESS = 'BALLOT_CAST_SUCCESS';
 export const TIMESLOT_CREATE_SUCCESS = 'TIMESLOT_CREATE_SUCCESS';
 export const TIMESLOT_UPDATE_SUCCESS = 'TIMESLOT_UPDATE_SUCCESS';
 export const TIMESLOT_DELETE_SUCCESS = 'TIMESLOT_DELETE_SUCCESS';
@@ -5,6 +5,7 @@ import {
   MEETING_DELETE_SUCCESS,
   VOTE_CREATE_SUCCESS,
   VOTE_DELETE_SUCCESS,
+  BALLOT_CAST_SUCCESS,
   TIMESLOT_CREATE_SUCCESS,
   TIMESLOT_UPDATE_SUCCESS,
   TIMESLOT_DELETE_SUCCESS,
@@ -66,7 +67,7 @@ export default function meetingReducer(state = initialState, action) {
                 ...meeting, 
                 timeslots: meeting.timeslots.map(timeslot =>
                   timeslot.id === timeslotId
-                    ? { ...timeslot, votes: [...timeslot.votes, vote] }
+                    ? { ...timeslot, votes: [...(timeslot.votes ?? []), vote] }
                     : timeslot
                 )
               }
@@ -86,7 +87,8 @@ export default function meetingReducer(state = initialState, action) {
                 ...meeting, 
                 timeslots: meeting.timeslots.map(timeslot =>
                   timeslot.id === timeslotId
-                    ? { ...timeslot, votes: timeslot.votes.filter(vote => vote.id !== voteId) }
+                    ? { ...timeslot,
+                        votes: (timeslot.votes ?? []).filter(vote => vote.id !== voteId) }
                     : timeslot
                 )
               }
@@ -96,6 +98,29 @@ export default function meetingReducer(state = initialState, action) {
         error: null,
       };
     }    
+    case BALLOT_CAST_SUCCESS: {
+      // The response holds all the user's votes in the meeting
+      const { votes, userId, meetingId } = action.payload;
+      return {
+        ...state,
+        meetings: state.meetings.map(meeting =>
+          meeting.id === meetingId
+            ? { 
+                ...meeting, 
+                timeslots: meeting.timeslots.map(timeslot => ({
+                  ...timeslot,
+                  votes: [
+                    ...(timeslot.votes ?? []).filter(vote => vote.user_id !== userId),
+                    ...votes.filter(vote => vote.timeslot_id === timeslot.id),
+                  ],
+                }))
+              }
+            : meeting
+        ),
+        success: 'Votes saved successfully!',
+        error: null,
+      };
+    }
     case TIMESLOT_CREATE_SUCCESS: {
       const { timeslot, meetingId } = action.payload;
       return {
@@ -14,6 +14,11 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    // Let the server read our own recent writes from the primary database
+    const lastWrite = sessionStorage.getItem('lastWrite');
+    if (lastWrite) {
+      config.headers['X-Last-Write'] = lastWrite;
+    }
     return config;
   },
   (error) => {
@@ -21,13 +26,56 @@ api.interceptors.request.use(
   }
 );
 
+// The refresh in flight, shared by every request that gets a 401 meanwhile:
+// the server revokes all of the user's tokens when a refresh token is reused
+let refreshing = null;
+
+const refreshTokens = (refreshToken) => {
+  if (!refreshing) {
+    refreshing = axios.post(
+      `${api.defaults.baseURL}/users/token/refresh`, null,
+      { headers: { Authorization: `Bearer ${refreshToken}` } })
+      .then(({ data }) => {
+        localStorage.setItem('token', data.token);
+        localStorage.setItem('refreshToken', data.refresh_token);
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+};
+
 // Add a response interceptor to handle response
 api.interceptors.response.use(
   (response) => {
-    // If the response was successful, there's no need to do anything
+    // Remember when the server last applied one of our writes
+    const lastWrite = response.headers['x-last-write'];
+    if (lastWrite) {
+      sessionStorage.setItem('lastWrite', lastWrite);
+    }
     return response;
   },
-  (error) => {
+  async (error) => {
+    // Network errors and cancellations have no response to look at
+    if (!error.response) {
+      return Promise.reject(error);
+    }
+    const { config } = error;
+    const refreshToken = localStorage.getItem('refreshToken');
+    // If the access token expired, exchange the refresh token once and retry
+    if (error.response.status === 401 && refreshToken && !config.retriedAfterRefresh) {
+      try {
+        // Another request may have refreshed the token since this one was sent
+        if (config.headers.Authorization === `Bearer ${localStorage.getItem('token')}`) {
+          await refreshTokens(refreshToken);
+        }
+        config.retriedAfterRefresh = true;
+        return api(config);
+      } catch (refreshError) {
+        localStorage.removeItem('refreshToken');
+      }
+    }
     // If the server responds with a 401 Unauthorized and we've got a token, clear
     if (error.response.status === 401 && localStorage.getItem('token')) {
       throw new Error('Unauthorized');
@@ -59,6 +107,7 @@ const updateMeeting = async (id, updates) => handleApiCall(api.put(`/meetings/${
 const deleteMeeting = async (id) => handleApiCall(api.delete(`/meetings/${id}`));
 const createVote = async (vote) => handleApiCall(api.post('/votes', vote));
 const deleteVote = async (id) => handleApiCall(api.delete(`/votes/${id}`));
+const castBallot = async (ballot) => handleApiCall(api.post('/votes/batch', ballot));
 const createTimeSlot = async (timeslot) => handleApiCall(api.post('/timeslots', timeslot));
 const updateTimeSlot = async (id, updates) => handleApiCall(api.put(`/timeslots/${id}`, updates));
 const deleteTimeSlot = async (id) => handleApiCall(api.delete(`/timeslots/${id}`));
@@ -74,6 +123,7 @@ export {
   deleteMeeting,
   createVote,
   deleteVote,
+  castBallot,
   createTimeSlot,
   updateTimeSlot,
   deleteTimeSlot,
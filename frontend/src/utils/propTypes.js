@@ -30,5 +30,6 @@ export const userShape = PropTypes.shape({
 });
 
 export const funcType = PropTypes.func;
+export const boolType = PropTypes.bool;
 export const nodeType = PropTypes.node;
 export const stringType = PropTypes.string;